@@ -0,0 +1,188 @@
+import glob
+import importlib
+import logging
+import os
+import random
+import shutil
+import sys
+from statistics import median
+
+from config import PARSER_GRAMMAR_PATH, PARSER_BUILD_SCRIPT_PATH, BUILD_CACHE_GRAMMAR_FILES, AB_PACKAGE_DIRECTORY, \
+    SIGNIFICANCE_LEVEL, COMPARISON_CONFIDENCE_LEVEL, MIN_RELATIVE_CHANGE, DECIMALS, LOGGER_NAME
+from build_cache import build_parser
+from parse_driver import use_package, grammar_cache
+from stats import confidence_interval, wilcoxon_signed_rank
+
+
+logger = logging.getLogger(LOGGER_NAME)
+
+AB_HEADER = ["Test Name", "Test Class", "Pairs", "Old median [ms]", "New median [ms]", "Median difference [ms]", "Difference CI",
+             "Ratio", "p-value", "Change"]
+
+# Package names of the parsers generated from the snapshot grammar (A) and from the current grammar (B)
+OLD_PACKAGE = "ab_old"
+NEW_PACKAGE = "ab_new"
+
+# Orders of the iterations of a round (A: old grammar, B: new grammar), one of them gets chosen randomly per round
+BLOCKS = ["ABBA", "BAAB"]
+
+
+def prepare_package(package_name, grammar_path, root=AB_PACKAGE_DIRECTORY):
+    """
+        Generates the parser of a grammar into its own package (root/package_name), so the old and the new parser can be loaded in the same process.
+        The grammar gets copied (named like PARSER_GRAMMAR_PATH) together with the imported grammars (BUILD_CACHE_GRAMMAR_FILES) and the build script,
+        which runs inside the package directory. The grammar file itself is only read.
+
+        Args:
+            package_name (str): The name of the package.
+            grammar_path (str): The grammar file.
+            root (str): The directory of the packages (gets added to sys.path).
+        Returns:
+            A tuple of the build cache key and if the parser was restored from the build cache.
+    """
+
+    package_path = os.path.join(root, package_name)
+    shutil.rmtree(package_path, ignore_errors=True)
+    os.makedirs(package_path)
+
+    grammar_files = []
+    for file_path in glob.glob(BUILD_CACHE_GRAMMAR_FILES):
+        if os.path.abspath(file_path) == os.path.abspath(PARSER_GRAMMAR_PATH): continue
+        grammar_files.append(shutil.copy(file_path, package_path))
+    grammar_files.append(shutil.copy(grammar_path, os.path.join(package_path, os.path.basename(PARSER_GRAMMAR_PATH))))
+
+    script_path = shutil.copy(PARSER_BUILD_SCRIPT_PATH, package_path)
+    open(os.path.join(package_path, "__init__.py"), mode="a").close()
+
+    build_key = build_parser(os.path.abspath(script_path), grammar_files, package_path, cwd=package_path)
+
+    root_path = os.path.abspath(root)
+    if root_path not in sys.path: sys.path.insert(0, root_path)
+    importlib.invalidate_caches()
+    for module_name in [name for name in sys.modules if name == package_name or name.startswith(package_name + ".")]:
+        del sys.modules[module_name] # a previous build in this process
+    grammar_cache.pop(package_name, None)
+
+    return build_key
+
+def get_schedule(rounds, rng):
+    """
+        Creates the order of the iterations: Every round is a randomly chosen block ABBA or BAAB,
+        so drifts (e.g. thermal throttling) and order effects hit both grammars equally.
+
+        Args:
+            rounds (int): The amount of rounds (4 iterations, 2 pairs per round).
+            rng (random.Random): The random generator.
+        Returns:
+            A list of blocks.
+    """
+
+    return [rng.choice(BLOCKS) for _ in range(rounds)]
+
+def compare_pairs(old_measurements, new_measurements):
+    """
+        Compares the paired measurements of the old and the new grammar.
+        The difference new - old of every pair gets tested with the Wilcoxon signed-rank test. A test is "slower" or "faster", if the test is significant,
+        the confidence interval of the median difference doesn't contain 0 and the ratio of medians differs at least MIN_RELATIVE_CHANGE from 1.
+
+        Args:
+            old_measurements (list): The measurements of the old grammar.
+            new_measurements (list): The measurements of the new grammar (same order, pair i = old_measurements[i], new_measurements[i]).
+        Returns:
+            A list of the median of the old and the new measurements, the median difference, its confidence interval, the ratio of medians, the p-value and the change.
+    """
+
+    differences = [new - old for old, new in zip(old_measurements, new_measurements)]
+    if len(differences) < 2: return [median(old_measurements), median(new_measurements), "", "", "", "", "n/a"]
+
+    median_difference, lower, upper = confidence_interval(differences, "median", COMPARISON_CONFIDENCE_LEVEL)
+    _, p_value = wilcoxon_signed_rank(differences)
+
+    old_median, new_median = median(old_measurements), median(new_measurements)
+    ratio = new_median / old_median if old_median else None
+
+    change = "unchanged"
+    if p_value < SIGNIFICANCE_LEVEL and ratio is not None and abs(ratio - 1) >= MIN_RELATIVE_CHANGE:
+        if lower > 0: change = "slower"
+        if upper < 0: change = "faster"
+
+    return [round(old_median, DECIMALS + 2), round(new_median, DECIMALS + 2), round(median_difference, DECIMALS + 2),
+            f"[{round(lower, DECIMALS + 2)}, {round(upper, DECIMALS + 2)}]", round(ratio, DECIMALS + 2) if ratio is not None else "",
+            round(p_value, DECIMALS + 2), change]
+
+def run_ab_test(test_class, method_name, run_once, rounds, rng):
+    """
+        Runs a test alternately with the old and the new parser.
+
+        Args:
+            test_class (class): The unittest class.
+            method_name (str): The method name.
+            run_once (function): Runs the test once (gets the test class and the method name) and returns a tuple of the success and the measured time in ms
+                                 (None, if the test didn't measure anything).
+            rounds (int): The amount of rounds.
+            rng (random.Random): The random generator of the schedule.
+        Returns:
+            A tuple of the old and the new measurements (paired by index, pairs with a failed sample are dropped) and if all runs were successful.
+    """
+
+    measurements = {"A": [], "B": []}
+    success = True
+
+    try:
+        for variant in "AB": # load the modules and fill the DFA caches of both parsers before the measurement
+            use_package(OLD_PACKAGE if variant == "A" else NEW_PACKAGE)
+            run_once(test_class, method_name)
+
+        for block in get_schedule(rounds, rng):
+            for variant in block:
+                use_package(OLD_PACKAGE if variant == "A" else NEW_PACKAGE)
+                res, measurement = run_once(test_class, method_name)
+                success = success and res and measurement is not None
+                measurements[variant].append(measurement)
+    finally:
+        use_package(None)
+
+    pairs = [(old, new) for old, new in zip(measurements["A"], measurements["B"]) if old is not None and new is not None]
+
+    return [old for old, _ in pairs], [new for _, new in pairs], success
+
+def run_ab_benchmark(test_methods, old_grammar_path, run_once, rounds, seed=0):
+    """
+        Interleaved A/B benchmark of the snapshot grammar (A) and the current grammar (B) in the same process.
+        Both grammars get generated into separate packages (see prepare_package) and the parse driver gets switched between them (see parse_driver.use_package).
+        Only tests, which parse with the parse driver (parse_driver.parse or load_grammar), can be switched.
+
+        Args:
+            test_methods (list): The tests as lists of test class, class name and method name.
+            old_grammar_path (str): The grammar of the snapshot.
+            run_once (function): Runs the test once (see run_ab_test).
+            rounds (int): The amount of rounds per test.
+            seed (int): The seed of the schedule.
+        Returns:
+            A list of rows (see AB_HEADER) and a list of the failed tests.
+    """
+
+    from print import print_progress_bar
+
+    prepare_package(OLD_PACKAGE, old_grammar_path)
+    prepare_package(NEW_PACKAGE, PARSER_GRAMMAR_PATH)
+
+    rng = random.Random(seed)
+
+    rows = []
+    failed_tests = []
+    for i, (test_class, class_name, method_name) in enumerate(test_methods):
+        try:
+            old_measurements, new_measurements, success = run_ab_test(test_class, method_name, run_once, rounds, rng)
+        except Exception as e:
+            logger.error(f"Error in the A/B benchmark of {method_name}: {e}")
+            failed_tests.append([class_name, method_name])
+            continue
+        finally:
+            print_progress_bar(i + 1, len(test_methods))
+
+        if not success: failed_tests.append([class_name, method_name])
+        if not old_measurements: continue
+        rows.append([method_name, class_name, len(old_measurements)] + compare_pairs(old_measurements, new_measurements))
+
+    return rows, failed_tests
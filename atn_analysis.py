@@ -1,42 +1,150 @@
+import fnmatch
+import hashlib
+import json
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
-from config import ATN_ANALYSIS_INPUT_DIRECTORY, ATN_ANALYSIS_OUTPUT_DIRECTORY
+from config import ATN_ANALYSIS_INPUT_DIRECTORY, ATN_ANALYSIS_OUTPUT_DIRECTORY, ATN_RENDER_FORMAT, ATN_RENDER_WORKERS, ATN_RENDER_RULES
 from print import print_progress_bar
 
 
-def convert_dot_to_png(dot_directory, png_directory):
+# Name of the manifest in the output directory (image file name -> content hash of the dot file of the last render)
+MANIFEST_FILE_NAME = ".render_manifest.json"
+
+
+def get_rule_name(filename):
     """
-        Converts all dot files in a directory to pngs and saves them in a given directory.
+        Gets the rule name of a dot file generated with the '-atn' tool option (<Grammar>.<rule>.dot).
+
+        Args:
+            filename (str): The file name.
+        Returns:
+            The rule name.
+    """
+
+    return os.path.splitext(filename)[0].split(".")[-1]
+
+def hash_file(file_path):
+    """
+        Calculates the content hash of a file.
+
+        Args:
+            file_path (str): The path of the file.
+        Returns:
+            The sha256 hex digest.
+    """
+
+    with open(file_path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+def load_manifest(output_directory):
+    """
+        Loads the manifest of the last render.
+
+        Args:
+            output_directory (str): The directory of the images.
+        Returns:
+            A dict image file name -> content hash of the rendered dot file. Empty if no (valid) manifest exists.
+    """
+
+    try:
+        with open(os.path.join(output_directory, MANIFEST_FILE_NAME)) as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+
+def render_dot_file(dot_file_path, output_file_path, output_format):
+    """
+        Renders a dot file with graphviz.
+
+        Args:
+            dot_file_path (str): The dot file.
+            output_file_path (str): The image file.
+            output_format (str): "png" or "svg".
+    """
+
+    subprocess.run(['dot', f'-T{output_format}', dot_file_path, '-o', output_file_path], check=True, capture_output=True)
+
+def convert_dot_files(dot_directory, output_directory, output_format=ATN_RENDER_FORMAT, rules=ATN_RENDER_RULES, workers=ATN_RENDER_WORKERS):
+    """
+        Converts the dot files in a directory to images (in parallel) and saves them in a given directory.
+        Files, whose content didn't change since the last render (content hash in the manifest), are skipped.
 
         Args:
             dot_directory (str): The directory to convert.
-            png_directory (str): The directory to save the pngs.
+            output_directory (str): The directory to save the images.
+            output_format (str): "png" or "svg".
+            rules (list): Rule names or glob patterns (e.g. "expr*"). Only the ATNs of these rules get rendered. Empty list: all rules.
+            workers (int): Maximum amount of parallel dot processes. 0: amount of cores.
+        Returns:
+            A tuple of the amount of rendered, skipped and failed files.
     """
 
-    output_directory = png_directory
     os.makedirs(output_directory, exist_ok=True)
 
-    total_amount_of_dot_files = len([name for name in os.listdir(dot_directory) if name.endswith('.dot')])
-    amount_of_dot_files = 0
-    for filename in os.listdir(dot_directory):
-        if filename.endswith('.dot'):
-            amount_of_dot_files += 1
+    dot_files = sorted(name for name in os.listdir(dot_directory) if name.endswith('.dot'))
+    if rules: dot_files = [name for name in dot_files if any(fnmatch.fnmatchcase(get_rule_name(name), rule) for rule in rules)]
+
+    if not dot_files:
+        print("⚠️ No ATNs found! Do you generated the parser with the '-atn' tool option?")
+        return 0, 0, 0
+
+    manifest = load_manifest(output_directory)
+
+    pending = []
+    skipped = 0
+    for filename in dot_files:
+        dot_file_path = os.path.join(dot_directory, filename)
+        output_filename = f"{os.path.splitext(filename)[0]}.{output_format}"
+        output_file_path = os.path.join(output_directory, output_filename)
+        content_hash = hash_file(dot_file_path)
 
-            dot_file_path = os.path.join(dot_directory, filename)
-            png_file_path = os.path.join(output_directory, f"{os.path.splitext(filename)[0]}.png")
+        if manifest.get(output_filename) == content_hash and os.path.exists(output_file_path):
+            skipped += 1
+            continue
 
-            command = ['dot', '-Tpng', dot_file_path, '-o', png_file_path]
+        pending.append((filename, dot_file_path, output_file_path, content_hash))
 
+    rendered = 0
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor: # dot runs in its own process, so threads are enough
+        futures = {executor.submit(render_dot_file, dot_file_path, output_file_path, output_format): (filename, output_file_path, content_hash)
+                   for filename, dot_file_path, output_file_path, content_hash in pending}
+
+        for amount_of_finished, future in enumerate(as_completed(futures)):
+            filename, output_file_path, content_hash = futures[future]
             try:
-                subprocess.run(command, check=True, shell=True)
-                print_progress_bar(amount_of_dot_files, total_amount_of_dot_files, length=40)
-            except Exception as e:
-                print(f"Failed to convert {filename}: {e}")
+                future.result()
+                manifest[os.path.basename(output_file_path)] = content_hash
+                rendered += 1
+            except FileNotFoundError:
+                print("\n⚠️ Graphviz 'dot' not found! Please install graphviz.")
+                executor.shutdown(cancel_futures=True)
+                failed += len(futures) - amount_of_finished
+                break
+            except subprocess.CalledProcessError as e:
+                print(f"\nFailed to convert {filename}: {e.stderr.decode(errors='replace').strip()}")
+                failed += 1
 
-    if amount_of_dot_files == 0:
-        print("⚠️ No ATNs found! Do you generated the parser with the '-atn' tool option?")
+            print_progress_bar(amount_of_finished + 1, len(futures), length=40)
+
+    with open(os.path.join(output_directory, MANIFEST_FILE_NAME), mode='w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+
+    return rendered, skipped, failed
+
+def convert_dot_to_png(dot_directory, png_directory):
+    """
+        Converts all dot files in a directory to pngs and saves them in a given directory.
+
+        Args:
+            dot_directory (str): The directory to convert.
+            png_directory (str): The directory to save the pngs.
+    """
+
+    convert_dot_files(dot_directory, png_directory, output_format="png", rules=[])
 
 
 if __name__ == "__main__":
@@ -46,6 +154,7 @@ if __name__ == "__main__":
     output_directory = ATN_ANALYSIS_OUTPUT_DIRECTORY
 
     if os.path.isdir(input_directory) and os.path.isdir(output_directory):
-        convert_dot_to_png(input_directory, output_directory)
+        rendered, skipped, failed = convert_dot_files(input_directory, output_directory)
+        print(f"\nℹ️ Rendered {rendered}, skipped {skipped} unchanged, {failed} failed")
     else:
         print("Invalid directory. Please check the path and try again.")
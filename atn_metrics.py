@@ -0,0 +1,265 @@
+import os
+import re
+from itertools import combinations
+
+from antlr4.LL1Analyzer import LL1Analyzer
+from antlr4.atn.ATNState import ATNState
+from antlr4.atn.Transition import Transition
+
+
+RULE_METRICS_HEADER = ["Rule", "States", "Transitions", "Epsilon transitions", "Decisions", "Max. alternatives", "Loops",
+                       "Left recursive", "Recursive", "LL(1) conflicts", "Unbounded lookahead risks"]
+
+DECISION_METRICS_HEADER = ["Decision", "Rule", "Type", "Alternatives", "LL(1) conflict", "Lookahead risk"]
+
+# Columns of RULE_METRICS_HEADER, which are compared with the snapshot
+COMPARED_RULE_METRICS = ["States", "Transitions", "Epsilon transitions", "Decisions", "Max. alternatives", "Loops", "LL(1) conflicts", "Unbounded lookahead risks"]
+
+DECISION_TYPES = {
+    ATNState.BLOCK_START: "block",
+    ATNState.PLUS_BLOCK_START: "plus block",
+    ATNState.STAR_BLOCK_START: "star block",
+    ATNState.STAR_LOOP_ENTRY: "star loop",
+    ATNState.PLUS_LOOP_BACK: "plus loop",
+    ATNState.TOKEN_START: "tokens",
+}
+
+
+def get_recursive_rules(atn):
+    """
+        Finds all rules, which can (directly or indirectly) invoke themselves.
+
+        Args:
+            atn (ATN): The ATN of the parser.
+        Returns:
+            A set of rule indexes.
+    """
+
+    calls = {rule_index: set() for rule_index in range(len(atn.ruleToStartState))}
+    for state in atn.states:
+        if state is None: continue
+        for transition in state.transitions:
+            if transition.serializationType == Transition.RULE: calls[state.ruleIndex].add(transition.ruleIndex)
+
+    recursive_rules = set()
+    for rule_index in calls:
+        stack = list(calls[rule_index])
+        visited = set()
+        while stack:
+            called = stack.pop()
+            if called == rule_index:
+                recursive_rules.add(rule_index)
+                break
+            if called in visited: continue
+            visited.add(called)
+            stack.extend(calls[called])
+
+    return recursive_rules
+
+def get_alternative_lookahead(analyzer, decision_state):
+    """
+        Computes the LL(1) lookahead set of every alternative of a decision (predicates are ignored).
+
+        Args:
+            analyzer (LL1Analyzer): The analyzer of the ATN.
+            decision_state (DecisionState): The decision state.
+        Returns:
+            A list of sets of token types (Token.EPSILON, if the end of the rule is reachable).
+    """
+
+    return [set(analyzer.LOOK(transition.target)) for transition in decision_state.transitions]
+
+def starts_with_unbounded_construct(state, recursive_rules):
+    """
+        Checks if an alternative can start (before the first token) with a loop or an invocation of a recursive rule,
+        so two alternatives may share an arbitrarily long prefix.
+
+        Args:
+            state (ATNState): The first state of the alternative.
+            recursive_rules (set): The indexes of the recursive rules.
+        Returns:
+            True, if a loop or recursive rule is reachable over epsilon transitions.
+    """
+
+    stack = [state]
+    visited = set()
+    while stack:
+        state = stack.pop()
+        if state.stateNumber in visited: continue
+        visited.add(state.stateNumber)
+
+        if state.stateType in (ATNState.STAR_LOOP_ENTRY, ATNState.PLUS_BLOCK_START): return True
+
+        for transition in state.transitions:
+            if transition.serializationType == Transition.RULE:
+                if transition.ruleIndex in recursive_rules: return True
+                stack.append(transition.target)
+            elif transition.isEpsilon and state.stateType != ATNState.RULE_STOP:
+                stack.append(transition.target)
+
+    return False
+
+def compute_atn_metrics(atn, rule_names):
+    """
+        Computes static complexity metrics of the ATN of a parser (no parsing and no graphviz needed).
+        Lookahead risk of a decision: "low" if the LL(1) lookahead sets of the alternatives are disjoint, "LL(k)" if they overlap
+        and "unbounded" if two overlapping alternatives can both start with a loop or a recursive rule (the prediction may have to look ahead over the whole loop or recursion).
+
+        Args:
+            atn (ATN): The ATN of the parser (e.g. GrammarParser.atn, deserialized from the serialized ATN).
+            rule_names (list): The rule names of the parser.
+        Returns:
+            A tuple of the rows per rule (see RULE_METRICS_HEADER) and per decision (see DECISION_METRICS_HEADER).
+    """
+
+    analyzer = LL1Analyzer(atn)
+    recursive_rules = get_recursive_rules(atn)
+
+    rule_counters = [{"states": 0, "transitions": 0, "epsilon": 0, "decisions": 0, "max_alternatives": 0, "loops": 0, "conflicts": 0, "unbounded": 0}
+                     for _ in rule_names]
+
+    for state in atn.states:
+        if state is None: continue
+
+        counters = rule_counters[state.ruleIndex]
+        counters["states"] += 1
+        counters["transitions"] += len(state.transitions)
+        counters["epsilon"] += sum(1 for transition in state.transitions if transition.isEpsilon)
+        if state.stateType in (ATNState.STAR_LOOP_ENTRY, ATNState.PLUS_LOOP_BACK): counters["loops"] += 1
+
+    decision_rows = []
+    for decision_state in atn.decisionToState:
+        counters = rule_counters[decision_state.ruleIndex]
+        alternatives = len(decision_state.transitions)
+
+        lookahead = get_alternative_lookahead(analyzer, decision_state)
+        conflicting_alternatives = [(a, b) for a, b in combinations(range(alternatives), 2) if lookahead[a] & lookahead[b]]
+        conflict = bool(conflicting_alternatives)
+
+        risk = "low"
+        if conflict:
+            unbounded_alternatives = {alternative for alternative in set(sum(conflicting_alternatives, ()))
+                                      if starts_with_unbounded_construct(decision_state.transitions[alternative].target, recursive_rules)}
+            risk = "unbounded" if any(a in unbounded_alternatives and b in unbounded_alternatives for a, b in conflicting_alternatives) else "LL(k)"
+
+        counters["decisions"] += 1
+        counters["max_alternatives"] = max(counters["max_alternatives"], alternatives)
+        counters["conflicts"] += conflict
+        counters["unbounded"] += risk == "unbounded"
+
+        decision_rows.append([decision_state.decision, rule_names[decision_state.ruleIndex], DECISION_TYPES.get(decision_state.stateType, "block"),
+                              alternatives, conflict, risk])
+
+    rule_rows = []
+    for rule_index, (rule_name, counters) in enumerate(zip(rule_names, rule_counters)):
+        start_state = atn.ruleToStartState[rule_index]
+        rule_rows.append([rule_name, counters["states"], counters["transitions"], counters["epsilon"], counters["decisions"], counters["max_alternatives"],
+                          counters["loops"], start_state.isPrecedenceRule, rule_index in recursive_rules, counters["conflicts"], counters["unbounded"]])
+
+    return rule_rows, decision_rows
+
+def compute_dot_metrics(dot_directory):
+    """
+        Computes the metrics per rule from the .dot files of the '-atn' tool option (if the generated parser isn't available).
+        Only the graph structure is known: Left recursion, recursion and lookahead conflicts are left empty, loops are back edges of the graph.
+
+        Args:
+            dot_directory (str): The directory of the .dot files (<Grammar>.<rule>.dot).
+        Returns:
+            A list of rows per rule (see RULE_METRICS_HEADER).
+    """
+
+    edge_pattern = re.compile(r'^\s*"?(\w+)"?\s*->\s*"?(\w+)"?\s*(?:\[(.*)\])?')
+    node_pattern = re.compile(r'^\s*"?(\w+)"?\s*\[')
+
+    rule_rows = []
+    for filename in sorted(name for name in os.listdir(dot_directory) if name.endswith(".dot")):
+        nodes = set()
+        edges = {}
+        epsilon = 0
+
+        with open(os.path.join(dot_directory, filename), encoding="utf-8") as dot_file:
+            for line in dot_file:
+                edge = edge_pattern.match(line)
+                if edge:
+                    source, target, attributes = edge.groups()
+                    nodes.update((source, target))
+                    edges.setdefault(source, []).append(target)
+                    if attributes and re.search(r"ε|&epsilon;|epsilon", attributes): epsilon += 1
+                    continue
+
+                node = node_pattern.match(line)
+                if node and node.group(1) not in ("node", "edge", "graph"): nodes.add(node.group(1))
+
+        loops = 0
+        state = {} # 1: on the DFS stack, 2: finished
+        for root in sorted(nodes):
+            if root in state: continue
+            stack = [(root, iter(edges.get(root, [])))]
+            state[root] = 1
+            while stack:
+                node, children = stack[-1]
+                child = next(children, None)
+                if child is None:
+                    state[node] = 2
+                    stack.pop()
+                elif state.get(child) == 1:
+                    loops += 1
+                elif child not in state:
+                    state[child] = 1
+                    stack.append((child, iter(edges.get(child, []))))
+
+        out_degrees = [len(targets) for targets in edges.values()]
+        rule_rows.append([os.path.splitext(filename)[0].split(".")[-1], len(nodes), sum(out_degrees), epsilon, sum(1 for degree in out_degrees if degree > 1),
+                          max(out_degrees, default=0), loops, "", "", "", ""])
+
+    return rule_rows
+
+def compare_atn_metrics(rule_rows, snapshot_rows):
+    """
+        Compares the metrics per rule with the metrics of the snapshot (e.g. of the previous grammar version).
+
+        Args:
+            rule_rows (list): The current rows (see RULE_METRICS_HEADER).
+            snapshot_rows (list): The rows of the snapshot (values as strings, read from the csv file).
+        Returns:
+            A list of [rule, metric, snapshot value, current value, difference] of all changed metrics. Added and removed rules have the metric "rule".
+    """
+
+    snapshot_by_rule = {row[0]: row for row in snapshot_rows}
+    current_by_rule = {row[0]: row for row in rule_rows}
+    columns = [RULE_METRICS_HEADER.index(metric) for metric in COMPARED_RULE_METRICS]
+    flags = [RULE_METRICS_HEADER.index("Left recursive"), RULE_METRICS_HEADER.index("Recursive")]
+
+    changes = []
+    for rule_name, row in current_by_rule.items():
+        snapshot_row = snapshot_by_rule.get(rule_name)
+        if snapshot_row is None:
+            changes.append([rule_name, "rule", "", "added", ""])
+            continue
+
+        for column in columns:
+            try:
+                old_value, new_value = int(snapshot_row[column]), int(row[column])
+            except (ValueError, IndexError):
+                continue
+            if old_value != new_value: changes.append([rule_name, RULE_METRICS_HEADER[column], old_value, new_value, new_value - old_value])
+
+        for column in flags:
+            if column < len(snapshot_row) and snapshot_row[column] != "" and row[column] != "" and str(snapshot_row[column]) != str(row[column]): # bools in recreated snapshots
+                changes.append([rule_name, RULE_METRICS_HEADER[column], snapshot_row[column], row[column], ""])
+
+    changes += [[rule_name, "rule", "", "removed", ""] for rule_name in snapshot_by_rule if rule_name not in current_by_rule]
+
+    return changes
+
+
+if __name__ == "__main__":
+    from tabulate import tabulate
+    from parse_driver import load_grammar
+
+    _, parser_class = load_grammar()
+    rule_rows, decision_rows = compute_atn_metrics(parser_class.atn, parser_class.ruleNames)
+
+    print(tabulate(rule_rows, headers=RULE_METRICS_HEADER, tablefmt='fancy_grid'))
+    print(tabulate([row for row in decision_rows if row[5] != "low"], headers=DECISION_METRICS_HEADER, tablefmt='fancy_grid'))
@@ -0,0 +1,183 @@
+import re
+import time
+
+from antlr4.atn.ParserATNSimulator import ParserATNSimulator
+
+
+PROFILE_HEADER = ["Rank", "Decision", "Rule", "Grammar line", "Alternatives", "Invocations", "SLL predictions", "Full LL predictions",
+                  "Max. SLL lookahead", "Avg. SLL lookahead", "Max. LL lookahead", "DFA hits", "DFA misses", "Prediction time [ms]"]
+
+# Collected statistics since the last pop (decision -> dict of counters)
+decision_stats = {}
+
+
+class ProfilingATNSimulator(ParserATNSimulator):
+    """
+        Parser ATN simulator, which collects statistics of every prediction (similar to the ProfilingATNSimulator of the java runtime):
+        Invocations, SLL and full LL predictions, lookahead depth, DFA cache hits and misses and the time spent in the prediction.
+    """
+
+    def __init__(self, parser, atn, decisionToDFA, sharedContextCache):
+        super().__init__(parser, atn, decisionToDFA, sharedContextCache)
+        self.sll_stop_index = -1
+        self.ll_stop_index = -1
+        self.dfa_hits = 0
+        self.dfa_misses = 0
+
+    def adaptivePredict(self, input, decision, outerContext):
+        self.sll_stop_index = -1
+        self.ll_stop_index = -1
+        self.dfa_hits = 0
+        self.dfa_misses = 0
+        start_index = input.index
+
+        t0 = time.perf_counter_ns()
+        try:
+            return super().adaptivePredict(input, decision, outerContext)
+        finally:
+            t1 = time.perf_counter_ns()
+            self.record(decision, start_index, t1 - t0)
+
+    def getExistingTargetState(self, previousD, t):
+        self.sll_stop_index = self._input.index
+        existing_target_state = super().getExistingTargetState(previousD, t)
+
+        if existing_target_state is not None: self.dfa_hits += 1
+
+        return existing_target_state
+
+    def computeTargetState(self, dfa, previousD, t):
+        self.dfa_misses += 1
+
+        return super().computeTargetState(dfa, previousD, t)
+
+    def computeReachSet(self, closure, t, fullCtx):
+        if fullCtx: self.ll_stop_index = self._input.index
+
+        return super().computeReachSet(closure, t, fullCtx)
+
+    def record(self, decision, start_index, prediction_time_ns):
+        """
+            Adds the statistics of the finished prediction to decision_stats.
+
+            Args:
+                decision (int): The decision number.
+                start_index (int): The token index where the prediction started.
+                prediction_time_ns (int): The time spent in the prediction.
+        """
+
+        stats = decision_stats.get(decision)
+        if stats is None:
+            decision_state = self.atn.decisionToState[decision]
+            stats = decision_stats[decision] = {
+                "rule": self.parser.ruleNames[decision_state.ruleIndex],
+                "alternatives": len(decision_state.transitions),
+                "invocations": 0, "sll_predictions": 0, "ll_predictions": 0,
+                "sll_lookahead_total": 0, "sll_lookahead_max": 0, "ll_lookahead_max": 0,
+                "dfa_hits": 0, "dfa_misses": 0, "time_ns": 0,
+            }
+
+        sll_lookahead = max(self.sll_stop_index - start_index + 1, 0)
+
+        stats["invocations"] += 1
+        stats["sll_lookahead_total"] += sll_lookahead
+        stats["sll_lookahead_max"] = max(stats["sll_lookahead_max"], sll_lookahead)
+        stats["dfa_hits"] += self.dfa_hits
+        stats["dfa_misses"] += self.dfa_misses
+        stats["time_ns"] += prediction_time_ns
+
+        if self.ll_stop_index >= 0:
+            stats["ll_predictions"] += 1
+            stats["ll_lookahead_max"] = max(stats["ll_lookahead_max"], self.ll_stop_index - start_index + 1)
+        else:
+            stats["sll_predictions"] += 1
+
+def install_profiler(parser):
+    """
+        Replaces the ATN simulator of a parser with the profiling ATN simulator (the shared DFA cache is kept).
+
+        Args:
+            parser (Parser): The generated parser.
+    """
+
+    interpreter = parser._interp
+    parser._interp = ProfilingATNSimulator(parser, parser.atn, interpreter.decisionToDFA, interpreter.sharedContextCache)
+    parser._interp.predictionMode = interpreter.predictionMode
+
+def pop_decision_stats():
+    """
+        Returns and resets the collected statistics (used to ship them out of worker processes per test).
+
+        Returns:
+            A dict decision -> dict of counters.
+    """
+
+    stats = dict(decision_stats)
+    decision_stats.clear()
+
+    return stats
+
+def merge_decision_stats(target, stats):
+    """
+        Merges the statistics of a test into the aggregated statistics.
+
+        Args:
+            target (dict): The aggregated statistics (decision -> dict of counters).
+            stats (dict): The statistics to add.
+    """
+
+    for decision, counters in stats.items():
+        if decision not in target:
+            target[decision] = dict(counters)
+            continue
+
+        aggregated = target[decision]
+        for key, value in counters.items():
+            if key in ("rule", "alternatives"): continue
+            aggregated[key] = max(aggregated[key], value) if key.endswith("_max") else aggregated[key] + value
+
+def get_rule_lines(grammar_path):
+    """
+        Finds the line of every rule definition in a grammar file.
+
+        Args:
+            grammar_path (str): The path to the .g4 file.
+        Returns:
+            A dict rule name -> line number (1-based).
+    """
+
+    rule_definition = re.compile(r"^\s*(?:fragment\s+)?([A-Za-z_]\w*)\s*(?:\[[^\]]*\]\s*)?(?:returns\s*\[[^\]]*\]\s*)?(?:locals\s*\[[^\]]*\]\s*)?(?::|$)")
+    keywords = {"grammar", "lexer", "parser", "options", "import", "tokens", "channels", "mode", "fragment"}
+
+    rule_lines = {}
+    with open(grammar_path, encoding="utf-8") as grammar_file:
+        for i, line in enumerate(grammar_file):
+            match = rule_definition.match(line)
+            if match and match.group(1) not in keywords and match.group(1) not in rule_lines:
+                rule_lines[match.group(1)] = i + 1
+
+    return rule_lines
+
+def build_profile_report(stats, grammar_path):
+    """
+        Builds the per decision report, ranked by the time spent in prediction.
+
+        Args:
+            stats (dict): The aggregated statistics (decision -> dict of counters).
+            grammar_path (str): The path to the .g4 file (used to map the rules to lines).
+        Returns:
+            A list of rows (see PROFILE_HEADER).
+    """
+
+    try:
+        rule_lines = get_rule_lines(grammar_path)
+    except OSError:
+        rule_lines = {}
+
+    ranked_decisions = sorted(stats.items(), key=lambda item: item[1]["time_ns"], reverse=True)
+
+    return [[rank + 1, decision, counters["rule"], rule_lines.get(counters["rule"], ""), counters["alternatives"], counters["invocations"],
+             counters["sll_predictions"], counters["ll_predictions"], counters["sll_lookahead_max"],
+             round(counters["sll_lookahead_total"] / counters["invocations"], 2), counters["ll_lookahead_max"],
+             counters["dfa_hits"], counters["dfa_misses"], round(counters["time_ns"] / 1e6, 3)]
+            for rank, (decision, counters) in enumerate(ranked_decisions)]
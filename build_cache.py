@@ -0,0 +1,223 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import time
+
+from config import PARSER_BUILD_SCRIPT_PATH, BUILD_CACHE, BUILD_CACHE_DIRECTORY, BUILD_CACHE_GRAMMAR_FILES, BUILD_CACHE_OUTPUT_DIRECTORY, \
+    BUILD_CACHE_OUTPUT_PATTERNS, BUILD_CACHE_TOOL_VERSION, BUILD_CACHE_TOOL_VERSION_COMMAND, BUILD_CACHE_MAX_SIZE_MB, BUILD_CACHE_MAX_AGE_DAYS, PARSER_GRAMMAR_PATH, LOGGER_NAME
+
+
+logger = logging.getLogger(LOGGER_NAME)
+
+# Name of the description of a cache entry (creation time, last usage, size and cached files)
+ENTRY_FILE_NAME = "entry.json"
+
+tool_version = None
+
+
+def get_tool_version():
+    """
+        Gets the version of the ANTLR tool (called once per process): the pinned version (BUILD_CACHE_TOOL_VERSION or ANTLR4_TOOLS_ANTLR_VERSION)
+        or the version printed by BUILD_CACHE_TOOL_VERSION_COMMAND.
+
+        Returns:
+            The version (e.g. "4.13.2") or "unknown", if the tool can't be called or doesn't print a version.
+    """
+
+    global tool_version
+
+    if tool_version is None:
+        tool_version = BUILD_CACHE_TOOL_VERSION or os.environ.get("ANTLR4_TOOLS_ANTLR_VERSION")
+
+    if tool_version is None:
+        try:
+            output = subprocess.run(BUILD_CACHE_TOOL_VERSION_COMMAND, capture_output=True, text=True, timeout=120, stdin=subprocess.DEVNULL)
+            match = re.search(r"Version\s+(\d+(?:\.\d+)+)", output.stdout + output.stderr)
+            tool_version = match.group(1) if match else "unknown"
+        except (OSError, subprocess.TimeoutExpired):
+            tool_version = "unknown"
+
+        if tool_version == "unknown": logger.warning("Version of the ANTLR tool unknown, pin it with BUILD_CACHE_TOOL_VERSION or ANTLR4_TOOLS_ANTLR_VERSION")
+
+    return tool_version
+
+def get_build_key(script_path=PARSER_BUILD_SCRIPT_PATH, grammar_files=None):
+    """
+        Creates the cache key of the generated parser: hash of the grammar files, the build script (contains the build options) and the tool version.
+
+        Args:
+            script_path (str): The build script.
+            grammar_files (list): The grammar files. Default value is None: BUILD_CACHE_GRAMMAR_FILES and PARSER_GRAMMAR_PATH.
+        Returns:
+            The key (sha256 hex digest).
+    """
+
+    grammar_files = sorted(grammar_files if grammar_files is not None else set(glob.glob(BUILD_CACHE_GRAMMAR_FILES)) | {PARSER_GRAMMAR_PATH})
+
+    build_hash = hashlib.sha256()
+    for file_path in grammar_files + [script_path]:
+        build_hash.update(os.path.basename(file_path).encode())
+        with open(file_path, "rb") as file:
+            build_hash.update(hashlib.sha256(file.read()).digest())
+    build_hash.update(get_tool_version().encode())
+
+    return build_hash.hexdigest()
+
+def load_entry(entry_path):
+    """
+        Loads the description of a cache entry.
+
+        Args:
+            entry_path (str): The directory of the entry.
+        Returns:
+            The description or None, if the entry is incomplete.
+    """
+
+    try:
+        with open(os.path.join(entry_path, ENTRY_FILE_NAME)) as entry_file:
+            return json.load(entry_file)
+    except (OSError, ValueError):
+        return None
+
+def save_entry(entry_path, entry):
+    with open(os.path.join(entry_path, ENTRY_FILE_NAME), mode="w") as entry_file:
+        json.dump(entry, entry_file)
+
+def restore(key, output_directory=BUILD_CACHE_OUTPUT_DIRECTORY):
+    """
+        Copies the cached generated files of a key into the output directory.
+        The files matching BUILD_CACHE_OUTPUT_PATTERNS (except __init__.py) get removed before, so no generated files of another grammar remain.
+
+        Args:
+            key (str): The cache key.
+            output_directory (str): The directory of the generated parser.
+        Returns:
+            True, if the key was cached.
+    """
+
+    entry_path = os.path.join(BUILD_CACHE_DIRECTORY, key)
+    entry = load_entry(entry_path)
+    if entry is None: return False
+
+    for pattern in BUILD_CACHE_OUTPUT_PATTERNS:
+        for file_path in glob.glob(os.path.join(output_directory, pattern)):
+            if os.path.basename(file_path) != "__init__.py": os.remove(file_path)
+
+    for file_name in entry["files"]:
+        shutil.copy2(os.path.join(entry_path, file_name), os.path.join(output_directory, file_name))
+
+    entry["last_used"] = time.time()
+    save_entry(entry_path, entry)
+
+    return True
+
+def store(key, build_start, output_directory=BUILD_CACHE_OUTPUT_DIRECTORY):
+    """
+        Copies the files generated by the build (matching BUILD_CACHE_OUTPUT_PATTERNS and modified since the build start) into the cache.
+
+        Args:
+            key (str): The cache key.
+            build_start (float): The time stamp before the build.
+            output_directory (str): The directory of the generated parser.
+    """
+
+    generated_files = sorted({file_path for pattern in BUILD_CACHE_OUTPUT_PATTERNS for file_path in glob.glob(os.path.join(output_directory, pattern))
+                              if os.path.getmtime(file_path) >= build_start})
+    if not generated_files:
+        logger.warning(f"No generated files found in {output_directory}. Parser not cached.")
+        return
+
+    entry_path = os.path.join(BUILD_CACHE_DIRECTORY, key)
+    temp_entry_path = entry_path + ".tmp"
+    shutil.rmtree(temp_entry_path, ignore_errors=True)
+    os.makedirs(temp_entry_path)
+
+    for file_path in generated_files:
+        shutil.copy2(file_path, temp_entry_path)
+
+    save_entry(temp_entry_path, {
+        "created": time.time(),
+        "last_used": time.time(),
+        "size": sum(os.path.getsize(file_path) for file_path in generated_files),
+        "files": [os.path.basename(file_path) for file_path in generated_files],
+    })
+
+    shutil.rmtree(entry_path, ignore_errors=True)
+    os.replace(temp_entry_path, entry_path) # the entry gets visible only when complete
+
+def evict(max_size_mb=BUILD_CACHE_MAX_SIZE_MB, max_age_days=BUILD_CACHE_MAX_AGE_DAYS):
+    """
+        Removes entries, which weren't used for max_age_days, and the least recently used entries until the cache is smaller than max_size_mb.
+
+        Args:
+            max_size_mb (float): The maximum size of the cache in MB.
+            max_age_days (float): The maximum age (since the last usage) of an entry in days.
+        Returns:
+            The list of removed keys.
+    """
+
+    if not os.path.isdir(BUILD_CACHE_DIRECTORY): return []
+
+    entries = []
+    for key in os.listdir(BUILD_CACHE_DIRECTORY):
+        entry_path = os.path.join(BUILD_CACHE_DIRECTORY, key)
+        entry = load_entry(entry_path)
+        if entry is None: # incomplete or unknown entry
+            shutil.rmtree(entry_path, ignore_errors=True)
+            continue
+        entries.append((entry["last_used"], entry["size"], key))
+
+    entries.sort(reverse=True) # most recently used first
+    now = time.time()
+
+    removed = []
+    total_size = 0
+    for last_used, size, key in entries:
+        total_size += size
+        if now - last_used > max_age_days * 86400 or total_size > max_size_mb * 1024 * 1024:
+            shutil.rmtree(os.path.join(BUILD_CACHE_DIRECTORY, key), ignore_errors=True)
+            removed.append(key)
+            total_size -= size
+
+    return removed
+
+def build_parser(script_path=PARSER_BUILD_SCRIPT_PATH, grammar_files=None, output_directory=BUILD_CACHE_OUTPUT_DIRECTORY, cwd=None):
+    """
+        Builds the parser of the current grammar with the build script. With BUILD_CACHE the generated files are restored from the cache on a hit
+        and cached after a successful build.
+
+        Args:
+            script_path (str): The build script.
+            grammar_files (list): The grammar files. Default value is None: BUILD_CACHE_GRAMMAR_FILES and PARSER_GRAMMAR_PATH.
+            output_directory (str): The directory of the generated parser.
+            cwd (str): The working directory of the build script. Default value is None: current working directory.
+        Returns:
+            A tuple of the cache key (None if BUILD_CACHE = False) and if the parser was restored from the cache.
+    """
+
+    if not BUILD_CACHE:
+        subprocess.call(['sh', script_path], cwd=cwd)
+        return None, False
+
+    key = get_build_key(script_path, grammar_files)
+
+    if restore(key, output_directory):
+        logger.info(f"ℹ️ Restored parser from build cache ({key})")
+        return key, True
+
+    build_start = time.time() - 1 # mtime resolution of some file systems is one second
+    return_code = subprocess.call(['sh', script_path], cwd=cwd)
+
+    if return_code == 0:
+        store(key, build_start, output_directory)
+        removed = evict()
+        if removed: logger.info(f"ℹ️ Evicted {len(removed)} parsers from build cache")
+    else:
+        logger.error(f"Build script {script_path} failed with exit code {return_code}. Parser not cached.")
+
+    return key, False
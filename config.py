@@ -30,12 +30,29 @@ OUTLIER_DETECTION = "iqr" # "iqr", "high-low"
 """
 Test Settings
 """
-# If the difference value (old time - new time) is in this tolerance, the value is set to 0
+# If the difference value (old time - new time) is in this tolerance, the value is set to 0 (only used if CALIBRATION = False, else the tolerance is derived from the noise).
+# Only the difference columns are affected, the change classification (see SIGNIFICANCE_LEVEL) is independent of it.
 DIFF_TOL = 0 # ms
 
 # How much a test gets reran.
 NUMBER_OF_RUNS_PER_TEST = 50
 
+# If true, a test gets reran until the confidence interval of ADAPTIVE_STATISTIC is narrow enough (instead of NUMBER_OF_RUNS_PER_TEST times).
+ADAPTIVE_SAMPLING = False
+
+# The statistic, whose confidence interval is checked.
+ADAPTIVE_STATISTIC = "median" # "median", "mean"
+
+# The confidence level of the interval.
+ADAPTIVE_CONFIDENCE_LEVEL = 0.95
+
+# The sampling stops, if the interval width relative to the statistic ((upper - lower) / statistic) is below this value.
+ADAPTIVE_RELATIVE_CI_WIDTH = 0.05
+
+# Minimum and maximum amount of runs per test (only important if ADAPTIVE_SAMPLING = True).
+ADAPTIVE_MIN_RUNS = 10
+ADAPTIVE_MAX_RUNS = 500
+
 # The unittest classes with the test methods
 TEST_CASES = [
     [GrammarTransformTest, "example_test"]
@@ -44,6 +61,166 @@ TEST_CASES = [
 # Run tests NUMBER_OF_RUNS_PER_TEST times.
 RUN_TESTS_MULTIPLE_TIMES = True
 
+# The harness, which runs the test iterations.
+# "unittest": Every iteration runs in a new TestSuite with TextTestRunner (setUp, tearDown and class fixtures in every iteration).
+# "direct": The test gets instantiated once, the fixtures run once and the method gets called directly. The overhead of an empty test gets subtracted.
+TEST_HARNESS = "unittest" # "unittest", "direct"
+
+# Amount of calls of the empty test, which measure the overhead of the direct harness (before every test).
+HARNESS_OVERHEAD_RUNS = 200
+
+
+"""
+Comparison Settings
+"""
+# Significance level of the Mann-Whitney U test between the raw samples of the snapshot and the current measurement.
+SIGNIFICANCE_LEVEL = 0.05
+
+# Confidence level of the bootstrap interval of the ratio of medians (current / snapshot).
+COMPARISON_CONFIDENCE_LEVEL = 0.95
+
+# Amount of bootstrap resamples.
+BOOTSTRAP_RESAMPLES = 1000
+
+# Seed of the bootstrap, so the intervals are reproducible.
+BOOTSTRAP_SEED = 0
+
+# Minimal relative change of the median (e.g. 0.02 = 2 %), so a significant change is classified as "faster" or "slower".
+MIN_RELATIVE_CHANGE = 0.0
+
+
+"""
+Parse Driver Settings
+"""
+# The package of the generated parser.
+PARSER_PACKAGE = "example_grammar"
+
+# The module and class name of the generated lexer.
+LEXER_NAME = "GrammarLexer"
+
+# The module and class name of the generated parser.
+PARSER_NAME = "GrammarParser"
+
+# The start rule of the grammar.
+PARSER_START_RULE = "s"
+
+
+"""
+DFA Cache Settings
+"""
+# If every test also gets measured with a cold DFA cache. The DFA and prediction context caches of the generated lexer and parser (PARSER_PACKAGE) get reset before every cold iteration.
+# The normal measurement is the warm one. Only used if RUN_TESTS_MULTIPLE_TIMES = True.
+CACHE_MODE_ANALYSIS = False
+
+# Amount of iterations with a cold cache per test.
+COLD_RUNS_PER_TEST = 10
+
+# Amount of iterations after a cache reset, whose latencies get saved as warm-up curve (before the warm measurement starts).
+WARMUP_RUNS_PER_TEST = 20
+
+# Glob of input files, which get parsed by the parse driver to pre-warm the caches before the warm measurement. Default value is an empty string: No corpus.
+WARMUP_CORPUS = "" # e.g. "corpus/**/*.txt"
+
+
+"""
+Memory Analysis Settings
+"""
+# If the memory of every test gets measured too (measure_performance.measure_memory): peak traced allocation, net retained memory, live memory blocks,
+# parse tree nodes and depth. This needs one additional, untimed run of the test with tracemalloc after the timed iterations.
+MEMORY_ANALYSIS = False
+
+# Relative change to the snapshot (e.g. 0.05 = 5 %), from which a memory metric is classified as "larger" or "smaller".
+MEMORY_CHANGE_TOLERANCE = 0.05
+
+
+"""
+Corpus Generator Settings
+"""
+# If a corpus gets generated from the ATN of the parser (corpus_generator.py) and benchmarked as additional test (corpus_generator.CorpusTest).
+# The corpus is cached in CORPUS_DIRECTORY, keyed by the content hash of PARSER_GRAMMAR_PATH and the options below.
+CORPUS_GENERATION = False
+
+# The folder of the generated corpora.
+CORPUS_DIRECTORY = "generated_corpus"
+
+# The minimum amount of generated sentences.
+CORPUS_SIZE = 100
+
+# Amount of tokens, from which on the generator finishes the sentence the shortest way.
+CORPUS_TARGET_LENGTH = 30
+
+# Rule nesting depth, from which on the generator finishes the rule the shortest way.
+CORPUS_MAX_RECURSION_DEPTH = 10
+
+# The fraction of parser rules (0 - 1), which should be covered. The generator continues after CORPUS_SIZE sentences until it is reached.
+CORPUS_MIN_RULE_COVERAGE = 0.0
+
+# The maximum amount of generated sentences (valid and invalid ones), so the generation always stops.
+CORPUS_MAX_ATTEMPTS = 10000
+
+# The seed of the random generator (same seed, grammar and options = same corpus).
+CORPUS_SEED = 0
+
+# The text between two tokens (has to be skipped by the lexer, usually whitespace).
+CORPUS_TOKEN_SEPARATOR = " "
+
+
+"""
+Scaling Settings
+"""
+# If the input generators of the test classes (methods scaling_<name>(self, size), which return an input text) get run over a geometric series of sizes.
+# The latency curve gets fitted (linear, n log n, quadratic) and compared with the growth class of the snapshot.
+SCALING_ANALYSIS = False
+
+# The geometric series of input sizes: SCALING_MIN_SIZE, SCALING_MIN_SIZE * SCALING_FACTOR, ... up to SCALING_MAX_SIZE.
+SCALING_MIN_SIZE = 8
+SCALING_MAX_SIZE = 1024
+SCALING_FACTOR = 2
+
+# How much every size gets parsed (the median is used).
+SCALING_RUNS_PER_SIZE = 5
+
+
+"""
+Two-Stage Parsing Settings
+"""
+# If every input parsed by the parse driver (and every file of TWO_STAGE_INPUTS) gets benchmarked with full LL and with two-stage parsing (two_stage.parse_two_stage):
+# SLL prediction with bail out error strategy first, full LL only if this fails.
+TWO_STAGE_BENCHMARK = False
+
+# Glob of additional input files for the two-stage benchmark. Default value is an empty string: Only the inputs of the tests.
+TWO_STAGE_INPUTS = "" # e.g. "corpus/**/*.txt"
+
+# How much every input gets parsed per strategy (the median is used).
+TWO_STAGE_RUNS_PER_INPUT = 10
+
+
+"""
+Parallel Settings
+"""
+# If the tests should run in a pool of worker processes. Every worker owns a subset of the test methods.
+PARALLEL_EXECUTION = False
+
+# Amount of worker processes. Default value is 0: One worker per available core.
+NUMBER_OF_WORKERS = 0
+
+# If every worker should be pinned to its own core (only supported on linux).
+PIN_WORKERS_TO_CORES = True
+
+# The cores the workers get pinned to. Default value is an empty list: All cores available to the process are used.
+WORKER_CORES = [] # e.g. [2, 3, 4, 5]
+
+
+"""
+Isolation Settings
+"""
+# Runs every test method ("method") or every test class ("class") in a freshly spawned interpreter, so caches of earlier tests don't influence later ones.
+# Default value is "none": All tests run in this interpreter. Not used if PARALLEL_EXECUTION = True.
+ISOLATION_MODE = "none" # "none", "method", "class"
+
+# Amount of spawned worker interpreters which are kept ready, so the spawn cost stays out of the measurement.
+ISOLATION_POOL_SIZE = 1
+
 
 """
 Output Table Settings
@@ -51,8 +228,158 @@ Output Table Settings
 # Filter for the console table. Rows with avg parsing time < IGNORE_TOLERANCE will not be shown.
 IGNORE_TOLERANCE = 1 # ms
 
+# The table headers of the parse phases measured by the parse driver (also for csv files in snapshots)
+PHASE_HEADER = ["Lexing [ms]", "Token buffering [ms]", "Parsing [ms]", "Visitor [ms]"]
+
+# The table header of the average parsing time with cold DFA cache (also for csv files in snapshots)
+COLD_HEADER = "Cold avg. Parsing Time [ms]"
+
+# The table headers of the memory metrics (also for csv files in snapshots)
+MEMORY_HEADER = ["Peak memory [KiB]", "Retained memory [KiB]", "Live memory blocks", "Parse tree nodes", "Parse tree depth"]
+
 # The table headers (also for csv files in snapshots)
-RESULT_HEADER = ["Test Name", "Avg. Parsing Time [ms]", "Difference to origin [ms]", "Success", "Percentage", "Test Class", "Total parsing time [ms]"]
+RESULT_HEADER = ["Test Name", "Avg. Parsing Time [ms]", "Difference to origin [ms]", "Success", "Percentage", "Test Class", "Total parsing time [ms]",
+                 "Change", "Median ratio", "Median ratio CI", "p-value", "Effect size"] + PHASE_HEADER + [COLD_HEADER] + MEMORY_HEADER
+
+
+"""
+Environment Settings
+"""
+# If every run executes a calibration microbenchmark, which estimates the noise floor and the relative speed of the machine.
+# The environment fingerprint (cpu, cores, governor, load, affinity, python and ANTLR runtime version) and the calibration get saved in the metadata
+# and compared with the snapshot. Mismatches get reported as warnings.
+# The noise of the microbenchmark fluctuates a lot between runs, so it only replaces DIFF_TOL (see NOISE_TOLERANCE_FACTOR) and never the change classification.
+CALIBRATION = False
+
+# Amount of timed runs and size of the workload per run of the calibration.
+CALIBRATION_RUNS = 30
+CALIBRATION_ITERATIONS = 20000
+
+# The tolerance of the difference columns is NOISE_TOLERANCE_FACTOR * noise (relative to the snapshot value) instead of DIFF_TOL.
+NOISE_TOLERANCE_FACTOR = 2
+
+# Relative difference of the calibration speed to the snapshot (e.g. 0.25 = 25 %), from which a different machine speed is reported (if larger than 2 * noise).
+CALIBRATION_SPEED_TOLERANCE = 0.25
+
+# If the times of the snapshot get normalized to the speed of the current machine (calibration time of the snapshot / current calibration time).
+CALIBRATION_NORMALIZE = False
+
+
+"""
+Rule Profiling Settings
+"""
+# If the time of every grammar rule gets recorded while parsing with the parse driver (a parse listener timestamps entering and exiting every rule context).
+# Inclusive time (with sub rules), exclusive time (without sub rules) and invocations get aggregated per rule over all tests (per run of every test).
+# The report is saved in the snapshot (rule_profile.csv) and compared with the rules of the snapshot grammar. The listener adds overhead to the measured times.
+RULE_PROFILING = False
+
+# The amount of rules in the printed tables.
+RULE_PROFILE_TOP_N = 20
+
+
+"""
+Profiling Settings
+"""
+# If every test gets profiled after its timed iterations (the profiled runs aren't measured). The collapsed stacks (profile.folded, for flamegraph.pl or speedscope)
+# and the self and total time of every function (profile.csv) are saved in the snapshot. The hot functions and the functions, which gained time since the snapshot, get printed.
+PROFILING = False
+
+# "sampling": statistical sampler (SIGPROF every PROFILING_INTERVAL_MS of CPU time over PROFILING_ITERATIONS runs, unix only, low overhead)
+# "deterministic": sys.setprofile over a single run (complete stacks, but the overhead inflates the times of small functions)
+PROFILING_MODE = "sampling"
+
+# The number of profiled runs per test in the sampling mode.
+PROFILING_ITERATIONS = 10
+
+# The sampling interval in ms of CPU time.
+PROFILING_INTERVAL_MS = 1
+
+# The amount of functions per test in the printed tables.
+PROFILING_TOP_N = 10
+
+
+"""
+History Settings
+"""
+# If every run gets appended to the history database (one row per run with the grammar hash and the timestamp, one row per test).
+# After the run the change points of the current tests get detected and printed. Trends: python history.py [--test METHOD_NAME] [--last N]
+HISTORY = True
+
+# The sqlite database of the history.
+HISTORY_DATABASE = SNAPSHOTS_FOLDER_NAME + "/history.sqlite"
+
+# The minimal amount of runs before and after a change point (at least 4, so the Mann-Whitney U test can become significant).
+HISTORY_MIN_SEGMENT_LENGTH = 4
+
+# The amount of last runs, which get searched for change points after every run. None: all runs.
+HISTORY_CHANGE_POINT_RUNS = 50
+
+
+"""
+Streaming Settings
+"""
+# If big input files get parsed with the buffered path (InputStream + CommonTokenStream + parse tree, like diagnostic.py) and the streaming path
+# (memory-mapped file + unbuffered char and token streams, no parse tree, a listener attached to the parser) for sizing the workers of big documents.
+# Every path and input runs in a fresh interpreter, which reports the latency and the peak RSS. The results are saved in the snapshot (streaming.csv).
+STREAMING_BENCHMARK = False
+
+# Directory or glob of the input files (e.g. "corpus/big/*.txt").
+STREAMING_INPUTS = ""
+
+# The number of parses per input and path (the first one fills the DFA cache, the median is used).
+STREAMING_RUNS_PER_INPUT = 3
+
+# The amount of bytes of the memory-mapped file, which get decoded at once by the unbuffered char stream.
+STREAMING_CHUNK_SIZE = 65536
+
+
+"""
+Lexer Benchmark Settings
+"""
+# If the generated lexer gets benchmarked alone (drained with nextToken, no parser) over the texts parsed by the parse driver in the tests
+# and the files of LEXER_BENCHMARK_INPUTS. Reports tokens/s, bytes/s, a token type histogram (count, time) and the lexer ATN prediction time (cold DFA).
+# The results are saved in the snapshot (lexer.csv, lexer_tokens.csv) and compared with it.
+LEXER_BENCHMARK = False
+
+# Glob of additional input files (e.g. "corpus/**/*.txt"). Empty string: only the inputs of the tests.
+LEXER_BENCHMARK_INPUTS = ""
+
+# The number of iterations per input.
+LEXER_BENCHMARK_RUNS_PER_INPUT = 10
+
+
+"""
+Parse Benchmark Settings
+"""
+# Parse functions, which get benchmarked over input files (next to TEST_CASES). Array of [PARSE_FUNCTION, DIRECTORY_OR_GLOB].
+# The function gets the text of a file, e.g. [[parse_driver.parse, "corpus/**/*.txt"]]. All files get preloaded before the measurement.
+# Every file is a result (class "parse:<function>", method <file path>) and gets compared with the snapshot like a test.
+PARSE_BENCHMARKS = []
+
+# The number of iterations per file.
+PARSE_BENCHMARK_RUNS_PER_FILE = 5
+
+# If the tokens of every file get counted with the lexer of the parse driver (tokens/s).
+PARSE_BENCHMARK_COUNT_TOKENS = True
+
+
+"""
+A/B Benchmark Settings
+"""
+# If the grammar of the snapshot (USE_SNAPSHOT, A) and the current grammar (B) get benchmarked interleaved in the same run instead of the normal measurement.
+# Both parsers get generated with PARSER_BUILD_SCRIPT_PATH into separate packages in AB_PACKAGE_DIRECTORY, the grammar files stay untouched.
+# Every round runs a test 4 times in the order ABBA or BAAB (chosen randomly) and the paired differences (B - A) get reported.
+# Only tests, which parse with the parse driver (parse_driver.parse or load_grammar), can be switched between the parsers.
+AB_BENCHMARK = False
+
+# Amount of rounds per test (2 pairs per round).
+AB_ROUNDS_PER_TEST = 20
+
+# Seed of the random order of the rounds, so the schedule is reproducible.
+AB_SEED = 0
+
+# The folder of the generated packages (ab_old, ab_new).
+AB_PACKAGE_DIRECTORY = ".ab_packages"
 
 
 """
@@ -64,6 +391,31 @@ BUILD_PARSER = False
 # The rebuild script (only important if BUILD_PARSER = True).
 PARSER_BUILD_SCRIPT_PATH = "example_grammar/build.sh"
 
+# If the generated parser gets cached (key: hash of the grammar files, the build script and the ANTLR tool version) and restored instead of rebuilt.
+BUILD_CACHE = True
+
+# The folder of the cached parsers.
+BUILD_CACHE_DIRECTORY = ".parser_cache"
+
+# Glob of all grammar files, which are part of the cache key (e.g. imported grammars). PARSER_GRAMMAR_PATH is always part of it.
+BUILD_CACHE_GRAMMAR_FILES = "example_grammar/*.g4"
+
+# The directory, where the build script generates the parser, and the patterns of the generated files, which get cached.
+BUILD_CACHE_OUTPUT_DIRECTORY = "example_grammar"
+# The files matching the patterns (except __init__.py) get removed before a parser is restored, so generated files of other grammars don't remain.
+BUILD_CACHE_OUTPUT_PATTERNS = ["*.py", "*.interp", "*.tokens", "*.dot"]
+
+# The pinned version of the ANTLR tool (part of the cache key). Default value is "": ANTLR4_TOOLS_ANTLR_VERSION (the pinned version of antlr4-tools)
+# or, if it isn't set either, the output of BUILD_CACHE_TOOL_VERSION_COMMAND.
+BUILD_CACHE_TOOL_VERSION = ""
+
+# Command, which prints the version of the ANTLR tool (only called if the version isn't pinned).
+BUILD_CACHE_TOOL_VERSION_COMMAND = ["antlr4", "-version"]
+
+# Eviction: Entries, which weren't used for BUILD_CACHE_MAX_AGE_DAYS, and the least recently used entries above BUILD_CACHE_MAX_SIZE_MB get removed.
+BUILD_CACHE_MAX_SIZE_MB = 500
+BUILD_CACHE_MAX_AGE_DAYS = 30
+
 # The grammar file
 PARSER_GRAMMAR_PATH = "example_grammar/Grammar.g4"
 
@@ -73,6 +425,10 @@ TEMP_PARSER_GRAMMAR_PATH = "example_grammar/TestGrammar.txt"
 # If the total time (ANTLR parsing & visitors) should get measured too.
 PARSING_TIME_ANALYSIS = True
 
+# If the phases (lexing, token buffering, parsing, visitor) of tests, which use the parse driver (parse_driver.parse), should get measured separately.
+# The token buffering phase is the copy of the already lexed tokens into the CommonTokenStream, the lexing isn't part of it (see parse_driver.parse).
+PHASE_ANALYSIS = True
+
 # The amount of decimal places the values should get rounded.
 DECIMALS = 2
 
@@ -103,3 +459,26 @@ ATN_ANALYSIS_INPUT_DIRECTORY = "example_grammar"
 
 # Directory where the atn images should be saved.
 ATN_ANALYSIS_OUTPUT_DIRECTORY = "atn"
+
+# Format of the atn images.
+ATN_RENDER_FORMAT = "png" # "png", "svg"
+
+# Maximum amount of parallel dot processes. Default value is 0: amount of cores.
+ATN_RENDER_WORKERS = 0
+
+# Only the ATNs of these rules get rendered (rule names or glob patterns, e.g. ["expr*"]). Default value is an empty list: all rules.
+ATN_RENDER_RULES = []
+
+# If the parse driver should profile every decision of the parser (invocations, SLL / full LL predictions, lookahead, DFA hits / misses, prediction time).
+# The report gets printed and saved in the snapshot (atn_profile.csv). Attention: The profiling slows down the parsing phase.
+ATN_PROFILING = False
+
+# Amount of decisions shown in the ATN profile (ranked by prediction time). All decisions are saved in the snapshot.
+ATN_PROFILE_TOP_N = 20
+
+# If static complexity metrics of the ATN (states, epsilon transitions, alternatives, loops, recursion, lookahead risk per rule and decision) get computed.
+# They are saved in the snapshot (atn_metrics.csv, atn_decisions.csv) and compared with the metrics of the snapshot.
+ATN_METRICS = False
+
+# Source of the metrics: "parser" (ATN of the generated parser) or "dot" (.dot files in ATN_ANALYSIS_INPUT_DIRECTORY, only the graph structure).
+ATN_METRICS_SOURCE = "parser" # "parser", "dot"
@@ -0,0 +1,438 @@
+import hashlib
+import json
+import os
+import random
+import sys
+import unittest
+
+from antlr4 import InputStream, CommonTokenStream, Token
+from antlr4.atn.ATNState import RuleStopState
+from antlr4.atn.Transition import Transition
+from antlr4.error.ErrorListener import ErrorListener
+from antlr4.error.ErrorStrategy import BailErrorStrategy
+
+from config import CORPUS_DIRECTORY, CORPUS_SIZE, CORPUS_TARGET_LENGTH, CORPUS_MAX_RECURSION_DEPTH, CORPUS_MIN_RULE_COVERAGE, \
+    CORPUS_MAX_ATTEMPTS, CORPUS_SEED, CORPUS_TOKEN_SEPARATOR, PARSER_GRAMMAR_PATH, PARSER_START_RULE
+from measure_performance import measure_performance_in_ms
+from parse_driver import load_grammar, parse
+from print import print_progress_bar
+
+
+INFINITY = float("inf")
+
+# Characters, which are used for negated sets and wildcards of the lexer (printable ASCII)
+LEXER_ALPHABET = range(32, 127)
+
+
+class GenerationError(Exception):
+    """
+        Raised if a sentence can't be generated (e.g. token without lexer rule or too many steps).
+    """
+
+class RaisingErrorListener(ErrorListener):
+    """
+        Error listener, which turns every syntax error of the lexer into an exception (the parser uses the bail out error strategy).
+    """
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        raise GenerationError(f"line {line}:{column} {msg}")
+
+class SentenceGenerator:
+    """
+        Generates random symbol sequences of a rule by walking the ATN (parser ATN: token types, lexer ATN: characters).
+        Decisions are random while the sentence is shorter than the target length and the recursion is not too deep.
+        Otherwise the alternative with the shortest completion is taken, so every walk terminates.
+        Coverage guided: Alternatives, which weren't taken yet, are preferred.
+        The rules and alternatives of the last generated sequence are kept in sentence_rules and sentence_alternatives.
+    """
+
+    def __init__(self, atn, rng, alphabet, target_length=30, max_depth=10, max_steps=100000):
+        self.atn = atn
+        self.rng = rng
+        self.alphabet = alphabet
+        self.target_length = target_length
+        self.max_depth = max_depth
+        self.max_steps = max_steps
+        self.covered_alternatives = set()
+        self.sentence_rules = set()
+        self.sentence_alternatives = set()
+        self.rule_min_lengths, self.state_min_lengths = compute_min_lengths(atn)
+
+    def generate(self, rule_index):
+        """
+            Generates a symbol sequence of a rule.
+
+            Args:
+                rule_index (int): The index of the rule.
+            Returns:
+                A list of symbols (token types or characters).
+            Error:
+                GenerationError: If the walk needs more than max_steps steps.
+        """
+
+        symbols = []
+        self.steps = 0
+        self.sentence_rules = {rule_index}
+        self.sentence_alternatives = set()
+        self.walk(self.atn.ruleToStartState[rule_index], 0, symbols)
+
+        return symbols
+
+    def walk(self, state, depth, symbols):
+        while not isinstance(state, RuleStopState):
+            self.steps += 1
+            if self.steps > self.max_steps: raise GenerationError("Too many steps")
+
+            transition = self.choose(state, depth, len(symbols))
+
+            if transition.serializationType == Transition.RULE:
+                self.sentence_rules.add(transition.ruleIndex)
+                self.walk(transition.target, depth + 1, symbols)
+                state = transition.followState
+            elif transition.isEpsilon:
+                state = transition.target
+            else:
+                symbols.append(self.pick_symbol(transition))
+                state = transition.target
+
+    def choose(self, state, depth, length):
+        transitions = state.transitions
+        if len(transitions) == 1: return transitions[0]
+
+        costs = [self.transition_cost(transition) for transition in transitions]
+        candidates = [i for i, cost in enumerate(costs) if cost < INFINITY]
+        if not candidates: raise GenerationError(f"No finite alternative in state {state.stateNumber}")
+
+        if depth >= self.max_depth or length >= self.target_length:
+            min_cost = min(costs[i] for i in candidates)
+            candidates = [i for i in candidates if costs[i] == min_cost]
+        else:
+            uncovered = [i for i in candidates if (state.stateNumber, i) not in self.covered_alternatives]
+            if uncovered: candidates = uncovered
+
+        i = self.rng.choice(candidates)
+        self.covered_alternatives.add((state.stateNumber, i))
+        self.sentence_alternatives.add((state.stateNumber, i))
+
+        return transitions[i]
+
+    def transition_cost(self, transition):
+        if transition.serializationType == Transition.RULE:
+            return self.rule_min_lengths[transition.ruleIndex] + self.state_min_lengths[transition.followState.stateNumber]
+        if transition.isEpsilon:
+            return self.state_min_lengths[transition.target.stateNumber]
+
+        return 1 + self.state_min_lengths[transition.target.stateNumber]
+
+    def pick_symbol(self, transition):
+        if transition.serializationType == Transition.ATOM: return transition.label_
+        if transition.serializationType == Transition.RANGE: return self.rng.randint(transition.start, transition.stop)
+
+        if transition.serializationType == Transition.NOT_SET:
+            excluded = transition.label
+            candidates = [symbol for symbol in self.alphabet if symbol not in excluded]
+        elif transition.serializationType == Transition.WILDCARD:
+            candidates = self.alphabet
+        else:
+            candidates = [symbol for interval in (transition.label.intervals or []) for symbol in interval]
+
+        if not candidates: raise GenerationError(f"Empty set transition to state {transition.target.stateNumber}")
+
+        return self.rng.choice(candidates)
+
+def compute_min_lengths(atn):
+    """
+        Computes the minimum amount of symbols from every state to the end of its rule and of every rule (fixed point iteration).
+
+        Args:
+            atn (ATN): The ATN of the lexer or parser.
+        Returns:
+            A tuple of the list rule index -> min length and the dict state number -> min length (infinity if the end isn't reachable).
+    """
+
+    rule_min_lengths = [INFINITY] * len(atn.ruleToStartState)
+    state_min_lengths = {state.stateNumber: (0 if isinstance(state, RuleStopState) else INFINITY) for state in atn.states if state is not None}
+
+    changed = True
+    while changed:
+        changed = False
+        for state in atn.states:
+            if state is None or isinstance(state, RuleStopState): continue
+
+            best = state_min_lengths[state.stateNumber]
+            for transition in state.transitions:
+                if transition.serializationType == Transition.RULE:
+                    cost = rule_min_lengths[transition.ruleIndex] + state_min_lengths[transition.followState.stateNumber]
+                elif transition.isEpsilon:
+                    cost = state_min_lengths[transition.target.stateNumber]
+                else:
+                    cost = 1 + state_min_lengths[transition.target.stateNumber]
+                best = min(best, cost)
+
+            if best < state_min_lengths[state.stateNumber]:
+                state_min_lengths[state.stateNumber] = best
+                changed = True
+
+        for rule_index, start_state in enumerate(atn.ruleToStartState):
+            rule_min_lengths[rule_index] = state_min_lengths[start_state.stateNumber]
+
+    return rule_min_lengths, state_min_lengths
+
+class TokenTextGenerator:
+    """
+        Creates the text of a token type: The literal of the parser (e.g. '+') or a text generated from the lexer rule,
+        which gets lexed again to make sure it is exactly one token of this type.
+    """
+
+    def __init__(self, lexer_class, parser_class, rng, attempts=20, variants=5):
+        self.lexer_class = lexer_class
+        self.literal_names = parser_class.literalNames
+        self.lexer_atn = lexer_class.atn
+        self.rng = rng
+        self.attempts = attempts
+        self.variants = variants
+        self.generator = SentenceGenerator(self.lexer_atn, rng, LEXER_ALPHABET, target_length=8, max_depth=5)
+        self.texts = {}
+
+    def text(self, token_type):
+        """
+            Gets a text of a token type.
+
+            Args:
+                token_type (int): The token type.
+            Returns:
+                The text.
+            Error:
+                GenerationError: If no valid text can be generated.
+        """
+
+        texts = self.texts.get(token_type)
+        if texts is None:
+            texts = self.texts[token_type] = self.generate_texts(token_type)
+
+        if not texts: raise GenerationError(f"No text for token type {token_type}")
+
+        return self.rng.choice(texts)
+
+    def generate_texts(self, token_type):
+        if token_type < len(self.literal_names) and self.literal_names[token_type].startswith("'"):
+            literal = self.literal_names[token_type][1:-1]
+            # The literal names keep some escapes of the grammar, so the raw and the unescaped text get checked with the lexer
+            return [text for text in dict.fromkeys([literal, unescape_literal(literal)]) if self.lexes_to(text, token_type)][:1]
+
+        rule_indexes = [i for i, rule_token_type in enumerate(self.lexer_atn.ruleToTokenType) if rule_token_type == token_type]
+
+        texts = set()
+        for _ in range(self.attempts * len(rule_indexes)):
+            try:
+                text = "".join(chr(symbol) for symbol in self.generator.generate(self.rng.choice(rule_indexes)))
+            except GenerationError:
+                continue
+
+            if text and self.lexes_to(text, token_type): texts.add(text)
+            if len(texts) >= self.variants: break
+
+        return sorted(texts)
+
+    def lexes_to(self, text, token_type):
+        lexer = self.lexer_class(InputStream(text))
+        lexer.removeErrorListeners()
+        lexer.addErrorListener(RaisingErrorListener())
+
+        try:
+            tokens = lexer.getAllTokens()
+        except GenerationError:
+            return False
+
+        return len(tokens) == 1 and tokens[0].type == token_type
+
+def unescape_literal(literal):
+    """
+        Resolves the escapes of a literal (e.g. "\\n" -> newline).
+
+        Args:
+            literal (str): The literal without quotes.
+        Returns:
+            The unescaped text (the literal itself, if it contains invalid escapes).
+    """
+
+    try:
+        return literal.encode("latin-1", "backslashreplace").decode("unicode_escape")
+    except UnicodeDecodeError:
+        return literal
+
+def is_valid_sentence(text, lexer_class, parser_class, start_rule):
+    """
+        Checks if a text is a syntactically valid sentence of the start rule (no lexer errors, no syntax errors, all tokens consumed).
+
+        Args:
+            text (str): The text.
+            lexer_class (class): The lexer class.
+            parser_class (class): The parser class.
+            start_rule (str): The start rule.
+        Returns:
+            True, if the text is valid.
+    """
+
+    lexer = lexer_class(InputStream(text))
+    lexer.removeErrorListeners()
+    lexer.addErrorListener(RaisingErrorListener())
+
+    token_stream = CommonTokenStream(lexer)
+    parser = parser_class(token_stream)
+    parser.removeErrorListeners()
+    parser._errHandler = BailErrorStrategy()
+
+    try:
+        getattr(parser, start_rule)()
+    except Exception: # lexer errors, ParseCancellationException and errors of actions / predicates
+        return False
+
+    return token_stream.LA(1) == Token.EOF
+
+def generate_corpus(lexer_class, parser_class, start_rule, amount=CORPUS_SIZE, target_length=CORPUS_TARGET_LENGTH, max_depth=CORPUS_MAX_RECURSION_DEPTH,
+                    min_rule_coverage=CORPUS_MIN_RULE_COVERAGE, max_attempts=CORPUS_MAX_ATTEMPTS, seed=CORPUS_SEED, separator=CORPUS_TOKEN_SEPARATOR, show_progress=True):
+    """
+        Generates syntactically valid sentences by walking the ATN of the parser. Every sentence gets validated with the parser, invalid ones are dropped.
+        The generation stops, if amount sentences exist and the rule coverage is reached, or after max_attempts tries.
+
+        Args:
+            lexer_class (class): The lexer class.
+            parser_class (class): The parser class.
+            start_rule (str): The rule, whose sentences are generated.
+            amount (int): The minimum amount of sentences.
+            target_length (int): The amount of tokens, from which on the generator takes the shortest way to finish the sentence.
+            max_depth (int): The rule nesting depth, from which on the generator takes the shortest way to finish the rule.
+            min_rule_coverage (float): The fraction of parser rules (0 - 1), which should be covered by the corpus.
+            max_attempts (int): The maximum amount of generated sentences (valid and invalid).
+            seed (int): The seed of the random generator.
+            separator (str): The text between two tokens (the grammar has to skip it, usually whitespace).
+            show_progress (bool): If the progress bar should be printed.
+        Returns:
+            A tuple of the list of sentences and a dict with the rule coverage, the alternative coverage and the amount of attempts.
+    """
+
+    rng = random.Random(seed)
+    atn = parser_class.atn
+    generator = SentenceGenerator(atn, rng, range(1, atn.maxTokenType + 1), target_length, max_depth)
+    token_texts = TokenTextGenerator(lexer_class, parser_class, rng)
+    rule_index = parser_class.ruleNames.index(start_rule)
+    covered_rules = set()
+    covered_alternatives = set()
+
+    sentences = []
+    seen = set()
+    attempts = 0
+    while attempts < max_attempts and (len(sentences) < amount or len(covered_rules) / len(parser_class.ruleNames) < min_rule_coverage):
+        attempts += 1
+
+        try:
+            text = separator.join(token_texts.text(token_type) for token_type in generator.generate(rule_index) if token_type != Token.EOF)
+        except GenerationError:
+            continue
+
+        if text in seen or not is_valid_sentence(text, lexer_class, parser_class, start_rule): continue
+
+        seen.add(text)
+        sentences.append(text)
+        covered_rules |= generator.sentence_rules
+        covered_alternatives |= generator.sentence_alternatives
+        if show_progress: print_progress_bar(min(len(sentences), amount), amount)
+
+    decisions = sum(len(state.transitions) for state in atn.decisionToState)
+    coverage = {
+        "rule_coverage": len(covered_rules) / len(parser_class.ruleNames),
+        "alternative_coverage": len(covered_alternatives) / decisions if decisions else 1,
+        "uncovered_rules": [name for i, name in enumerate(parser_class.ruleNames) if i not in covered_rules],
+        "attempts": attempts,
+    }
+
+    return sentences, coverage
+
+def get_corpus_key(options, grammar_path=PARSER_GRAMMAR_PATH):
+    """
+        Creates the cache key of a corpus: the content hash of the grammar and the hash of the generation options.
+
+        Args:
+            options (dict): The generation options.
+            grammar_path (str): The path to the .g4 file (if it doesn't exist, the generated lexer and parser are hashed).
+        Returns:
+            The key (used as directory name).
+    """
+
+    try:
+        with open(grammar_path, "rb") as grammar_file:
+            grammar_hash = hashlib.sha256(grammar_file.read()).hexdigest()
+    except OSError:
+        grammar_hash = hashlib.sha256()
+        for recognizer_class in load_grammar():
+            with open(sys.modules[recognizer_class.__module__].__file__, "rb") as recognizer_file:
+                grammar_hash.update(recognizer_file.read())
+        grammar_hash = grammar_hash.hexdigest()
+
+    options_hash = hashlib.sha256(json.dumps(options, sort_keys=True).encode()).hexdigest()
+
+    return f"{grammar_hash[:16]}-{options_hash[:8]}"
+
+def load_or_generate_corpus(show_progress=False):
+    """
+        Loads the cached corpus of the current grammar and generation options or generates and caches it in CORPUS_DIRECTORY.
+
+        Args:
+            show_progress (bool): If the progress bar should be printed while generating.
+        Returns:
+            A tuple of the list of tuples (file path, text) and the manifest (options and coverage).
+    """
+
+    options = {
+        "start_rule": PARSER_START_RULE, "amount": CORPUS_SIZE, "target_length": CORPUS_TARGET_LENGTH, "max_depth": CORPUS_MAX_RECURSION_DEPTH,
+        "min_rule_coverage": CORPUS_MIN_RULE_COVERAGE, "max_attempts": CORPUS_MAX_ATTEMPTS, "seed": CORPUS_SEED, "separator": CORPUS_TOKEN_SEPARATOR,
+    }
+    corpus_path = os.path.join(CORPUS_DIRECTORY, get_corpus_key(options))
+    manifest_path = os.path.join(corpus_path, "manifest.json")
+
+    if not os.path.exists(manifest_path):
+        lexer_class, parser_class = load_grammar()
+        sentences, coverage = generate_corpus(lexer_class, parser_class, PARSER_START_RULE, show_progress=show_progress, **{key: value for key, value in options.items() if key != "start_rule"})
+
+        os.makedirs(corpus_path, exist_ok=True)
+        for i, sentence in enumerate(sentences):
+            with open(os.path.join(corpus_path, f"sentence_{i:05d}.txt"), mode="w", encoding="utf-8") as sentence_file:
+                sentence_file.write(sentence)
+
+        with open(manifest_path, mode="w") as manifest_file:
+            json.dump({"options": options, "amount_of_sentences": len(sentences), **coverage}, manifest_file)
+
+    with open(manifest_path) as manifest_file:
+        manifest = json.load(manifest_file)
+
+    corpus = []
+    for i in range(manifest["amount_of_sentences"]):
+        file_path = os.path.join(corpus_path, f"sentence_{i:05d}.txt")
+        with open(file_path, encoding="utf-8") as sentence_file:
+            corpus.append((file_path, sentence_file.read()))
+
+    return corpus, manifest
+
+class CorpusTest(unittest.TestCase):
+    """
+        Benchmark test of the generated corpus (added to the tests if CORPUS_GENERATION = True). Every iteration parses all sentences.
+        The corpus gets loaded once per process, so the file I/O isn't part of the measured iterations.
+    """
+
+    texts = None
+
+    @classmethod
+    def setUpClass(cls):
+        if cls.texts is None: cls.texts = [text for _, text in load_or_generate_corpus()[0]]
+
+    def test_generated_corpus(self):
+        measure_performance_in_ms(lambda: [parse(text) for text in self.texts])
+
+
+if __name__ == "__main__":
+    corpus, manifest = load_or_generate_corpus(show_progress=True)
+
+    print(f"\nℹ️ {manifest['amount_of_sentences']} sentences in {os.path.dirname(corpus[0][0]) if corpus else CORPUS_DIRECTORY}")
+    print(f"ℹ️ Rule coverage: {round(manifest['rule_coverage'] * 100, 2)} %, alternative coverage: {round(manifest['alternative_coverage'] * 100, 2)} %")
+    if manifest["uncovered_rules"]: print(f"ℹ️ Uncovered rules: {manifest['uncovered_rules']}")
@@ -0,0 +1,145 @@
+import gc
+import os
+import platform
+import timeit
+from importlib import metadata as package_metadata
+from statistics import median
+
+
+# Keys of the fingerprint, which have to be equal, so measurements are comparable
+COMPARED_FINGERPRINT_KEYS = ["cpu_model", "cores", "affinity", "governor", "python_implementation", "python_version", "antlr_runtime_version"]
+
+
+def read_file(file_path):
+    """
+        Reads a small system file (e.g. in /proc or /sys).
+
+        Args:
+            file_path (str): The path of the file.
+        Returns:
+            The stripped content or None, if the file isn't readable (e.g. not on linux).
+    """
+
+    try:
+        with open(file_path) as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+def get_cpu_model():
+    cpuinfo = read_file("/proc/cpuinfo") or ""
+    for line in cpuinfo.splitlines():
+        if line.startswith("model name"): return line.split(":", 1)[1].strip()
+
+    return platform.processor() or platform.machine()
+
+def get_antlr_runtime_version():
+    try:
+        return package_metadata.version("antlr4-python3-runtime")
+    except package_metadata.PackageNotFoundError:
+        return None
+
+def get_fingerprint():
+    """
+        Collects the environment of the measurement.
+
+        Returns:
+            A dict of the cpu model, the amount of cores, the cores available to this process (affinity), the frequency governor,
+            the load average (1, 5, 15 minutes), the platform, the python implementation and version and the ANTLR runtime version.
+            Values, which aren't available on this platform, are None.
+    """
+
+    return {
+        "cpu_model": get_cpu_model(),
+        "cores": os.cpu_count(),
+        "affinity": sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None,
+        "governor": read_file("/sys/devices/system/cpu/cpu0/cpufreq/scaling_governor"),
+        "load_average": [round(load, 2) for load in os.getloadavg()] if hasattr(os, "getloadavg") else None,
+        "platform": platform.platform(),
+        "python_implementation": platform.python_implementation(),
+        "python_version": platform.python_version(),
+        "antlr_runtime_version": get_antlr_runtime_version(),
+    }
+
+def calibration_workload(iterations):
+    """
+        Fixed pure python workload, which uses the same operations as the ANTLR runtime (calls, attribute and dict lookups, list appends).
+
+        Args:
+            iterations (int): The amount of loop iterations.
+        Returns:
+            A checksum (so the work can't be skipped).
+    """
+
+    table = {}
+    values = []
+    for i in range(iterations):
+        key = i % 97
+        table[key] = table.get(key, 0) + i
+        values.append(key * 3 // 2)
+
+    return sum(values) + len(table)
+
+def calibrate(runs, iterations):
+    """
+        Runs the calibration microbenchmark, which estimates the current noise floor and the speed of the machine.
+
+        Args:
+            runs (int): The amount of timed runs.
+            iterations (int): The size of the workload per run.
+        Returns:
+            A dict of the median and the minimal time of a run in ms (the minimum is less affected by interruptions, it is used for the speed)
+            and the noise (robust relative standard deviation: 1.4826 * MAD / median).
+    """
+
+    calibration_workload(iterations) # warm up
+
+    gcold = gc.isenabled()
+    gc.disable()
+    try:
+        times = [t * 1000 for t in timeit.repeat(lambda: calibration_workload(iterations), repeat=runs, number=1)]
+    finally:
+        if gcold: gc.enable()
+
+    median_time = median(times)
+    mad = median(abs(t - median_time) for t in times)
+
+    return {"median_ms": median_time, "min_ms": min(times), "noise": 1.4826 * mad / median_time if median_time else 0, "runs": runs, "iterations": iterations}
+
+def compare_environments(current, snapshot, speed_tolerance=0.25):
+    """
+        Compares the environment and the calibration of the current run with the snapshot.
+
+        Args:
+            current (dict): The current metadata (with "environment" and "calibration").
+            snapshot (dict): The metadata of the snapshot.
+            speed_tolerance (float): Relative difference of the speed, from which a different machine speed is reported (if larger than 2 * noise).
+        Returns:
+            A tuple of a list of warnings, the relative speed (minimal calibration time of the snapshot / current one, > 1: the current machine is faster)
+            and the noise floor of the current calibration (a noisy snapshot doesn't widen the tolerance of later runs). The speed is 1, if the snapshot has no calibration.
+    """
+
+    warnings = []
+
+    snapshot_environment = snapshot.get("environment")
+    if not snapshot_environment:
+        warnings.append("Snapshot has no environment fingerprint. Measurements may not be comparable.")
+    else:
+        for key in COMPARED_FINGERPRINT_KEYS:
+            if snapshot_environment.get(key) != current["environment"].get(key):
+                warnings.append(f"Environment mismatch {key}: snapshot {snapshot_environment.get(key)}, current {current['environment'].get(key)}")
+
+    load_average, cores = current["environment"].get("load_average"), current["environment"].get("affinity") or [None] * (current["environment"].get("cores") or 1)
+    if load_average and load_average[0] > len(cores):
+        warnings.append(f"Machine is busy: load average {load_average[0]} on {len(cores)} cores")
+
+    speed = 1
+    noise = current["calibration"]["noise"]
+    snapshot_calibration = snapshot.get("calibration")
+    if snapshot_calibration and current["calibration"]["min_ms"]:
+        speed = snapshot_calibration.get("min_ms", snapshot_calibration["median_ms"]) / current["calibration"]["min_ms"] # older snapshots have no minimum
+        if abs(speed - 1) > max(2 * max(snapshot_calibration["noise"], noise), speed_tolerance): # outside of the noise of both calibrations
+            warnings.append(f"Machine speed differs from snapshot: calibration {round(current['calibration']['median_ms'], 3)} ms, "
+                            f"snapshot {round(snapshot_calibration['median_ms'], 3)} ms (relative speed {round(speed, 3)})")
+
+    return warnings, speed, noise
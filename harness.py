@@ -0,0 +1,94 @@
+import logging
+import timeit
+import unittest
+from statistics import median
+
+from config import RUN_TESTS_MULTIPLE_TIMES, LOGGER_NAME
+from measure_performance import measure_performance_in_ms
+
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+class EmptyTest(unittest.TestCase):
+    """
+        Test without work, which measures the overhead of the harness and of measure_performance_in_ms.
+    """
+
+    def test_empty(self):
+        measure_performance_in_ms(lambda: None)
+
+class DirectHarness:
+    """
+        Low-overhead harness: The test class gets instantiated once, the class and instance fixtures (setUpClass, setUp) run once
+        and the test method gets called directly (no TestSuite, TextTestRunner and output stream per iteration).
+        Use it as context manager, the fixtures get torn down on exit.
+    """
+
+    def __init__(self, test_class, method_name):
+        self.test_class = test_class
+        self.method_name = method_name
+        self.test = None
+        self.method = None
+
+    def __enter__(self):
+        self.test_class.setUpClass()
+        try:
+            self.test = self.test_class(self.method_name)
+            self.test.setUp()
+        except Exception:
+            self.test_class.tearDownClass()
+            raise
+
+        self.method = getattr(self.test, self.method_name)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.test.tearDown()
+            self.test.doCleanups()
+        finally:
+            self.test_class.tearDownClass()
+
+    def run_once(self):
+        """
+            Calls the test method once.
+
+            Returns:
+                A tuple of if the test was successfully and the time of the call in ms.
+        """
+
+        success = True
+
+        start_total_time = timeit.default_timer()
+        try:
+            self.method()
+        except Exception as e:
+            logger.error(f"Error in executing {self.method_name}: {type(e).__name__}: {e}")
+            success = False
+        end_total_time = timeit.default_timer()
+
+        return success, (end_total_time - start_total_time) * 1000
+
+def measure_overhead(runs):
+    """
+        Measures the overhead of an empty test in the direct harness (the median of runs calls).
+
+        Args:
+            runs (int): The amount of calls.
+        Returns:
+            A dict of the overhead of the whole call ("total") and of the measurement of measure_performance_in_ms ("measure") in ms.
+    """
+
+    import measure_performance
+
+    total = []
+    measure = []
+    with DirectHarness(EmptyTest, "test_empty") as harness:
+        harness.run_once() # warm up
+        for _ in range(runs):
+            total.append(harness.run_once()[1])
+            measure.append(measure_performance.last_performance_measure_in_ms if RUN_TESTS_MULTIPLE_TIMES else
+                           median(measure_performance.last_performance_measure_in_ms_list))
+
+    return {"total": median(total), "measure": median(measure)}
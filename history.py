@@ -0,0 +1,323 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+from contextlib import closing
+from datetime import datetime
+from statistics import median
+
+from config import HISTORY_DATABASE, HISTORY_MIN_SEGMENT_LENGTH, PARSER_GRAMMAR_PATH, BUILD_CACHE_GRAMMAR_FILES, SIGNIFICANCE_LEVEL, \
+    MIN_RELATIVE_CHANGE, DECIMALS
+from stats import mann_whitney_u
+
+
+HISTORY_OVERVIEW_HEADER = ["Test Name", "Test Class", "Runs", "First [ms]", "Last [ms]", "Change", "Trend", "Change points"]
+
+HISTORY_SERIES_HEADER = ["Run", "Timestamp", "Grammar hash", "Commit", "Avg. [ms]", "Median [ms]", "Iterations", "Success", "Change point"]
+
+CHANGE_POINT_HEADER = ["Test Name", "Test Class", "Run", "Timestamp", "Grammar hash", "Median before [ms]", "Median after [ms]", "Change"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    grammar_hash TEXT NOT NULL,
+    commit_hash TEXT,
+    parser_build_key TEXT,
+    snapshot TEXT,
+    sum_avg REAL,
+    metadata TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    class_name TEXT NOT NULL,
+    method_name TEXT NOT NULL,
+    avg_ms REAL,
+    median_ms REAL,
+    iterations INTEGER,
+    success INTEGER,
+    PRIMARY KEY (run_id, class_name, method_name)
+);
+CREATE INDEX IF NOT EXISTS results_by_test ON results (class_name, method_name, run_id);
+CREATE INDEX IF NOT EXISTS runs_by_grammar ON runs (grammar_hash, run_id);
+CREATE INDEX IF NOT EXISTS runs_by_timestamp ON runs (timestamp);
+"""
+
+# Characters of the trend sparkline (low to high)
+SPARKLINE = "▁▂▃▄▅▆▇█"
+
+
+def connect(database_path=HISTORY_DATABASE):
+    """
+        Opens the history database and creates the tables and indexes, if they don't exist.
+
+        Args:
+            database_path (str): The database file.
+        Returns:
+            The sqlite3 connection.
+    """
+
+    directory = os.path.dirname(database_path)
+    if directory: os.makedirs(directory, exist_ok=True)
+
+    connection = sqlite3.connect(database_path)
+    connection.executescript(SCHEMA)
+
+    return connection
+
+def get_grammar_hash():
+    """
+        Hashes the grammar files (PARSER_GRAMMAR_PATH and BUILD_CACHE_GRAMMAR_FILES), so runs of the same grammar can be grouped.
+
+        Returns:
+            The sha256 hex digest.
+    """
+
+    grammar_hash = hashlib.sha256()
+    for file_path in sorted(set(glob.glob(BUILD_CACHE_GRAMMAR_FILES)) | {PARSER_GRAMMAR_PATH}):
+        grammar_hash.update(os.path.basename(file_path).encode())
+        with open(file_path, "rb") as file:
+            grammar_hash.update(hashlib.sha256(file.read()).digest())
+
+    return grammar_hash.hexdigest()
+
+def get_commit_hash():
+    """
+        Gets the current git commit of the working directory.
+
+        Returns:
+            The short commit hash or None, if it isn't a git repository.
+    """
+
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10)
+        return (output.stdout.strip() or None) if output.returncode == 0 else None
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+def record_run(results, samples, metadata, snapshot_name=None, database_path=HISTORY_DATABASE):
+    """
+        Appends a run with its per-test results to the history database.
+
+        Args:
+            results (list): The result rows of the run (see RESULT_HEADER).
+            samples (dict): The raw samples of the run ((class name, method name) to list of measurements).
+            metadata (dict): The metadata of the run.
+            snapshot_name (str): The snapshot, which the run was compared with.
+            database_path (str): The database file.
+        Returns:
+            The run id.
+    """
+
+    with closing(connect(database_path)) as connection, connection:
+        cursor = connection.execute("INSERT INTO runs (timestamp, grammar_hash, commit_hash, parser_build_key, snapshot, sum_avg, metadata) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                    (datetime.now().isoformat(timespec="seconds"), get_grammar_hash(), get_commit_hash(), metadata.get("parser_build_key"),
+                                     snapshot_name, metadata.get("sum_avg"), json.dumps(metadata, default=str)))
+        run_id = cursor.lastrowid
+
+        rows = []
+        for row in results:
+            measurements = samples.get((row[5], row[0])) or []
+            rows.append((run_id, row[5], row[0], row[1], median(measurements) if measurements else row[1], len(measurements), int(bool(row[3]))))
+        connection.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    return run_id
+
+def get_tests(database_path=HISTORY_DATABASE):
+    """
+        Gets all tests of the history.
+
+        Args:
+            database_path (str): The database file.
+        Returns:
+            A sorted list of tuples (class name, method name).
+    """
+
+    with closing(connect(database_path)) as connection:
+        return connection.execute("SELECT DISTINCT class_name, method_name FROM results ORDER BY class_name, method_name").fetchall()
+
+def get_series(class_name, method_name, last=None, database_path=HISTORY_DATABASE):
+    """
+        Gets the trend series of a test (only successful runs).
+
+        Args:
+            class_name (str): The class name.
+            method_name (str): The method name.
+            last (int): Only the last runs. Default value is None: all runs.
+            database_path (str): The database file.
+        Returns:
+            A list of dicts (run id, timestamp, grammar hash, commit hash, avg, median, iterations, success) ordered by run id.
+    """
+
+    with closing(connect(database_path)) as connection:
+        rows = connection.execute("SELECT runs.run_id, runs.timestamp, runs.grammar_hash, runs.commit_hash, results.avg_ms, results.median_ms, results.iterations, results.success "
+                                  "FROM results JOIN runs ON runs.run_id = results.run_id "
+                                  "WHERE results.class_name = ? AND results.method_name = ? AND results.success = 1 "
+                                  "ORDER BY runs.run_id DESC LIMIT ?", (class_name, method_name, last if last else -1)).fetchall()
+
+    keys = ["run_id", "timestamp", "grammar_hash", "commit_hash", "avg_ms", "median_ms", "iterations", "success"]
+
+    return [dict(zip(keys, row)) for row in reversed(rows)]
+
+def segment_cost(values):
+    center = sum(values) / len(values)
+    return sum((value - center) ** 2 for value in values)
+
+def detect_change_points(values, min_segment_length=HISTORY_MIN_SEGMENT_LENGTH):
+    """
+        Finds the runs, where the level of a series shifted (binary segmentation).
+        The split with the largest reduction of the squared error gets accepted, if both segments differ significantly (Mann-Whitney U test with SIGNIFICANCE_LEVEL)
+        and the ratio of their medians differs at least MIN_RELATIVE_CHANGE from 1. Then both segments get searched again.
+
+        Args:
+            values (list): The series (e.g. the median per run).
+            min_segment_length (int): The minimal amount of runs before and after a change point (at least 4 runs per side are needed for a significant test).
+        Returns:
+            A sorted list of the indexes of the first value after every change point.
+    """
+
+    change_points = []
+    segments = [(0, len(values))]
+    while segments:
+        start, stop = segments.pop()
+        if stop - start < 2 * min_segment_length: continue
+
+        total_cost = segment_cost(values[start:stop])
+        best_split, best_gain = None, 0
+        for split in range(start + min_segment_length, stop - min_segment_length + 1):
+            gain = total_cost - segment_cost(values[start:split]) - segment_cost(values[split:stop])
+            if gain > best_gain: best_split, best_gain = split, gain
+
+        if best_split is None: continue
+
+        before, after = values[start:best_split], values[best_split:stop]
+        _, p_value = mann_whitney_u(before, after)
+        ratio = median(after) / median(before) if median(before) else None
+        if p_value >= SIGNIFICANCE_LEVEL or ratio is None or abs(ratio - 1) < MIN_RELATIVE_CHANGE: continue
+
+        change_points.append(best_split)
+        segments += [(start, best_split), (best_split, stop)]
+
+    return sorted(change_points)
+
+def get_change_points(series, change_points):
+    """
+        Describes the change points of a series.
+
+        Args:
+            series (list): The series (see get_series).
+            change_points (list): The indexes of the change points (see detect_change_points).
+        Returns:
+            A list of dicts (run id, timestamp, grammar hash, median before and after, relative change in percent), the medians are taken between the neighbouring change points.
+    """
+
+    bounds = [0] + change_points + [len(series)]
+    descriptions = []
+    for i, index in enumerate(change_points):
+        before = median(entry["median_ms"] for entry in series[bounds[i]:index])
+        after = median(entry["median_ms"] for entry in series[index:bounds[i + 2]])
+        descriptions.append({"run_id": series[index]["run_id"], "timestamp": series[index]["timestamp"], "grammar_hash": series[index]["grammar_hash"],
+                             "before": before, "after": after, "change": (after / before - 1) * 100 if before else None})
+
+    return descriptions
+
+def get_sparkline(values):
+    low, high = min(values), max(values)
+    if high == low: return SPARKLINE[0] * len(values)
+
+    return "".join(SPARKLINE[round((value - low) / (high - low) * (len(SPARKLINE) - 1))] for value in values)
+
+def build_overview(last=None, database_path=HISTORY_DATABASE):
+    """
+        Builds the trend overview of all tests.
+
+        Args:
+            last (int): Only the last runs. Default value is None: all runs.
+            database_path (str): The database file.
+        Returns:
+            A list of rows (see HISTORY_OVERVIEW_HEADER).
+    """
+
+    rows = []
+    for class_name, method_name in get_tests(database_path):
+        series = get_series(class_name, method_name, last, database_path)
+        if not series: continue
+
+        values = [entry["median_ms"] for entry in series]
+        change_points = get_change_points(series, detect_change_points(values))
+        change = round((values[-1] / values[0] - 1) * 100, DECIMALS) if values[0] else ""
+        rows.append([method_name, class_name, len(series), round(values[0], DECIMALS + 2), round(values[-1], DECIMALS + 2), change, get_sparkline(values),
+                     ", ".join(f"run {change_point['run_id']} ({round(change_point['change'], DECIMALS):+} %)" for change_point in change_points
+                               if change_point["change"] is not None)])
+
+    return rows
+
+def build_series(class_name, method_name, last=None, database_path=HISTORY_DATABASE):
+    """
+        Builds the trend series of a test with the detected change points.
+
+        Args:
+            class_name (str): The class name.
+            method_name (str): The method name.
+            last (int): Only the last runs. Default value is None: all runs.
+            database_path (str): The database file.
+        Returns:
+            A list of rows (see HISTORY_SERIES_HEADER).
+    """
+
+    series = get_series(class_name, method_name, last, database_path)
+    change_points = {change_point["run_id"]: change_point for change_point in
+                     get_change_points(series, detect_change_points([entry["median_ms"] for entry in series]))}
+
+    rows = []
+    for entry in series:
+        change_point = change_points.get(entry["run_id"])
+        rows.append([entry["run_id"], entry["timestamp"], entry["grammar_hash"][:12], entry["commit_hash"] or "", round(entry["avg_ms"], DECIMALS + 2),
+                     round(entry["median_ms"], DECIMALS + 2), entry["iterations"], bool(entry["success"]),
+                     f"{round(change_point['change'], DECIMALS):+} %" if change_point and change_point["change"] is not None else ""])
+
+    return rows
+
+def find_change_points(tests, last=None, database_path=HISTORY_DATABASE):
+    """
+        Detects the change points of the given tests (e.g. the tests of the current run).
+
+        Args:
+            tests (list): A list of tuples (class name, method name).
+            last (int): Only the last runs. Default value is None: all runs.
+            database_path (str): The database file.
+        Returns:
+            A list of rows (see CHANGE_POINT_HEADER).
+    """
+
+    rows = []
+    for class_name, method_name in tests:
+        series = get_series(class_name, method_name, last, database_path)
+        for change_point in get_change_points(series, detect_change_points([entry["median_ms"] for entry in series])):
+            rows.append([method_name, class_name, change_point["run_id"], change_point["timestamp"], change_point["grammar_hash"][:12],
+                         round(change_point["before"], DECIMALS + 2), round(change_point["after"], DECIMALS + 2),
+                         round(change_point["change"], DECIMALS) if change_point["change"] is not None else ""])
+
+    return rows
+
+if __name__ == '__main__':
+    from print import print_history_overview, print_history_series
+
+    argument_parser = argparse.ArgumentParser(description="Prints the per-test trend series and change points of the history database.")
+    argument_parser.add_argument("--test", help="method name of the test (default: overview of all tests)")
+    argument_parser.add_argument("--class", dest="class_name", help="class name of the test (default: every class with the method)")
+    argument_parser.add_argument("--last", type=int, help="only the last runs")
+    argument_parser.add_argument("--database", default=HISTORY_DATABASE)
+    arguments = argument_parser.parse_args()
+
+    if arguments.test is None:
+        print_history_overview(HISTORY_OVERVIEW_HEADER, build_overview(arguments.last, arguments.database))
+    else:
+        tests = [(class_name, method_name) for class_name, method_name in get_tests(arguments.database)
+                 if method_name == arguments.test and arguments.class_name in (None, class_name)]
+        if not tests: print(f"❌ No history of {arguments.test}")
+        for class_name, method_name in tests:
+            print_history_series(HISTORY_SERIES_HEADER, class_name, method_name, build_series(class_name, method_name, arguments.last, arguments.database))
@@ -0,0 +1,201 @@
+import logging
+import multiprocessing
+from collections import deque
+
+from config import ISOLATION_MODE, ISOLATION_POOL_SIZE, NUMBER_OF_RUNS_PER_TEST, RUN_TESTS_MULTIPLE_TIMES, ADAPTIVE_SAMPLING, ADAPTIVE_MAX_RUNS, LOGGER_NAME
+from print import print_progress_bar
+
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+def worker_main(connection):
+    """
+        Entry point of a worker interpreter. It runs exactly one task (a list of test methods of one class) and streams every sample back.
+
+        Messages sent to the parent:
+        - ("ready",): The interpreter is started and the framework is imported.
+        - ("sample", METHOD_NAME, VALUE): A single measurement.
+        - ("done", METHOD_NAME, SUCCESS, TOTAL_TIME, DETAILS): A test method is finished (DETAILS are the additional measurements).
+        - ("error", MESSAGE): The task failed.
+        - ("finished",): All test methods of the task are finished.
+
+        Args:
+            connection (Connection): The child end of the pipe to the parent.
+    """
+
+    from run import sample_test_case # import before signaling ready, so the import cost isn't measured
+
+    connection.send(("ready",))
+
+    task = connection.recv()
+    if task is None: return
+
+    test_class, method_names, it = task
+    try:
+        for method_name in method_names:
+            _, res, total_time, details = sample_test_case(test_class, method_name, it, show_progress=False,
+                                                  on_measurement=lambda value: connection.send(("sample", method_name, value)))
+            connection.send(("done", method_name, res, total_time, details))
+    except Exception as e:
+        connection.send(("error", f"{type(e).__name__}: {e}"))
+
+    connection.send(("finished",))
+    connection.close()
+
+class IsolatedWorkerPool:
+    """
+        A pool of freshly spawned worker interpreters.
+        Every worker executes a single task and exits afterwards. The replacement is spawned (and waited for) between two tasks, so the spawn cost never overlaps with a measurement.
+    """
+
+    def __init__(self, size=ISOLATION_POOL_SIZE):
+        self.context = multiprocessing.get_context("spawn") # fork would inherit the caches of this interpreter
+        self.ready_workers = deque()
+        self.spawn_workers(max(size, 1))
+
+    def spawn_workers(self, amount):
+        """
+            Spawns new worker interpreters and blocks until all of them have signaled that they are ready.
+
+            Args:
+                amount (int): The amount of workers to spawn.
+            Error:
+                RuntimeError: If a worker died before it was ready.
+        """
+
+        workers = []
+        for _ in range(amount):
+            parent_connection, child_connection = self.context.Pipe()
+            process = self.context.Process(target=worker_main, args=(child_connection,), daemon=True)
+            process.start()
+            child_connection.close()
+            workers.append((process, parent_connection))
+
+        for process, connection in workers:
+            try:
+                message = connection.recv()
+            except EOFError:
+                raise RuntimeError(f"Worker {process.pid} died while starting (exit code {process.exitcode})")
+
+            if message[0] != "ready":
+                raise RuntimeError(f"Unexpected message from worker {process.pid}: {message}")
+
+            self.ready_workers.append((process, connection))
+
+    def run(self, test_class, method_names, it=NUMBER_OF_RUNS_PER_TEST, on_measurement=None):
+        """
+            Runs a list of test methods of one class in the next ready worker.
+
+            Args:
+                test_class (class): The test class.
+                method_names (list): The method names.
+                it (int): The number of iterations, which each test gets executed.
+                on_measurement (function): Optional callback, which gets called with the method name and every streamed measurement.
+            Returns:
+                A dict of method name to a tuple (measurements, success, total time, additional measurements).
+        """
+
+        process, connection = self.ready_workers.popleft()
+
+        samples = {method_name: ([], False, 0, {"phases": {}, "cold": [], "warmup_curve": [], "inputs": [], "memory": {}}) for method_name in method_names}
+
+        connection.send((test_class, method_names, it))
+        try:
+            while True:
+                message = connection.recv()
+
+                if message[0] == "sample":
+                    samples[message[1]][0].append(message[2])
+                    if on_measurement: on_measurement(message[1], message[2])
+                elif message[0] == "done":
+                    samples[message[1]] = (samples[message[1]][0], message[2], message[3], message[4])
+                elif message[0] == "error":
+                    logger.error(f"Error in isolated worker {process.pid}: {message[1]}")
+                elif message[0] == "finished":
+                    break
+        except EOFError:
+            logger.error(f"Isolated worker {process.pid} died (exit code {process.exitcode})")
+        finally:
+            connection.close()
+            process.join()
+
+        self.spawn_workers(1)
+
+        return samples
+
+    def close(self):
+        """
+            Stops all workers, which are still waiting for a task.
+        """
+
+        while self.ready_workers:
+            process, connection = self.ready_workers.popleft()
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+            process.join()
+
+def group_test_methods(test_methods, mode=ISOLATION_MODE):
+    """
+        Groups the test methods to the tasks, which are executed by one worker each.
+
+        Args:
+            test_methods (list): A list of [TESTCLASS, CLASS_NAME, METHOD_NAME].
+            mode (str): "method" (one task per test method) or "class" (one task per test class).
+        Returns:
+            A list of tuples (test class, class name, list of (index in test_methods, method name)).
+    """
+
+    if mode not in ("method", "class"):
+        raise ValueError(f"Unknown isolation mode {mode}")
+
+    groups = []
+    groups_by_class = {}
+
+    for i, (test_class, class_name, method_name) in enumerate(test_methods):
+        if mode == "class" and class_name in groups_by_class:
+            groups_by_class[class_name][2].append((i, method_name))
+            continue
+
+        group = (test_class, class_name, [(i, method_name)])
+        groups.append(group)
+        groups_by_class[class_name] = group
+
+    return groups
+
+def run_test_cases_isolated(test_methods):
+    """
+        Runs every test method (or test class) in a freshly spawned interpreter.
+
+        Args:
+            test_methods (list): A list of [TESTCLASS, CLASS_NAME, METHOD_NAME].
+        Returns:
+            A list of tuples (measurements, success, total time, additional measurements) in the same order as test_methods.
+    """
+
+    it = NUMBER_OF_RUNS_PER_TEST # the same amount of iterations as sample_test_case
+    if not RUN_TESTS_MULTIPLE_TIMES: it = 1
+    elif ADAPTIVE_SAMPLING: it = ADAPTIVE_MAX_RUNS
+    samples = [None] * len(test_methods)
+    pool = IsolatedWorkerPool()
+
+    try:
+        for test_class, class_name, methods in group_test_methods(test_methods):
+            amount_of_samples = {}
+
+            def on_measurement(method_name, value):
+                if method_name not in amount_of_samples: print(f"\n> {class_name}::{method_name} (isolated):")
+                amount_of_samples[method_name] = amount_of_samples.get(method_name, 0) + 1
+                print_progress_bar(min(amount_of_samples[method_name], it), it)
+
+            group_samples = pool.run(test_class, [method_name for _, method_name in methods], it, on_measurement=on_measurement)
+
+            for i, method_name in methods:
+                samples[i] = group_samples[method_name]
+    finally:
+        pool.close()
+
+    return samples
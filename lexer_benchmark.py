@@ -0,0 +1,204 @@
+import gc
+import time
+import timeit
+from statistics import median
+
+from antlr4 import InputStream, PredictionContextCache, Token
+from antlr4.atn.LexerATNSimulator import LexerATNSimulator
+from antlr4.dfa.DFA import DFA
+
+from parse_driver import load_grammar
+
+
+LEXER_HEADER = ["Input", "Size [bytes]", "Tokens", "Median [ms]", "Tokens/s", "Bytes/s", "Change", "Median ratio"]
+
+TOKEN_HISTOGRAM_HEADER = ["Token type", "Count", "Frequency", "Chars", "Time [ms]", "Avg. time [µs]", "Time share"]
+
+# Class name of the lexer inputs in the raw samples of the snapshot (the method name is the input name)
+LEXER_CLASS_NAME = "lexer"
+
+
+class ProfilingLexerATNSimulator(LexerATNSimulator):
+    """
+        Lexer ATN simulator, which collects the count, the matched characters and the time of every token type
+        and the time spent in the ATN prediction (computing DFA states, which aren't cached yet).
+    """
+
+    def __init__(self, recog, atn, decisionToDFA, sharedContextCache, token_stats, prediction_stats):
+        super().__init__(recog, atn, decisionToDFA, sharedContextCache)
+        self.token_stats = token_stats
+        self.prediction_stats = prediction_stats
+
+    def match(self, input, mode):
+        start_index = input.index
+
+        t0 = time.perf_counter_ns()
+        token_type = super().match(input, mode)
+        t1 = time.perf_counter_ns()
+
+        stats = self.token_stats.setdefault(token_type, {"count": 0, "chars": 0, "time_ns": 0})
+        stats["count"] += 1
+        stats["chars"] += input.index - start_index
+        stats["time_ns"] += t1 - t0
+
+        return token_type
+
+    def computeStartState(self, input, p):
+        t0 = time.perf_counter_ns()
+        try:
+            return super().computeStartState(input, p)
+        finally:
+            self.prediction_stats["time_ns"] += time.perf_counter_ns() - t0
+            self.prediction_stats["dfa_misses"] += 1
+
+    def computeTargetState(self, input, s, t):
+        t0 = time.perf_counter_ns()
+        try:
+            return super().computeTargetState(input, s, t)
+        finally:
+            self.prediction_stats["time_ns"] += time.perf_counter_ns() - t0
+            self.prediction_stats["dfa_misses"] += 1
+
+def drain(lexer):
+    """
+        Drains a lexer with nextToken until EOF (no token stream and no parser attached).
+
+        Args:
+            lexer (Lexer): The lexer.
+        Returns:
+            The amount of tokens (without EOF).
+    """
+
+    tokens = 0
+    while lexer.nextToken().type != Token.EOF: tokens += 1
+
+    return tokens
+
+def get_token_name(parser_class, token_type):
+    """
+        Gets the symbolic name of a token type.
+        The names of the generated parser are used, because the name lists of the generated python lexer aren't indexed by the token type.
+
+        Args:
+            parser_class (class): The generated parser class.
+            token_type (int): The token type.
+        Returns:
+            The symbolic name (e.g. "ID"), the literal name (e.g. "'+'") or the number as string.
+    """
+
+    for names in (parser_class.symbolicNames, parser_class.literalNames):
+        if 0 <= token_type < len(names) and names[token_type] != "<INVALID>": return names[token_type]
+
+    return str(token_type)
+
+def profile_lexer(inputs, lexer_class, parser_class):
+    """
+        Lexes every input once with a cold lexer DFA and the profiling simulator.
+
+        Args:
+            inputs (list): A list of tuples (name, text).
+            lexer_class (class): The generated lexer class.
+            parser_class (class): The generated parser class (names of the token types).
+        Returns:
+            A tuple of the rows of the token type histogram (see TOKEN_HISTOGRAM_HEADER, sorted by time) and a dict of the ATN prediction time in ms and the DFA misses.
+    """
+
+    lexer_class.decisionsToDFA = [DFA(decision_state, i) for i, decision_state in enumerate(lexer_class.atn.decisionToState)]
+
+    token_stats = {}
+    prediction_stats = {"time_ns": 0, "dfa_misses": 0}
+    for _, text in inputs:
+        lexer = lexer_class(InputStream(text))
+        lexer.removeErrorListeners()
+        lexer._interp = ProfilingLexerATNSimulator(lexer, lexer.atn, lexer.decisionsToDFA, PredictionContextCache(), token_stats, prediction_stats)
+        drain(lexer)
+
+    total_count = sum(stats["count"] for stats in token_stats.values()) or 1
+    total_time_ns = sum(stats["time_ns"] for stats in token_stats.values()) or 1
+
+    histogram = []
+    for token_type, stats in sorted(token_stats.items(), key=lambda item: item[1]["time_ns"], reverse=True):
+        histogram.append([get_token_name(parser_class, token_type), stats["count"], round(stats["count"] / total_count, 4), stats["chars"],
+                          round(stats["time_ns"] / 1e6, 4), round(stats["time_ns"] / stats["count"] / 1e3, 3), round(stats["time_ns"] / total_time_ns, 4)])
+
+    return histogram, {"atn_prediction_ms": prediction_stats["time_ns"] / 1e6, "dfa_misses": prediction_stats["dfa_misses"]}
+
+def measure_lexer(text, lexer_class, it):
+    """
+        Measures draining the lexer over a text (gc disabled in the timed region).
+
+        Args:
+            text (str): The input.
+            lexer_class (class): The generated lexer class.
+            it (int): The number of iterations.
+        Returns:
+            A tuple of the list of measurements in ms and the amount of tokens.
+    """
+
+    tokens = 0
+    measurements = []
+    for _ in range(it):
+        lexer = lexer_class(InputStream(text))
+        lexer.removeErrorListeners()
+
+        gcold = gc.isenabled()
+        gc.disable()
+        t0 = timeit.default_timer()
+        tokens = drain(lexer)
+        t1 = timeit.default_timer()
+        if gcold: gc.enable()
+
+        measurements.append((t1 - t0) * 1000)
+
+    return measurements, tokens
+
+def benchmark_lexer(inputs, it=10, compare=None):
+    """
+        Lexer-only benchmark: The generated lexer gets drained with nextToken over every input.
+        First every input is lexed once with a cold lexer DFA and the profiling simulator (token type histogram, ATN prediction time),
+        then the throughput is measured with the warm DFA and the plain simulator.
+
+        Args:
+            inputs (list): A list of tuples (name, text).
+            it (int): The number of iterations per input (the median is used).
+            compare (function): Compares the measurements of an input with the snapshot (gets the name and the measurements, returns a list of the change and the median ratio).
+        Returns:
+            A tuple of the rows per input (see LEXER_HEADER), the token type histogram (see TOKEN_HISTOGRAM_HEADER),
+            a dict of the aggregated throughput and prediction statistics and a dict input name -> measurements.
+    """
+
+    from print import print_progress_bar
+
+    lexer_class, parser_class = load_grammar()
+    histogram, prediction = profile_lexer(inputs, lexer_class, parser_class)
+
+    rows = []
+    samples = {}
+    total_tokens, total_bytes, total_ms = 0, 0, 0
+    for i, (name, text) in enumerate(inputs):
+        measurements, tokens = measure_lexer(text, lexer_class, it)
+        median_ms = median(measurements)
+        size = len(text.encode("utf-8"))
+        samples[name] = measurements
+
+        comparison = compare(name, measurements) if compare else ["n/a", ""]
+        rows.append([name, size, tokens, round(median_ms, 4), round(tokens / median_ms * 1000, 2) if median_ms else "",
+                     round(size / median_ms * 1000, 2) if median_ms else ""] + comparison[:2])
+
+        total_tokens += tokens
+        total_bytes += size
+        total_ms += median_ms
+        print_progress_bar(i + 1, len(inputs))
+
+    summary = {
+        "inputs": len(inputs),
+        "tokens": total_tokens,
+        "bytes": total_bytes,
+        "time_ms": total_ms,
+        "tokens_per_second": round(total_tokens / total_ms * 1000, 2) if total_ms else "",
+        "bytes_per_second": round(total_bytes / total_ms * 1000, 2) if total_ms else "",
+        "atn_prediction_ms": prediction["atn_prediction_ms"],
+        "dfa_misses": prediction["dfa_misses"],
+    }
+
+    return rows, histogram, summary, samples
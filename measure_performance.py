@@ -1,9 +1,17 @@
 import gc
 import timeit
+import tracemalloc
+from contextlib import contextmanager
 
 
+MEMORY_METRICS = ["peak", "retained", "live_blocks", "tree_nodes", "tree_depth"]
+
 last_performance_measure_in_ms = 0
 last_performance_measure_in_ms_list = []
+last_memory_measure = None
+
+# If measure_performance_in_ms measures the memory instead of the time (see memory_measurement)
+measure_memory_only = False
 
 
 def measure_performance_in_ms(callback):
@@ -16,7 +24,11 @@ def measure_performance_in_ms(callback):
             Tuple of callback return and measured time in ms.
     """
 
-    from config import RUN_TESTS_MULTIPLE_TIMES, NUMBER_OF_RUNS_PER_TEST
+    from config import RUN_TESTS_MULTIPLE_TIMES, NUMBER_OF_RUNS_PER_TEST, ADAPTIVE_SAMPLING, ADAPTIVE_MAX_RUNS
+
+    if measure_memory_only:
+        measure_memory(callback)
+        return callback() # the result of the traced call is released for the retained memory
 
     if RUN_TESTS_MULTIPLE_TIMES:
         gcold = gc.isenabled()
@@ -32,8 +44,103 @@ def measure_performance_in_ms(callback):
         last_performance_measure_in_ms = (t1 - t0) * 1000
     else:
         global last_performance_measure_in_ms_list
-        last_performance_measure_in_ms_list = timeit.repeat(callback, setup='pass', repeat=NUMBER_OF_RUNS_PER_TEST, number=1)
-        last_performance_measure_in_ms_list = [t * 1000 for t in last_performance_measure_in_ms_list]
+        if ADAPTIVE_SAMPLING:
+            timer = timeit.Timer(callback)
+            last_performance_measure_in_ms_list = []
+            while len(last_performance_measure_in_ms_list) < ADAPTIVE_MAX_RUNS:
+                last_performance_measure_in_ms_list.append(timer.timeit(number=1) * 1000)
+                if has_converged(last_performance_measure_in_ms_list): break
+        else:
+            last_performance_measure_in_ms_list = timeit.repeat(callback, setup='pass', repeat=NUMBER_OF_RUNS_PER_TEST, number=1)
+            last_performance_measure_in_ms_list = [t * 1000 for t in last_performance_measure_in_ms_list]
         parse_out = callback()
 
     return parse_out
+
+@contextmanager
+def memory_measurement():
+    """
+        Makes measure_performance_in_ms measure the memory of its callback instead of the time (used for one additional run of a test after the timed iterations).
+    """
+
+    global measure_memory_only
+    measure_memory_only = True
+    try:
+        yield
+    finally:
+        measure_memory_only = False
+
+def measure_memory(callback):
+    """
+        Measure memory of callback function (one additional, untimed call with tracemalloc, because tracing slows down the callback).
+        The phases, inputs and statistics, which the parse driver records during this call, are discarded (see parse_driver.paused_recording).
+        The result is stored in last_memory_measure:
+        - "peak": peak traced allocation during the call in KiB
+        - "retained": traced memory, which is still allocated after the result got released (e.g. DFA cache growth) in KiB
+        - "live_blocks": amount of traced memory blocks, which are still allocated when the call returns (the result included),
+          not the amount of allocations during the call (tracemalloc doesn't count freed blocks)
+        - "tree_nodes": amount of parse tree nodes (rule contexts and terminals) of all parse trees of the call
+        - "tree_depth": maximum depth of these parse trees
+        The parse trees are taken from the parse driver or, if the callback returns a parse tree, from the return value.
+
+        Args:
+            callback (function): callback function.
+        Returns:
+            The dict of the measured memory metrics.
+    """
+
+    from parse_driver import pop_parse_trees, get_tree_size, paused_recording, recording_parse_trees
+    from antlr4.tree.Tree import ParseTree
+
+    global last_memory_measure
+
+    if tracemalloc.is_tracing():
+        raise RuntimeError("Memory measurement needs tracemalloc, which is already tracing")
+
+    gcold = gc.isenabled()
+    gc.disable()
+    pop_parse_trees()
+
+    tracemalloc.start()
+    try:
+        with paused_recording(), recording_parse_trees(): parse_out = callback()
+        _, peak = tracemalloc.get_traced_memory()
+        live_blocks = sum(statistic.count for statistic in tracemalloc.take_snapshot().statistics("filename"))
+
+        trees = pop_parse_trees()
+        if not trees and isinstance(parse_out, ParseTree): trees = [parse_out]
+        tree_sizes = [get_tree_size(tree) for tree in trees]
+
+        del parse_out, trees
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        if gcold: gc.enable()
+
+    last_memory_measure = {
+        "peak": peak / 1024,
+        "retained": retained / 1024,
+        "live_blocks": live_blocks,
+        "tree_nodes": sum(nodes for nodes, _ in tree_sizes),
+        "tree_depth": max((depth for _, depth in tree_sizes), default=0),
+    }
+
+    return last_memory_measure
+
+def has_converged(measurements):
+    """
+        Checks if the adaptive sampling can stop, because the confidence interval of the measurements is narrow enough.
+
+        Args:
+            measurements (list): The measurements so far.
+        Returns:
+            True, if at least ADAPTIVE_MIN_RUNS measurements exist and the relative confidence interval width is within ADAPTIVE_RELATIVE_CI_WIDTH.
+    """
+
+    from config import ADAPTIVE_MIN_RUNS, ADAPTIVE_STATISTIC, ADAPTIVE_CONFIDENCE_LEVEL, ADAPTIVE_RELATIVE_CI_WIDTH
+    from stats import relative_confidence_interval_width
+
+    if len(measurements) < max(ADAPTIVE_MIN_RUNS, 2): return False
+
+    return relative_confidence_interval_width(measurements, ADAPTIVE_STATISTIC, ADAPTIVE_CONFIDENCE_LEVEL) <= ADAPTIVE_RELATIVE_CI_WIDTH
@@ -0,0 +1,113 @@
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from config import NUMBER_OF_WORKERS, PIN_WORKERS_TO_CORES, WORKER_CORES, LOGGER_NAME
+from print import print_progress_bar
+
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+def get_worker_cores():
+    """
+        Gets the cores the workers can get pinned to.
+
+        Returns:
+            A sorted list of core ids (WORKER_CORES if set, else all cores available to this process).
+    """
+
+    if WORKER_CORES: return list(WORKER_CORES)
+
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+
+    return list(range(os.cpu_count() or 1))
+
+def partition_test_methods(test_methods, amount_of_partitions):
+    """
+        Splits the test methods round robin into disjoint subsets, so every worker owns one subset.
+
+        Args:
+            test_methods (list): A list of [TESTCLASS, CLASS_NAME, METHOD_NAME].
+            amount_of_partitions (int): The amount of subsets.
+        Returns:
+            A list of subsets. Each element is a list of tuples (index in test_methods, test method).
+    """
+
+    partitions = [[] for _ in range(amount_of_partitions)]
+
+    for i, test_method in enumerate(test_methods):
+        partitions[i % amount_of_partitions].append((i, test_method))
+
+    return [partition for partition in partitions if partition]
+
+def pin_to_core(core):
+    """
+        Pins the current process to a single core (only supported on linux).
+
+        Args:
+            core (int): The core id.
+    """
+
+    if not hasattr(os, "sched_setaffinity"):
+        logger.warning(f"Pinning to core {core} not supported on this platform.")
+        return
+
+    try:
+        os.sched_setaffinity(0, {core})
+    except OSError as e:
+        logger.warning(f"Could not pin worker {os.getpid()} to core {core}: {e}")
+
+def run_partition(core, partition):
+    """
+        Runs all test methods of a subset in the current worker process.
+
+        Args:
+            core (int): The core the worker gets pinned to (None if pinning is disabled).
+            partition (list): A list of tuples (index, [TESTCLASS, CLASS_NAME, METHOD_NAME]).
+        Returns:
+            A list of tuples (index, measurements, success, total time, additional measurements).
+    """
+
+    from run import sample_test_case # import in worker to avoid circular imports
+
+    if core is not None: pin_to_core(core)
+
+    samples = []
+    for i, (test_class, class_name, method_name) in partition:
+        measurements, res, total_time, details = sample_test_case(test_class, method_name, show_progress=False)
+        samples.append((i, list(measurements), res, total_time, details))
+
+    return samples
+
+def run_test_cases_parallel(test_methods):
+    """
+        Runs the test methods in a process pool. Every worker owns a subset of test methods and is optionally pinned to its own core.
+
+        Args:
+            test_methods (list): A list of [TESTCLASS, CLASS_NAME, METHOD_NAME].
+        Returns:
+            A list of tuples (measurements, success, total time, additional measurements) in the same order as test_methods.
+    """
+
+    if not test_methods: return []
+
+    cores = get_worker_cores()
+    amount_of_workers = min(NUMBER_OF_WORKERS or len(cores), len(test_methods))
+    partitions = partition_test_methods(test_methods, amount_of_workers)
+
+    logger.info(f"Run {len(test_methods)} tests with {len(partitions)} workers on cores {cores}")
+
+    samples = [None] * len(test_methods)
+    with ProcessPoolExecutor(max_workers=len(partitions)) as executor:
+        futures = [executor.submit(run_partition, cores[i % len(cores)] if PIN_WORKERS_TO_CORES else None, partition)
+                   for i, partition in enumerate(partitions)]
+
+        for amount_of_finished, future in enumerate(as_completed(futures)):
+            for i, measurements, res, total_time, details in future.result():
+                samples[i] = (measurements, res, total_time, details)
+
+            print_progress_bar(amount_of_finished + 1, len(futures))
+
+    return samples
@@ -0,0 +1,180 @@
+import gc
+import glob
+import logging
+import os
+import timeit
+
+from antlr4 import InputStream
+
+from config import PHASE_ANALYSIS, LOGGER_NAME
+from atn_profiler import pop_decision_stats
+from parse_driver import PHASES, load_grammar, reset_phase_measures, sum_phase_measures, pop_recorded_inputs
+from rule_profiler import pop_rule_stats
+
+
+logger = logging.getLogger(LOGGER_NAME)
+
+PARSE_BENCHMARK_HEADER = ["File", "Parse function", "Size [bytes]", "Tokens", "Median [ms]", "Bytes/s", "Tokens/s"]
+
+# Prefix of the class name of the parse benchmarks in the results (the method name is the file path)
+CLASS_PREFIX = "parse:"
+
+
+def get_function_name(parse_function):
+    """
+        Gets the full name of a parse function (used as class name in the results).
+
+        Args:
+            parse_function (function): The parse function.
+        Returns:
+            "parse:" + module + "." + qualified name.
+    """
+
+    return f"{CLASS_PREFIX}{getattr(parse_function, '__module__', '')}.{getattr(parse_function, '__qualname__', repr(parse_function))}"
+
+def get_input_files(source):
+    """
+        Gets the input files of a directory (recursively) or a glob.
+
+        Args:
+            source (str): A directory or a glob (e.g. "corpus/**/*.expr").
+        Returns:
+            A sorted list of file paths.
+    """
+
+    pattern = os.path.join(source, "**", "*") if os.path.isdir(source) else source
+
+    return sorted(file_path for file_path in glob.glob(pattern, recursive=True) if os.path.isfile(file_path))
+
+def count_tokens(text):
+    """
+        Counts the tokens of a text with the lexer of the parse driver (outside of the timed region).
+
+        Args:
+            text (str): The text.
+        Returns:
+            The amount of tokens (without EOF) or None, if the lexer isn't available or fails.
+    """
+
+    try:
+        lexer_class, _ = load_grammar()
+        return len(lexer_class(InputStream(text)).getAllTokens())
+    except Exception as e:
+        logger.info(f"ℹ️ Tokens can't be counted: {e}")
+        return None
+
+def load_parse_benchmarks(parse_benchmarks, count=True):
+    """
+        Preloads all input files of the parse benchmarks, so the file I/O (and decoding) is outside of the timed region.
+
+        Args:
+            parse_benchmarks (list): A list of [PARSE_FUNCTION, DIRECTORY_OR_GLOB].
+            count (bool): If the tokens of every file get counted.
+        Returns:
+            A list of dicts with the parse function, its name, the file path, the text, the size in bytes and the amount of tokens.
+    """
+
+    inputs = []
+    for parse_function, source in parse_benchmarks:
+        function_name = get_function_name(parse_function)
+        file_paths = get_input_files(source)
+        if not file_paths: logger.warning(f"No input files found for {function_name} in {source}")
+
+        for file_path in file_paths:
+            with open(file_path, "rb") as input_file:
+                data = input_file.read()
+
+            text = data.decode("utf-8")
+            inputs.append({"function": parse_function, "function_name": function_name, "file": file_path, "text": text,
+                           "bytes": len(data), "tokens": count_tokens(text) if count else None})
+
+    return inputs
+
+def sample_parse_file(parse_input, it):
+    """
+        Measures a parse function over a preloaded file (one untimed warm-up call, gc disabled in the timed region).
+
+        Args:
+            parse_input (dict): The preloaded input (see load_parse_benchmarks).
+            it (int): The number of iterations.
+        Returns:
+            A tuple like run.sample_test_case: the list of measurements in ms, if all calls were successful, the total time of the last call
+            and a dict of additional measurements ("phases", "atn_profile", "rule_profile" and "inputs" if the parse function uses the parse driver).
+    """
+
+    parse_function, text = parse_input["function"], parse_input["text"]
+    details = {"phases": {phase: [] for phase in PHASES}, "cold": [], "warmup_curve": [], "inputs": [], "memory": {}}
+
+    measurements = []
+    try:
+        parse_function(text)
+
+        pop_decision_stats() # the decisions, rules and inputs of the warm-up call (and before) don't belong to the measurement
+        pop_rule_stats()
+        pop_recorded_inputs()
+        for _ in range(it):
+            reset_phase_measures()
+
+            gcold = gc.isenabled()
+            gc.disable()
+            try:
+                t0 = timeit.default_timer()
+                parse_function(text)
+                t1 = timeit.default_timer()
+            finally:
+                if gcold: gc.enable()
+
+            measurements.append((t1 - t0) * 1000)
+
+            phases = sum_phase_measures()
+            if PHASE_ANALYSIS and phases:
+                for phase in PHASES: details["phases"][phase].append(phases[phase])
+    except Exception as e:
+        logger.error(f"Error in parsing {parse_input['file']} with {parse_input['function_name']}: {e}")
+        measurements = []
+
+    reset_phase_measures()
+    if not any(details["phases"].values()) or not measurements: details["phases"] = {}
+    details["atn_profile"] = pop_decision_stats()
+    details["rule_profile"] = pop_rule_stats()
+    details["inputs"] = pop_recorded_inputs()
+
+    return measurements, bool(measurements), measurements[-1] if measurements else 0, details
+
+def get_throughput(parse_inputs, medians):
+    """
+        Calculates the throughput per file and over all files.
+
+        Args:
+            parse_inputs (list): The preloaded inputs (see load_parse_benchmarks).
+            medians (list): The median time in ms per input (None if the input failed).
+        Returns:
+            A tuple of the rows (see PARSE_BENCHMARK_HEADER) and a dict of the aggregated throughput (bytes/s, tokens/s, files/s over the sum of the medians).
+    """
+
+    def per_second(amount, ms): return round(amount / ms * 1000, 2) if amount is not None and ms else ""
+
+    rows = []
+    total_bytes, total_tokens, total_ms, files = 0, 0, 0, 0
+    for parse_input, median_ms in zip(parse_inputs, medians):
+        if median_ms is None: continue
+
+        rows.append([parse_input["file"], parse_input["function_name"], parse_input["bytes"], parse_input["tokens"] if parse_input["tokens"] is not None else "",
+                     median_ms, per_second(parse_input["bytes"], median_ms), per_second(parse_input["tokens"], median_ms)])
+
+        files += 1
+        total_ms += median_ms
+        total_bytes += parse_input["bytes"]
+        if total_tokens is not None: total_tokens = total_tokens + parse_input["tokens"] if parse_input["tokens"] is not None else None
+
+    summary = {
+        "files": files,
+        "bytes": total_bytes,
+        "tokens": total_tokens,
+        "time_ms": total_ms,
+        "bytes_per_second": per_second(total_bytes, total_ms),
+        "tokens_per_second": per_second(total_tokens, total_ms),
+        "files_per_second": per_second(files, total_ms),
+    }
+
+    return rows, summary
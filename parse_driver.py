@@ -0,0 +1,258 @@
+import gc
+import glob
+import importlib
+import timeit
+from contextlib import contextmanager
+
+from antlr4 import InputStream, CommonTokenStream, PredictionContextCache
+from antlr4.dfa.DFA import DFA
+from antlr4.ListTokenSource import ListTokenSource
+
+from atn_profiler import install_profiler, decision_stats
+from rule_profiler import install_rule_profiler, rule_stats
+
+
+PHASES = ["lexing", "token_buffering", "parsing", "visitor"]
+
+# Measured phases of every parse since the last reset (one dict phase -> ms per parse)
+phase_measures_in_ms = []
+
+# Texts parsed since the last pop (dict used as ordered set), only recorded if TWO_STAGE_BENCHMARK = True or LEXER_BENCHMARK = True
+recorded_inputs = {}
+
+# Parse trees since the last pop, only recorded during a memory measurement (see recording_parse_trees)
+parse_trees = []
+record_parse_trees = False
+
+grammar_cache = {}
+
+# Package of the generated parser, which is used instead of PARSER_PACKAGE (set by the A/B benchmark, see use_package)
+active_package = None
+
+
+def load_grammar(package=None):
+    """
+        Loads the generated lexer and parser classes.
+
+        Args:
+            package (str): The package of the generated parser. Default value is None: the active package (see use_package) or PARSER_PACKAGE is used.
+        Returns:
+            A tuple of the lexer class and the parser class.
+    """
+
+    from config import PARSER_PACKAGE, LEXER_NAME, PARSER_NAME
+
+    package = package or active_package or PARSER_PACKAGE
+
+    if package not in grammar_cache:
+        lexer_module = importlib.import_module(f"{package}.{LEXER_NAME}")
+        parser_module = importlib.import_module(f"{package}.{PARSER_NAME}")
+        grammar_cache[package] = (getattr(lexer_module, LEXER_NAME), getattr(parser_module, PARSER_NAME))
+
+    return grammar_cache[package]
+
+def use_package(package):
+    """
+        Switches the generated parser, which the parse driver uses by default (e.g. between the old and the new grammar).
+
+        Args:
+            package (str): The package of the generated parser. None: PARSER_PACKAGE.
+    """
+
+    global active_package
+    active_package = package
+
+def parse(text, visitor=None, start_rule=None, lexer_class=None, parser_class=None):
+    """
+        Parses a text like diagnostic.py (InputStream -> Lexer -> CommonTokenStream -> Parser -> start rule -> visitor) and measures every phase separately:
+        - lexing: the lexer produces all tokens (getAllTokens, so the lexing isn't interleaved with the buffering)
+        - token_buffering: the already lexed tokens get copied into a CommonTokenStream (through a ListTokenSource, so the parser's token source is
+          the ListTokenSource and not the lexer). This isn't the lazy buffering of diagnostic.py, where the lexer runs inside CommonTokenStream.fill,
+          it is only the overhead of the stream itself
+        - parsing: the start rule gets parsed
+        - visitor: the visitor walks the parse tree (0 if no visitor is given)
+
+        Args:
+            text (str): The text to parse.
+            visitor (ParseTreeVisitor): The visitor (e.g. transformation), which gets applied to the parse tree.
+            start_rule (str): The start rule. Default value is None: PARSER_START_RULE is used.
+            lexer_class (class): The lexer class. Default value is None: The lexer of PARSER_PACKAGE is used.
+            parser_class (class): The parser class. Default value is None: The parser of PARSER_PACKAGE is used.
+        Returns:
+            The result of the visitor or the parse tree, if no visitor is given.
+    """
+
+    from config import PARSER_START_RULE, ATN_PROFILING, RULE_PROFILING, TWO_STAGE_BENCHMARK, LEXER_BENCHMARK
+
+    if lexer_class is None or parser_class is None:
+        lexer_class, parser_class = load_grammar()
+
+    if TWO_STAGE_BENCHMARK or LEXER_BENCHMARK: recorded_inputs[text] = None
+
+    gcold = gc.isenabled()
+    gc.disable()
+
+    t0 = timeit.default_timer()
+    lexer = lexer_class(InputStream(text))
+    tokens = lexer.getAllTokens()
+
+    t1 = timeit.default_timer()
+    token_stream = CommonTokenStream(ListTokenSource(tokens)) # replays the tokens of the lexing phase (see token_buffering above)
+    token_stream.fill()
+
+    t2 = timeit.default_timer()
+    parser = parser_class(token_stream)
+    if ATN_PROFILING: install_profiler(parser)
+    if RULE_PROFILING: install_rule_profiler(parser)
+    tree = getattr(parser, start_rule or PARSER_START_RULE)()
+
+    t3 = timeit.default_timer()
+    parse_out = visitor.visit(tree) if visitor is not None else tree
+    t4 = timeit.default_timer()
+
+    if gcold: gc.enable()
+
+    if record_parse_trees: parse_trees.append(tree)
+
+    phase_measures_in_ms.append({
+        "lexing": (t1 - t0) * 1000,
+        "token_buffering": (t2 - t1) * 1000,
+        "parsing": (t3 - t2) * 1000,
+        "visitor": (t4 - t3) * 1000,
+    })
+
+    return parse_out
+
+def reset_phase_measures():
+    """
+        Removes all measured phases (called before every test iteration).
+    """
+
+    phase_measures_in_ms.clear()
+
+def sum_phase_measures(invocations=1):
+    """
+        Sums up the measured phases of all parses since the last reset.
+
+        Args:
+            invocations (int): The amount of times the measured callback got called (the sum gets divided by it).
+        Returns:
+            A dict phase -> ms or None, if the parse driver wasn't used.
+    """
+
+    if not phase_measures_in_ms: return None
+
+    return {phase: sum(measure[phase] for measure in phase_measures_in_ms) / invocations for phase in PHASES}
+
+@contextmanager
+def paused_recording():
+    """
+        Keeps additional, untimed parses (e.g. the memory measurement) out of the recordings of the test:
+        the measured phases, the recorded inputs and the decision and rule statistics get saved and cleared before and restored afterwards.
+    """
+
+    recordings = [phase_measures_in_ms, recorded_inputs, decision_stats, rule_stats]
+    saved = [recording.copy() for recording in recordings]
+    for recording in recordings: recording.clear()
+
+    try:
+        yield
+    finally:
+        for recording, values in zip(recordings, saved):
+            recording.clear()
+            if isinstance(recording, list): recording.extend(values)
+            else: recording.update(values)
+
+@contextmanager
+def recording_parse_trees():
+    """
+        Records the parse trees of all parses inside the context (used by the memory measurement, the trees of other parses aren't kept alive).
+    """
+
+    global record_parse_trees
+    record_parse_trees = True
+    try:
+        yield
+    finally:
+        record_parse_trees = False
+
+def pop_recorded_inputs():
+    """
+        Returns and resets the recorded texts (used to ship them out of worker processes per test).
+
+        Returns:
+            A list of the distinct texts parsed since the last pop.
+    """
+
+    inputs = list(recorded_inputs)
+    recorded_inputs.clear()
+
+    return inputs
+
+def pop_parse_trees():
+    """
+        Returns and resets the recorded parse trees.
+
+        Returns:
+            A list of the parse trees since the last pop.
+    """
+
+    trees = list(parse_trees)
+    parse_trees.clear()
+
+    return trees
+
+def get_tree_size(tree):
+    """
+        Counts the nodes (rule contexts and terminals) and the depth of a parse tree (iterative, so deep trees don't hit the recursion limit).
+
+        Args:
+            tree (ParseTree): The parse tree.
+        Returns:
+            A tuple of the amount of nodes and the depth (1 for a single node).
+    """
+
+    nodes = 0
+    max_depth = 0
+    stack = [(tree, 1)]
+
+    while stack:
+        node, depth = stack.pop()
+        nodes += 1
+        max_depth = max(max_depth, depth)
+
+        for child in getattr(node, "children", None) or []:
+            stack.append((child, depth + 1))
+
+    return nodes, max_depth
+
+def reset_dfa_caches(package=None):
+    """
+        Resets the shared DFA and prediction context caches of the generated lexer and parser, so the next parse starts cold.
+        The generated classes share these caches over all instances, so they are replaced on class level.
+
+        Args:
+            package (str): The package of the generated parser. Default value is None: PARSER_PACKAGE is used.
+    """
+
+    for recognizer_class in load_grammar(package):
+        recognizer_class.decisionsToDFA = [DFA(decision_state, i) for i, decision_state in enumerate(recognizer_class.atn.decisionToState)]
+        if hasattr(recognizer_class, "sharedContextCache"):
+            recognizer_class.sharedContextCache = PredictionContextCache()
+
+def warm_up_with_corpus(pattern, package=None):
+    """
+        Pre-warms the DFA caches by parsing all files of a corpus (the measured phases are discarded).
+
+        Args:
+            pattern (str): Glob of the input files.
+            package (str): The package of the generated parser. Default value is None: PARSER_PACKAGE is used.
+    """
+
+    lexer_class, parser_class = load_grammar(package)
+
+    for file_path in sorted(glob.glob(pattern, recursive=True)):
+        with open(file_path, encoding="utf-8") as input_file:
+            parse(input_file.read(), lexer_class=lexer_class, parser_class=parser_class)
+
+    reset_phase_measures()
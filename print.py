@@ -4,7 +4,7 @@ import sys
 from tabulate import tabulate
 
 from config import RESULT_HEADER, USE_SNAPSHOT, BUILD_PARSER, DECIMALS, \
-    RUN_TESTS_MULTIPLE_TIMES, PARSING_TIME_ANALYSIS, LOGGER_NAME, RECREATE_SNAPSHOT
+    RUN_TESTS_MULTIPLE_TIMES, PARSING_TIME_ANALYSIS, LOGGER_NAME, RECREATE_SNAPSHOT, ATN_PROFILE_TOP_N
 
 
 logger = logging.getLogger(LOGGER_NAME)
@@ -101,7 +101,7 @@ def print_results(amount_of_tests, results, failed_tests, sum_avg, sum_avg_bench
     print(f"\n\n{'⚖️ Results of current measurement':^100}")
     print('=' * 100)
 
-    formatted_data = [[item1, item2, format_cell(value1, 0), item3, format_cell(value2, 100) + "%", item4, item5] for item1, item2, value1, item3, value2, item4, item5 in results]
+    formatted_data = [[result[0], result[1], format_cell(result[2], 0), result[3], format_cell(result[4], 100) + "%", result[5], result[6], format_change(result[7])] + result[8:] for result in results]
 
     measure_table = tabulate(formatted_data, headers=RESULT_HEADER, tablefmt='fancy_grid')
     print("\n", measure_table)
@@ -120,13 +120,17 @@ def print_results(amount_of_tests, results, failed_tests, sum_avg, sum_avg_bench
     print(f"ℹ️ Parsed and tested a total of {amount_of_tests}")
     logger.info(f"ℹ️ Parsed and tested a total of {amount_of_tests}")
 
-    if all(result[3] for result in results):
+    if all(result[3] for result in results) and not failed_tests:
         print("✅ All tests were successful")
         logger.info(f"✅ All tests were successful")
     else:
         print(f"❌ Some tests failed: {failed_tests}")
         logger.info(f"❌ Some tests failed: {failed_tests}")
 
+    changes = [result[7] for result in results]
+    print(f"ℹ️ Changes to snapshot: {changes.count('slower')} slower, {changes.count('faster')} faster, {changes.count('unchanged')} unchanged, {changes.count('n/a')} without samples")
+    logger.info(f"ℹ️ Changes to snapshot: {changes.count('slower')} slower, {changes.count('faster')} faster, {changes.count('unchanged')} unchanged, {changes.count('n/a')} without samples")
+
     print(f"\n{'Benchmarking':^50}")
     print('-' * 50)
     print(f"🧮 Average sum of benchmark current measurement: {round(sum_avg_benchmark_current, DECIMALS)} ms")
@@ -152,6 +156,423 @@ def print_results(amount_of_tests, results, failed_tests, sum_avg, sum_avg_bench
     print('-' * 50)
     print('=' * 100)
 
+def print_phase_results(phase_results):
+    """
+        Prints the measured parse phases (lexing, token buffering, parsing, visitor) of all tests, which use the parse driver.
+        Every phase is compared separately with the snapshot.
+
+        Args:
+            phase_results (list): list of [test name, test class, phase, avg, difference to origin, change]
+    """
+    print(f"\n\n{'🔬 Parse phases of current measurement':^100}")
+    print('=' * 100)
+
+    formatted_data = [[test_name, class_name, phase, avg, format_cell(diff, 0), format_change(change)] for test_name, class_name, phase, avg, diff, change in phase_results]
+
+    phase_table = tabulate(formatted_data, headers=["Test Name", "Test Class", "Phase", "Avg. Time [ms]", "Difference to origin [ms]", "Change"], tablefmt='fancy_grid')
+    print("\n", phase_table)
+    logger.info(phase_table)
+
+    phases = list(dict.fromkeys(phase_result[2] for phase_result in phase_results))
+    for phase in phases:
+        sum_phase = sum(phase_result[3] for phase_result in phase_results if phase_result[2] == phase)
+        sum_diff = sum(phase_result[4] for phase_result in phase_results if phase_result[2] == phase)
+
+        print(f"ℹ️ Sum of {phase}: {round(sum_phase, DECIMALS)} ms ({format_cell(round(sum_diff, DECIMALS), 0)} ms)")
+        logger.info(f"ℹ️ Sum of {phase}: {round(sum_phase, DECIMALS)} ms ({format_cell(round(sum_diff, DECIMALS), 0)} ms)")
+    print('=' * 100)
+
+def print_atn_profile(header, atn_profile):
+    """
+        Prints the most expensive decisions of the ATN profile.
+
+        Args:
+            header (list): The column names of the profile.
+            atn_profile (list): The decisions ranked by prediction time.
+    """
+    print(f"\n\n{'🔎 ATN profile (most expensive decisions)':^100}")
+    print('=' * 100)
+
+    profile_table = tabulate(atn_profile[:ATN_PROFILE_TOP_N], headers=header, tablefmt='fancy_grid')
+    print("\n", profile_table)
+    logger.info(profile_table)
+
+    print(f"ℹ️ Profiled {len(atn_profile)} decisions, {sum(row[7] for row in atn_profile)} predictions needed full LL")
+    logger.info(f"ℹ️ Profiled {len(atn_profile)} decisions, {sum(row[7] for row in atn_profile)} predictions needed full LL")
+    print('=' * 100)
+
+def print_rule_profile(header, diff_header, rule_profile, rule_diff=None, top_n=20):
+    """
+        Prints the most expensive grammar rules and the rules, which changed the most compared with the snapshot grammar.
+
+        Args:
+            header (list): The column names of the rule profile.
+            diff_header (list): The column names of the comparison.
+            rule_profile (list): The rules ranked by exclusive time (per run of every test).
+            rule_diff (list): The comparison with the snapshot grammar sorted by the change of the exclusive time (None if the snapshot has no rule profile).
+            top_n (int): The amount of rules in the tables.
+    """
+    print(f"\n\n{'📐 Rule profile (per run of every test)':^100}")
+    print('=' * 100)
+
+    rule_table = tabulate(rule_profile[:top_n], headers=header, tablefmt='fancy_grid')
+    print("\n", rule_table)
+    logger.info(rule_table)
+
+    if rule_diff is not None:
+        def format_rule_change(value): return format_cell(value, 0) if isinstance(value, (int, float)) else value
+
+        changed_rules = [row for row in rule_diff if row[8] != 0 and row[8] != ""]
+        if len(changed_rules) > top_n: changed_rules = changed_rules[:top_n // 2] + changed_rules[-(top_n - top_n // 2):]
+        formatted_data = [row[:5] + [format_rule_change(row[5])] + row[6:8] + [format_rule_change(row[8])] for row in changed_rules]
+        diff_table = tabulate(formatted_data, headers=diff_header, tablefmt='fancy_grid')
+        print(f"\n{'Change to the snapshot grammar (slowest and fastest rules)':^100}")
+        print("\n", diff_table)
+        logger.info(diff_table)
+
+    print(f"ℹ️ Timed {len(rule_profile)} rules, {round(sum(row[3] for row in rule_profile), 2)} invocations per run of every test")
+    logger.info(f"ℹ️ Timed {len(rule_profile)} rules, {round(sum(row[3] for row in rule_profile), 2)} invocations per run of every test")
+    print('=' * 100)
+
+def print_cache_mode_results(cache_mode_results):
+    """
+        Prints the measurements with cold and warm DFA cache side by side.
+
+        Args:
+            cache_mode_results (list): list of [test name, test class, cold avg, cold difference, cold change, warm avg, warm difference, warm change, cold / warm]
+    """
+    print(f"\n\n{'🧊 Cold vs. warm DFA cache':^100}")
+    print('=' * 100)
+
+    formatted_data = [[test_name, class_name, cold_avg, format_cell(cold_diff, 0), format_change(cold_change), warm_avg, format_cell(warm_diff, 0), format_change(warm_change), ratio]
+                      for test_name, class_name, cold_avg, cold_diff, cold_change, warm_avg, warm_diff, warm_change, ratio in cache_mode_results]
+
+    cache_table = tabulate(formatted_data, headers=["Test Name", "Test Class", "Cold avg. [ms]", "Cold difference [ms]", "Cold change",
+                                                    "Warm avg. [ms]", "Warm difference [ms]", "Warm change", "Cold / Warm"], tablefmt='fancy_grid')
+    print("\n", cache_table)
+    logger.info(cache_table)
+    print('=' * 100)
+
+def print_memory_results(memory_results):
+    """
+        Prints the memory metrics (peak and retained memory, live memory blocks, parse tree size) of all tests.
+        Every metric is compared separately with the snapshot.
+
+        Args:
+            memory_results (list): list of [test name, test class, metric, value, difference to origin, percentage, change]
+    """
+    print(f"\n\n{'🧠 Memory of current measurement':^100}")
+    print('=' * 100)
+
+    formatted_data = [[test_name, class_name, metric, value, format_cell(diff, 0), format_cell(percent, 100) + "%", format_change(change)]
+                      for test_name, class_name, metric, value, diff, percent, change in memory_results]
+
+    memory_table = tabulate(formatted_data, headers=["Test Name", "Test Class", "Metric", "Value", "Difference to origin", "Percentage", "Change"], tablefmt='fancy_grid')
+    print("\n", memory_table)
+    logger.info(memory_table)
+
+    changes = [memory_result[6] for memory_result in memory_results]
+    print(f"ℹ️ Memory changes to snapshot: {changes.count('larger')} larger, {changes.count('smaller')} smaller, {changes.count('unchanged')} unchanged, {changes.count('n/a')} not in snapshot")
+    logger.info(f"ℹ️ Memory changes to snapshot: {changes.count('larger')} larger, {changes.count('smaller')} smaller, {changes.count('unchanged')} unchanged, {changes.count('n/a')} not in snapshot")
+    print('=' * 100)
+
+def print_scaling_results(header, scaling_results):
+    """
+        Prints the fitted growth classes of the input generators and the comparison with the snapshot.
+
+        Args:
+            header (list): The column names.
+            scaling_results (list): list of results per input generator (the last column is the change: "worse", "better", "unchanged" or "n/a")
+    """
+    print(f"\n\n{'📈 Scaling of current measurement':^100}")
+    print('=' * 100)
+
+    formatted_data = [result[:-1] + [format_change(result[-1])] for result in scaling_results]
+
+    scaling_table = tabulate(formatted_data, headers=header, tablefmt='fancy_grid')
+    print("\n", scaling_table)
+    logger.info(scaling_table)
+
+    worse = [result[0] for result in scaling_results if result[-1] == "worse"]
+    if worse:
+        print(f"❌ Worse growth class than in snapshot: {worse}")
+        logger.info(f"❌ Worse growth class than in snapshot: {worse}")
+    else:
+        print("✅ No test moved to a worse growth class")
+        logger.info("✅ No test moved to a worse growth class")
+    print('=' * 100)
+
+def print_atn_metrics(header, rule_rows, changes):
+    """
+        Prints the static ATN complexity metrics per rule and the changes to the snapshot.
+
+        Args:
+            header (list): The column names of the metrics.
+            rule_rows (list): The metrics per rule.
+            changes (list): list of [rule, metric, snapshot value, current value, difference] (None if the snapshot has no metrics)
+    """
+    print(f"\n\n{'🧮 Static ATN complexity':^100}")
+    print('=' * 100)
+
+    metrics_table = tabulate(rule_rows, headers=header, tablefmt='fancy_grid')
+    print("\n", metrics_table)
+    logger.info(metrics_table)
+
+    if changes is None:
+        print("ℹ️ No ATN metrics in snapshot")
+        logger.info("ℹ️ No ATN metrics in snapshot")
+    elif changes:
+        formatted_data = [[rule, metric, old_value, new_value, format_cell(diff, 0) if diff != "" else ""] for rule, metric, old_value, new_value, diff in changes]
+        changes_table = tabulate(formatted_data, headers=["Rule", "Metric", "Snapshot", "Current", "Difference"], tablefmt='fancy_grid')
+        print("\n", changes_table)
+        logger.info(changes_table)
+    else:
+        print("✅ ATN metrics unchanged to snapshot")
+        logger.info("✅ ATN metrics unchanged to snapshot")
+    print('=' * 100)
+
+def print_two_stage_results(header, two_stage_results, summary):
+    """
+        Prints the comparison of full LL and two-stage (SLL, then full LL on failure) parsing.
+
+        Args:
+            header (list): The column names.
+            two_stage_results (list): list of results per input
+            summary (dict): aggregated speedup, fraction of inputs with LL fallback and if all trees are identical
+    """
+    print(f"\n\n{'🪜 Two-stage parsing (SLL, then full LL on failure)':^100}")
+    print('=' * 100)
+
+    two_stage_table = tabulate(two_stage_results, headers=header, tablefmt='fancy_grid')
+    print("\n", two_stage_table)
+    logger.info(two_stage_table)
+
+    print(f"ℹ️ Sum full LL: {round(summary['sum_full_ll'], DECIMALS)} ms, sum two-stage: {round(summary['sum_two_stage'], DECIMALS)} ms (speedup {round(summary['speedup'], DECIMALS)})")
+    print(f"ℹ️ Inputs with LL fallback: {round(summary['fallback_fraction'] * 100, DECIMALS)} % of {summary['amount_of_inputs']}")
+    print("✅ All parse trees are identical" if summary['all_identical'] else "❌ Some parse trees are different")
+
+    logger.info(f"ℹ️ Sum full LL: {round(summary['sum_full_ll'], DECIMALS)} ms, sum two-stage: {round(summary['sum_two_stage'], DECIMALS)} ms (speedup {round(summary['speedup'], DECIMALS)})")
+    logger.info(f"ℹ️ Inputs with LL fallback: {round(summary['fallback_fraction'] * 100, DECIMALS)} % of {summary['amount_of_inputs']}")
+    logger.info("✅ All parse trees are identical" if summary['all_identical'] else "❌ Some parse trees are different")
+    print('=' * 100)
+
+def print_lexer_results(header, histogram_header, lexer_results, histogram, summary, snapshot_summary=None, snapshot_histogram=None):
+    """
+        Prints the lexer-only benchmark: throughput per input, the token type histogram and the lexer ATN prediction time.
+
+        Args:
+            header (list): The column names of the inputs.
+            histogram_header (list): The column names of the histogram.
+            lexer_results (list): list of results per input
+            histogram (list): list of results per token type
+            summary (dict): aggregated throughput, ATN prediction time and DFA misses
+            snapshot_summary (dict): summary of the snapshot (None if not available)
+            snapshot_histogram (list): histogram of the snapshot (values as strings, None if not available)
+    """
+    print(f"\n\n{'🔤 Lexer benchmark':^100}")
+    print('=' * 100)
+
+    formatted_data = [row[:-2] + [format_change(row[-2]), row[-1]] for row in lexer_results]
+    lexer_table = tabulate(formatted_data, headers=header, tablefmt='fancy_grid')
+    print("\n", lexer_table)
+    logger.info(lexer_table)
+
+    snapshot_avg_times = {row[0]: row[5] for row in snapshot_histogram or []}
+    histogram_table = tabulate([row + [snapshot_avg_times.get(row[0], "")] for row in histogram], headers=histogram_header + ["Snapshot avg. time [µs]"], tablefmt='fancy_grid')
+    print("\n", histogram_table)
+    logger.info(histogram_table)
+
+    for key, unit in [("tokens_per_second", "tokens/s"), ("bytes_per_second", "bytes/s")]:
+        current, snapshot = summary[key], (snapshot_summary or {}).get(key)
+        comparison = f" (snapshot {snapshot}, time per {unit[:-3]} {format_cell(round(100 / current * snapshot - 100, DECIMALS), 0)} %)" if current and snapshot else ""
+        print(f"ℹ️ Lexer throughput: {current} {unit}{comparison}")
+        logger.info(f"ℹ️ Lexer throughput: {current} {unit}{comparison}")
+
+    snapshot_prediction = f" (snapshot {round(snapshot_summary['atn_prediction_ms'], DECIMALS)} ms)" if snapshot_summary else ""
+    print(f"ℹ️ Lexer ATN prediction (cold DFA): {round(summary['atn_prediction_ms'], DECIMALS)} ms, {summary['dfa_misses']} DFA misses{snapshot_prediction}")
+    logger.info(f"ℹ️ Lexer ATN prediction (cold DFA): {round(summary['atn_prediction_ms'], DECIMALS)} ms, {summary['dfa_misses']} DFA misses{snapshot_prediction}")
+    print('=' * 100)
+
+def print_streaming_results(header, streaming_results, failed_inputs, snapshot_results=None):
+    """
+        Prints the latency and the peak RSS of the buffered and the streaming path per input.
+
+        Args:
+            header (list): The column names.
+            streaming_results (list): list of results per input and path
+            failed_inputs (list): list of the inputs, which failed in one of the paths
+            snapshot_results (list): results of the snapshot (values as strings, None if not available)
+    """
+    print(f"\n\n{'🌊 Streaming benchmark':^100}")
+    print('=' * 100)
+
+    snapshot_values = {(row[0], row[2]): (row[3], row[5]) for row in snapshot_results or []}
+    streaming_table = tabulate([row + list(snapshot_values.get((row[0], row[2]), ("", ""))) for row in streaming_results],
+                               headers=header + ["Snapshot median [ms]", "Snapshot peak RSS [MiB]"], tablefmt='fancy_grid')
+    print("\n", streaming_table)
+    logger.info(streaming_table)
+
+    for file_path in failed_inputs:
+        print(f"❌ Streaming benchmark failed: {file_path}")
+        logger.info(f"❌ Streaming benchmark failed: {file_path}")
+    print('=' * 100)
+
+def print_parse_benchmark_results(header, parse_benchmark_results, summary, snapshot_summary=None):
+    """
+        Prints the throughput of the parse benchmarks per file and over all files.
+
+        Args:
+            header (list): The column names.
+            parse_benchmark_results (list): list of results per file
+            summary (dict): aggregated throughput (bytes/s, tokens/s, files/s)
+            snapshot_summary (dict): aggregated throughput of the snapshot (None if not available)
+    """
+    print(f"\n\n{'📚 Parse benchmarks':^100}")
+    print('=' * 100)
+
+    parse_benchmark_table = tabulate(parse_benchmark_results, headers=header, tablefmt='fancy_grid')
+    print("\n", parse_benchmark_table)
+    logger.info(parse_benchmark_table)
+
+    for unit in ["bytes", "tokens", "files"]:
+        current, snapshot = summary[f"{unit}_per_second"], (snapshot_summary or {}).get(f"{unit}_per_second")
+        comparison = f" (snapshot {snapshot}, time per {unit[:-1]} {format_cell(round(100 / current * snapshot - 100, DECIMALS), 0)} %)" if current and snapshot else ""
+        print(f"ℹ️ Throughput: {current} {unit}/s{comparison}")
+        logger.info(f"ℹ️ Throughput: {current} {unit}/s{comparison}")
+    print('=' * 100)
+
+def print_ab_results(header, ab_results, failed_tests):
+    """
+        Prints the paired differences of the interleaved A/B benchmark (snapshot grammar vs. current grammar).
+
+        Args:
+            header (list): The table header (see ab_benchmark.AB_HEADER).
+            ab_results (list): The rows (test name, test class, pairs, old median, new median, median difference, CI, ratio, p-value, change).
+            failed_tests (list): list of [test class, test name] of the tests, which failed with at least one of the grammars.
+    """
+    print(f"\n\n{'🆎 A/B benchmark (new - old)':^100}")
+    print('=' * 100)
+
+    formatted_data = [row[:-1] + [format_change(row[-1])] for row in ab_results]
+
+    ab_table = tabulate(formatted_data, headers=header, tablefmt='fancy_grid')
+    print("\n", ab_table)
+    logger.info(ab_table)
+
+    changes = [row[-1] for row in ab_results]
+    print(f"ℹ️ Changes to old grammar: {changes.count('slower')} slower, {changes.count('faster')} faster, {changes.count('unchanged')} unchanged, {changes.count('n/a')} not comparable")
+    logger.info(f"ℹ️ Changes to old grammar: {changes.count('slower')} slower, {changes.count('faster')} faster, {changes.count('unchanged')} unchanged, {changes.count('n/a')} not comparable")
+
+    if failed_tests:
+        print(f"❌ Failed tests: {', '.join(class_name + '::' + method_name for class_name, method_name in failed_tests)}")
+        logger.info(f"❌ Failed tests: {', '.join(class_name + '::' + method_name for class_name, method_name in failed_tests)}")
+    print('=' * 100)
+
+def print_hotspots(header, diff_header, hotspots, hotspot_diff=None, top_n=10):
+    """
+        Prints the hot functions of every test and the functions, which gained the most time since the snapshot.
+
+        Args:
+            header (list): The column names of the hotspots (see profiling.HOTSPOT_HEADER).
+            diff_header (list): The column names of the diff (see profiling.HOTSPOT_DIFF_HEADER).
+            hotspots (list): list of functions per test (sorted by self time)
+            hotspot_diff (list): list of the differences to the snapshot per test and function (sorted by gained self time, None if the snapshot has no profile)
+            top_n (int): The amount of functions per test.
+    """
+    print(f"\n\n{'🔥 Hot functions (ms per run)':^100}")
+    print('=' * 100)
+
+    def top(rows):
+        counts = {}
+        for row in rows:
+            counts[(row[1], row[0])] = counts.get((row[1], row[0]), 0) + 1
+            if counts[(row[1], row[0])] <= top_n: yield row
+
+    hotspot_table = tabulate(list(top(hotspots)), headers=header, tablefmt='fancy_grid')
+    print("\n", hotspot_table)
+    logger.info(hotspot_table)
+
+    if hotspot_diff is not None:
+        formatted_data = [row[:5] + [format_cell(row[5], 0)] + row[6:8] + [format_cell(row[8], 0)] for row in top(hotspot_diff) if row[5] > 0]
+        diff_table = tabulate(formatted_data, headers=diff_header, tablefmt='fancy_grid')
+        print(f"\n{'Functions, which gained time since the snapshot':^100}")
+        print("\n", diff_table)
+        logger.info(diff_table)
+    print('=' * 100)
+
+def print_change_points(header, change_points, run_id):
+    """
+        Prints the change points of the tests of the current run, which were detected in the history.
+
+        Args:
+            header (list): The table header (see history.CHANGE_POINT_HEADER).
+            change_points (list): The rows (test name, test class, run, timestamp, grammar hash, median before, median after, change in %).
+            run_id (int): The id of the current run in the history database.
+    """
+    print(f"\n\n{'📈 History change points':^100}")
+    print('=' * 100)
+
+    if change_points:
+        formatted_data = [row[:-1] + [format_cell(row[-1], 0) if row[-1] != "" else ""] for row in change_points]
+        change_point_table = tabulate(formatted_data, headers=header, tablefmt='fancy_grid')
+        print("\n", change_point_table)
+        logger.info(change_point_table)
+
+    print(f"ℹ️ Run {run_id} saved in the history, {len(change_points)} change points found")
+    logger.info(f"ℹ️ Run {run_id} saved in the history, {len(change_points)} change points found")
+    print('=' * 100)
+
+def print_history_overview(header, overview):
+    """
+        Prints the trend of every test in the history.
+
+        Args:
+            header (list): The table header (see history.HISTORY_OVERVIEW_HEADER).
+            overview (list): The rows (test name, test class, runs, first and last median, change in %, sparkline, change points).
+    """
+    print(f"\n\n{'📈 History':^100}")
+    print('=' * 100)
+
+    formatted_data = [row[:5] + [format_cell(row[5], 0) if row[5] != "" else ""] + row[6:] for row in overview]
+    print("\n", tabulate(formatted_data, headers=header, tablefmt='fancy_grid'))
+    print('=' * 100)
+
+def print_history_series(header, class_name, method_name, series):
+    """
+        Prints the trend series of a test.
+
+        Args:
+            header (list): The table header (see history.HISTORY_SERIES_HEADER).
+            class_name (str): The class name.
+            method_name (str): The method name.
+            series (list): The rows per run (run, timestamp, grammar hash, commit, avg, median, iterations, success, change point).
+    """
+    print(f"\n\n{'📈 ' + class_name + '::' + method_name:^100}")
+    print('=' * 100)
+
+    print("\n", tabulate(series, headers=header, tablefmt='fancy_grid'))
+    print('=' * 100)
+
+def print_environment(environment, calibration, warnings, speed):
+    """
+        Prints the environment fingerprint, the calibration and the mismatches to the snapshot.
+
+        Args:
+            environment (dict): The environment fingerprint (see environment.get_fingerprint).
+            calibration (dict): The calibration (median time and noise).
+            warnings (list): The mismatches to the environment of the snapshot.
+            speed (float): The relative speed to the snapshot machine (> 1: the current machine is faster).
+    """
+    print(f"\n🖥️ {environment['cpu_model']}, {environment['cores']} cores (affinity {len(environment['affinity'] or [])}), governor {environment['governor']}, "
+          f"load {environment['load_average']}, Python {environment['python_version']}, ANTLR runtime {environment['antlr_runtime_version']}")
+    print(f"⏱️ Calibration: {round(calibration['median_ms'], 3)} ms, noise {round(calibration['noise'] * 100, DECIMALS)} %, relative speed to snapshot {round(speed, 3)}")
+    logger.info(f"🖥️ Environment: {environment}")
+    logger.info(f"⏱️ Calibration: {calibration}, relative speed to snapshot {round(speed, 3)}")
+
+    for warning in warnings:
+        print(f"⚠️ {warning}")
+        logger.warning(warning)
+
 def format_cell(value, threshold):
     """
         Formats the given value red if it's higher than threshold else green
@@ -167,3 +588,19 @@ def format_cell(value, threshold):
         return f"\033[92m{value}\033[0m"
     else:
         return f"+\033[91m{value}\033[0m"
+
+def format_change(change):
+    """
+        Formats the change classification red if the test got slower (larger, worse) and green if it got faster (smaller, better)
+
+        Args:
+            change (str): The change ("faster", "slower", "larger", "smaller", "worse", "better", "unchanged" or "n/a")
+        Returns:
+            str: The formatted change
+    """
+
+    if change in ("slower", "larger", "worse"):
+        return f"\033[91m{change}\033[0m"
+    if change in ("faster", "smaller", "better"):
+        return f"\033[92m{change}\033[0m"
+    return change
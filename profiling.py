@@ -0,0 +1,219 @@
+import os
+import re
+import signal
+import sys
+import threading
+import time
+
+
+HOTSPOT_HEADER = ["Test Name", "Test Class", "Function", "Self [ms]", "Self share", "Total [ms]", "Total share"]
+
+HOTSPOT_DIFF_HEADER = ["Test Name", "Test Class", "Function", "Snapshot self [ms]", "Self [ms]", "Gained self [ms]", "Snapshot total [ms]", "Total [ms]",
+                       "Gained total [ms]"]
+
+
+def get_frame_name(code):
+    """
+        Gets the name of a function in the collapsed stacks.
+
+        Args:
+            code (code): The code object of the function.
+        Returns:
+            "qualified name (file:first line)" (";" is the frame separator of the collapsed stacks and gets replaced).
+    """
+
+    name = f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return name.replace(";", ":")
+
+def get_function_name(frame_name):
+    """
+        Removes the line number from the name of a frame (see get_frame_name), so the hotspots of a function can be compared,
+        even if a grammar change shifted the lines of the generated parser.
+
+        Args:
+            frame_name (str): The name of the frame.
+        Returns:
+            "qualified name (file)".
+    """
+
+    return re.sub(r":\d+\)$", ")", frame_name)
+
+def sample_stacks(callback, iterations, interval_ms):
+    """
+        Statistical profiling: SIGPROF interrupts the process every interval_ms of CPU time and the current stack gets counted.
+        Only the frames below the callback are recorded. Works only on unix in the main thread.
+
+        Args:
+            callback (function): The profiled function.
+            iterations (int): The amount of calls of the callback.
+            interval_ms (float): The sampling interval in ms of CPU time.
+        Returns:
+            A dict of collapsed stack ("outer;...;inner") to the amount of samples.
+    """
+
+    stacks = {}
+    root = None
+
+    def on_sample(signum, frame):
+        names = []
+        while frame is not None and frame is not root:
+            names.append(get_frame_name(frame.f_code))
+            frame = frame.f_back
+        if frame is None or not names: return # not inside the callback
+
+        stack = ";".join(reversed(names))
+        stacks[stack] = stacks.get(stack, 0) + 1
+
+    def run():
+        nonlocal root
+        root = sys._getframe()
+        for _ in range(iterations): callback()
+
+    previous_handler = signal.signal(signal.SIGPROF, on_sample)
+    signal.setitimer(signal.ITIMER_PROF, interval_ms / 1000, interval_ms / 1000)
+    try:
+        run()
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, previous_handler)
+
+    return stacks
+
+def trace_stacks(callback):
+    """
+        Deterministic profiling of a single call with sys.setprofile: the time between two events is added to the current stack (python and builtin functions).
+        The overhead of the profile function inflates the times, but the stacks are complete.
+
+        Args:
+            callback (function): The profiled function.
+        Returns:
+            A dict of collapsed stack ("outer;...;inner") to the time in µs.
+    """
+
+    times_ns = {}
+    stack = [()] # the stack of every depth as tuple, so it can be used as key
+    last = time.perf_counter_ns()
+
+    def on_event(frame, event, arg):
+        nonlocal last
+        now = time.perf_counter_ns()
+        if len(stack) > 1: times_ns[stack[-1]] = times_ns.get(stack[-1], 0) + now - last
+
+        if event == "call":
+            stack.append(stack[-1] + (get_frame_name(frame.f_code),))
+        elif event == "c_call":
+            if arg is not sys.setprofile: stack.append(stack[-1] + (f"{getattr(arg, '__qualname__', repr(arg))} (builtin)".replace(";", ":"),))
+        elif len(stack) > 1 and event in ("return", "c_return", "c_exception"):
+            stack.pop()
+
+        last = time.perf_counter_ns()
+
+    sys.setprofile(on_event)
+    try:
+        callback()
+    finally:
+        sys.setprofile(None)
+
+    return {";".join(names): round(time_ns / 1000) for names, time_ns in times_ns.items() if round(time_ns / 1000) > 0}
+
+def profile(callback, mode="sampling", iterations=10, interval_ms=1):
+    """
+        Profiles a function after the timed iterations of a test.
+        The sampling mode falls back to the deterministic mode, if SIGPROF isn't available (e.g. on windows or outside of the main thread).
+
+        Args:
+            callback (function): The profiled function (e.g. one run of the test).
+            mode (str): "sampling" (SIGPROF sampler over iterations calls) or "deterministic" (sys.setprofile over a single call).
+            iterations (int): The amount of calls in the sampling mode.
+            interval_ms (float): The sampling interval in ms of CPU time.
+        Returns:
+            A dict of the mode, the amount of calls, the ms per stack weight (sample or µs) and the collapsed stacks (stack -> weight).
+    """
+
+    if mode not in ("sampling", "deterministic"):
+        raise ValueError(f"Unknown profiling mode {mode}")
+
+    if mode == "sampling" and (not hasattr(signal, "SIGPROF") or threading.current_thread() is not threading.main_thread()): mode = "deterministic"
+
+    if mode == "sampling":
+        return {"mode": mode, "iterations": iterations, "weight_ms": interval_ms, "stacks": sample_stacks(callback, iterations, interval_ms)}
+
+    return {"mode": mode, "iterations": 1, "weight_ms": 0.001, "stacks": trace_stacks(callback)}
+
+def get_folded(profiles):
+    """
+        Creates the collapsed stacks of all tests (flamegraph.pl/speedscope format), the root frame of every stack is the test.
+
+        Args:
+            profiles (dict): (class name, method name) to the profile (see profile).
+        Returns:
+            The lines "class::method;outer;...;inner weight" as text.
+    """
+
+    lines = []
+    for (class_name, method_name), test_profile in profiles.items():
+        for stack, weight in sorted(test_profile["stacks"].items()):
+            lines.append(f"{class_name}::{method_name};{stack} {weight}")
+
+    return "\n".join(lines) + "\n" if lines else ""
+
+def get_hotspots(profiles):
+    """
+        Calculates the self time (function is the innermost frame) and the total time (function is on the stack) of every function per test.
+        The times are in ms per call of the test, so runs with a different amount of profiled calls are comparable.
+        The functions are identified without line numbers (see get_function_name).
+
+        Args:
+            profiles (dict): (class name, method name) to the profile (see profile).
+        Returns:
+            A list of rows (see HOTSPOT_HEADER) sorted by test and self time.
+    """
+
+    rows = []
+    for (class_name, method_name), test_profile in profiles.items():
+        scale = test_profile["weight_ms"] / max(test_profile["iterations"], 1)
+        total_weight = sum(test_profile["stacks"].values()) or 1
+
+        self_weights, total_weights = {}, {}
+        for stack, weight in test_profile["stacks"].items():
+            frames = [get_function_name(frame) for frame in stack.split(";")]
+            self_weights[frames[-1]] = self_weights.get(frames[-1], 0) + weight
+            for frame in set(frames): # recursive functions count once per stack
+                total_weights[frame] = total_weights.get(frame, 0) + weight
+
+        for function, total in sorted(total_weights.items(), key=lambda item: (self_weights.get(item[0], 0), item[1]), reverse=True):
+            rows.append([method_name, class_name, function, round(self_weights.get(function, 0) * scale, 4), round(self_weights.get(function, 0) / total_weight, 4),
+                         round(total * scale, 4), round(total / total_weight, 4)])
+
+    return rows
+
+def diff_hotspots(hotspots, snapshot_hotspots):
+    """
+        Compares the hotspots with the snapshot: which functions gained (or lost) time per call of the test.
+
+        Args:
+            hotspots (list): The current rows (see get_hotspots).
+            snapshot_hotspots (list): The rows of the snapshot (values as strings).
+        Returns:
+            A list of rows (see HOTSPOT_DIFF_HEADER) sorted by test and gained self time (functions missing in one of the profiles have 0 ms there).
+    """
+
+    def index(rows):
+        indexed = {}
+        for row in rows: # snapshots of older versions have line numbers in the function names
+            key = (row[1], row[0], get_function_name(row[2]))
+            self_ms, total_ms = indexed.get(key, (0, 0))
+            indexed[key] = (self_ms + float(row[3]), total_ms + float(row[5]))
+        return indexed
+
+    current, snapshot = index(hotspots), index(snapshot_hotspots)
+    tests = {(class_name, method_name) for class_name, method_name, _ in current}
+
+    rows = []
+    for key in current.keys() | {key for key in snapshot if key[:2] in tests}:
+        snapshot_self, snapshot_total = snapshot.get(key, (0, 0))
+        current_self, current_total = current.get(key, (0, 0))
+        rows.append([key[1], key[0], key[2], snapshot_self, current_self, round(current_self - snapshot_self, 4),
+                     snapshot_total, current_total, round(current_total - snapshot_total, 4)])
+
+    return sorted(rows, key=lambda row: (row[1], row[0], -row[5]))
@@ -0,0 +1,146 @@
+import time
+
+from antlr4 import ParseTreeListener
+
+from atn_profiler import get_rule_lines
+
+
+RULE_PROFILE_HEADER = ["Rank", "Rule", "Grammar line", "Invocations", "Inclusive [ms]", "Exclusive [ms]", "Avg. inclusive [µs]", "Avg. exclusive [µs]",
+                       "Exclusive share"]
+
+RULE_DIFF_HEADER = ["Rule", "Snapshot invocations", "Invocations", "Snapshot inclusive [ms]", "Inclusive [ms]", "Inclusive change",
+                    "Snapshot exclusive [ms]", "Exclusive [ms]", "Exclusive change"]
+
+# Collected statistics since the last pop (rule name -> dict of counters)
+rule_stats = {}
+
+
+class RuleTimingListener(ParseTreeListener):
+    """
+        Parse listener, which records the time between entering and exiting every rule context (the events of left-recursive rules included).
+        Inclusive time: time of the rule with its sub rules (only the outermost invocation of a recursive rule counts, so nothing is counted twice).
+        Exclusive time: inclusive time without the time of the sub rules (token matching, prediction and error handling of the rule itself).
+        The overhead of the listener is part of the times.
+    """
+
+    def __init__(self, rule_names):
+        self.rule_names = rule_names
+        self.stack = [] # open rule contexts: [rule index, start time, time of the sub rules]
+        self.active = [0] * len(rule_names) # open invocations per rule
+
+    def enterEveryRule(self, ctx):
+        rule_index = ctx.getRuleIndex()
+        self.active[rule_index] += 1
+        self.stack.append([rule_index, time.perf_counter_ns(), 0])
+
+    def exitEveryRule(self, ctx):
+        now = time.perf_counter_ns()
+        if not self.stack: return
+
+        rule_index, start, sub_rules_ns = self.stack.pop()
+        inclusive_ns = now - start
+        if self.stack: self.stack[-1][2] += inclusive_ns
+        self.active[rule_index] -= 1
+
+        stats = rule_stats.get(self.rule_names[rule_index])
+        if stats is None: stats = rule_stats[self.rule_names[rule_index]] = {"invocations": 0, "inclusive_ns": 0, "exclusive_ns": 0}
+
+        stats["invocations"] += 1
+        stats["exclusive_ns"] += inclusive_ns - sub_rules_ns
+        if self.active[rule_index] == 0: stats["inclusive_ns"] += inclusive_ns
+
+def install_rule_profiler(parser):
+    """
+        Adds the rule timing listener to a parser.
+
+        Args:
+            parser (Parser): The generated parser.
+    """
+
+    parser.addParseListener(RuleTimingListener(parser.ruleNames))
+
+def pop_rule_stats():
+    """
+        Returns and resets the collected statistics (used to ship them out of worker processes per test).
+
+        Returns:
+            A dict rule name -> dict of counters.
+    """
+
+    stats = dict(rule_stats)
+    rule_stats.clear()
+
+    return stats
+
+def merge_rule_stats(target, stats, runs=1):
+    """
+        Merges the statistics of a test into the aggregated statistics.
+        The statistics get divided by the amount of runs of the test, so the aggregate is the time of one run of every test
+        (comparable between runs with a different amount of iterations).
+
+        Args:
+            target (dict): The aggregated statistics (rule name -> dict of counters).
+            stats (dict): The statistics to add.
+            runs (int): The amount of runs of the test, which the statistics were collected over.
+    """
+
+    for rule, counters in stats.items():
+        aggregated = target.setdefault(rule, {"invocations": 0, "inclusive_ns": 0, "exclusive_ns": 0})
+        for key, value in counters.items():
+            aggregated[key] += value / max(runs, 1)
+
+def build_rule_report(stats, grammar_path):
+    """
+        Builds the per rule report, ranked by the exclusive time.
+
+        Args:
+            stats (dict): The aggregated statistics (rule name -> dict of counters).
+            grammar_path (str): The path to the .g4 file (used to map the rules to lines).
+        Returns:
+            A list of rows (see RULE_PROFILE_HEADER).
+    """
+
+    try:
+        rule_lines = get_rule_lines(grammar_path)
+    except OSError:
+        rule_lines = {}
+
+    total_exclusive_ns = sum(counters["exclusive_ns"] for counters in stats.values()) or 1
+    ranked_rules = sorted(stats.items(), key=lambda item: item[1]["exclusive_ns"], reverse=True)
+
+    return [[rank + 1, rule, rule_lines.get(rule, ""), round(counters["invocations"], 2), round(counters["inclusive_ns"] / 1e6, 4),
+             round(counters["exclusive_ns"] / 1e6, 4), round(counters["inclusive_ns"] / counters["invocations"] / 1e3, 3) if counters["invocations"] else "",
+             round(counters["exclusive_ns"] / counters["invocations"] / 1e3, 3) if counters["invocations"] else "",
+             round(counters["exclusive_ns"] / total_exclusive_ns, 4)]
+            for rank, (rule, counters) in enumerate(ranked_rules)]
+
+def compare_rule_reports(report, snapshot_report):
+    """
+        Compares the per rule report with the report of the snapshot (previous grammar).
+
+        Args:
+            report (list): The current rows (see build_rule_report).
+            snapshot_report (list): The rows of the snapshot (values as strings).
+        Returns:
+            A list of rows (see RULE_DIFF_HEADER, changes in percent, "new"/"removed" for rules of only one grammar) sorted by the change of the exclusive time in ms.
+    """
+
+    def index(rows): return {row[1]: (float(row[3]), float(row[4]), float(row[5])) for row in rows}
+    def change(old, new): return round((new / old - 1) * 100, 2) if old else ""
+
+    current, snapshot = index(report), index(snapshot_report)
+
+    rows = []
+    for rule in current.keys() | snapshot.keys():
+        if rule not in snapshot:
+            rows.append([rule, "", current[rule][0], "", current[rule][1], "new", "", current[rule][2], "new"])
+        elif rule not in current:
+            rows.append([rule, snapshot[rule][0], "", snapshot[rule][1], "", "removed", snapshot[rule][2], "", "removed"])
+        else:
+            (old_invocations, old_inclusive, old_exclusive), (invocations, inclusive, exclusive) = snapshot[rule], current[rule]
+            rows.append([rule, old_invocations, invocations, old_inclusive, inclusive, change(old_inclusive, inclusive),
+                         old_exclusive, exclusive, change(old_exclusive, exclusive)])
+
+    def exclusive_delta(row): return (row[7] or 0) - (row[6] or 0)
+
+    return sorted(rows, key=exclusive_delta, reverse=True)
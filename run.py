@@ -1,24 +1,73 @@
 import logging
+import os
+import sys
 import timeit
+from statistics import median
 import unittest
+from contextlib import nullcontext
 from io import StringIO
-import subprocess
 
 from snapshot_handler import check_difference, check_percent, \
     load_snapshot, save_snapshot, method_exists, get_all_methods_that_not_exist, benchmark, recreate_snapshot, \
-    close_recreate_snapshot
+    close_recreate_snapshot, check_distribution, check_relative_change, load_artifact, get_metadata, set_calibration
 from config import NUMBER_OF_RUNS_PER_TEST, TEST_CASES, USE_SNAPSHOT, BUILD_PARSER, \
     PARSER_BUILD_SCRIPT_PATH, SNAPSHOTS_FOLDER_NAME, \
-    MAKE_SNAPSHOT, SNAPSHOT_NAME, RESULT_HEADER, PARSING_TIME_ANALYSIS, OUTLIER_DETECTION, RUN_TESTS_MULTIPLE_TIMES, \
-    RECREATE_SNAPSHOT, LOGGING_FILE_NAME, LOGGER_NAME, NUMBER_OF_BENCHMARKS
+    MAKE_SNAPSHOT, SNAPSHOT_NAME, RESULT_HEADER, PHASE_HEADER, COLD_HEADER, DECIMALS, PARSING_TIME_ANALYSIS, OUTLIER_DETECTION, RUN_TESTS_MULTIPLE_TIMES, \
+    RECREATE_SNAPSHOT, LOGGING_FILE_NAME, LOGGER_NAME, NUMBER_OF_BENCHMARKS, PARALLEL_EXECUTION, ISOLATION_MODE, ADAPTIVE_SAMPLING, ADAPTIVE_MAX_RUNS, PHASE_ANALYSIS, ATN_PROFILING, PARSER_GRAMMAR_PATH, \
+    CACHE_MODE_ANALYSIS, COLD_RUNS_PER_TEST, WARMUP_RUNS_PER_TEST, WARMUP_CORPUS, TWO_STAGE_BENCHMARK, TWO_STAGE_INPUTS, \
+    TWO_STAGE_RUNS_PER_INPUT, MEMORY_ANALYSIS, MEMORY_HEADER, SCALING_ANALYSIS, SCALING_MIN_SIZE, SCALING_MAX_SIZE, SCALING_FACTOR, \
+    SCALING_RUNS_PER_SIZE, CORPUS_GENERATION, ATN_METRICS, ATN_METRICS_SOURCE, ATN_ANALYSIS_INPUT_DIRECTORY, AB_BENCHMARK, AB_ROUNDS_PER_TEST, AB_SEED, \
+    CALIBRATION, CALIBRATION_RUNS, CALIBRATION_ITERATIONS, NOISE_TOLERANCE_FACTOR, CALIBRATION_SPEED_TOLERANCE, CALIBRATION_NORMALIZE, TEST_HARNESS, HARNESS_OVERHEAD_RUNS, \
+    PARSE_BENCHMARKS, PARSE_BENCHMARK_RUNS_PER_FILE, PARSE_BENCHMARK_COUNT_TOKENS, LEXER_BENCHMARK, LEXER_BENCHMARK_INPUTS, LEXER_BENCHMARK_RUNS_PER_INPUT, \
+    STREAMING_BENCHMARK, STREAMING_INPUTS, STREAMING_RUNS_PER_INPUT, STREAMING_CHUNK_SIZE, \
+    HISTORY, HISTORY_CHANGE_POINT_RUNS, PROFILING, PROFILING_MODE, PROFILING_ITERATIONS, PROFILING_INTERVAL_MS, PROFILING_TOP_N, \
+    RULE_PROFILING, RULE_PROFILE_TOP_N
+from build_cache import build_parser
+from ab_benchmark import AB_HEADER, run_ab_benchmark
+from environment import get_fingerprint, calibrate, compare_environments
+from history import CHANGE_POINT_HEADER, record_run, find_change_points
+from harness import DirectHarness, measure_overhead
+from lexer_benchmark import LEXER_HEADER, TOKEN_HISTOGRAM_HEADER, LEXER_CLASS_NAME, benchmark_lexer
+from parse_benchmark import PARSE_BENCHMARK_HEADER, load_parse_benchmarks, sample_parse_file, get_throughput, get_input_files
+from profiling import HOTSPOT_HEADER, HOTSPOT_DIFF_HEADER, profile, get_folded, get_hotspots, diff_hotspots
+from parallel import run_test_cases_parallel
+from isolation import run_test_cases_isolated
+from measure_performance import MEMORY_METRICS, has_converged, memory_measurement
+from parse_driver import PHASES, reset_phase_measures, sum_phase_measures, reset_dfa_caches, warm_up_with_corpus, \
+    pop_recorded_inputs, load_grammar, paused_recording
+from corpus_generator import CorpusTest, load_or_generate_corpus
+from streaming import STREAMING_HEADER, benchmark_streaming
+from scaling import SCALING_HEADER, get_sizes, run_scaling_suite
+from two_stage import TWO_STAGE_HEADER, benchmark_two_stage, load_inputs
+from atn_metrics import RULE_METRICS_HEADER, DECISION_METRICS_HEADER, compute_atn_metrics, compute_dot_metrics, compare_atn_metrics
+from atn_profiler import PROFILE_HEADER, pop_decision_stats, merge_decision_stats, build_profile_report
+from rule_profiler import RULE_PROFILE_HEADER, RULE_DIFF_HEADER, pop_rule_stats, merge_rule_stats, build_rule_report, compare_rule_reports
 
 from print import print_progress_bar, print_results, print_title, \
-    print_recreate_title, print_metadata_results
+    print_recreate_title, print_metadata_results, print_phase_results, \
+    print_atn_profile, print_cache_mode_results, print_two_stage_results, print_memory_results, print_scaling_results, \
+    print_atn_metrics, print_ab_results, print_environment, print_parse_benchmark_results, print_lexer_results, \
+    print_streaming_results, print_change_points, print_hotspots, \
+    print_rule_profile
 
 
 logger = logging.getLogger(LOGGER_NAME)
 results = []
 metadata_collection = []
+iterations_per_test = {}
+raw_samples = {}
+phase_results = []
+decision_stats = {}
+rule_profile_stats = {}
+cache_mode_results = []
+warmup_curves = {}
+parsed_inputs = {}
+memory_results = []
+artifacts = {}
+parse_benchmark_results = []
+parse_benchmark_summary = {}
+profiles = {}
+parser_build_key = None
 total_time = 0
 
 
@@ -35,43 +84,130 @@ def measure():
     not_available_tests_in_snapshot = []
     failed_tests = []
 
-    for test_case in TEST_CASES:
-        test_class = test_case[0]
-        class_name = fullname(test_class())
-        test_methods = [method for method in dir(test_class) if method.startswith("test_")]
-
-        for method_name in test_methods:
+    test_methods = get_test_methods()
+
+    if CORPUS_GENERATION:
+        print(f"\n> Load or generate corpus:")
+        _, manifest = load_or_generate_corpus(show_progress=True) # generate before the measurement (and before workers get started)
+        print(f"\nℹ️ {manifest['amount_of_sentences']} sentences, rule coverage: {round(manifest['rule_coverage'] * 100, DECIMALS)} %")
+        logger.info(f"ℹ️ Generated corpus: {manifest['amount_of_sentences']} sentences, rule coverage: {round(manifest['rule_coverage'] * 100, DECIMALS)} %")
+        test_methods.append([CorpusTest, fullname(CorpusTest()), "test_generated_corpus"])
+
+    parse_inputs = []
+    if PARSE_BENCHMARKS:
+        parse_inputs = load_parse_benchmarks(PARSE_BENCHMARKS, PARSE_BENCHMARK_COUNT_TOKENS) # file I/O before the measurement
+        print(f"\nℹ️ Loaded {len(parse_inputs)} input files ({sum(parse_input['bytes'] for parse_input in parse_inputs)} bytes) of the parse benchmarks")
+
+    samples = None
+    if PARALLEL_EXECUTION:
+        print(f"\n> Run {len(test_methods)} tests in parallel:")
+        samples = run_test_cases_parallel(test_methods)
+    elif ISOLATION_MODE != "none":
+        samples = run_test_cases_isolated(test_methods)
+
+    parse_medians = []
+    parse_benchmarks = [[parse_input, parse_input["function_name"], parse_input["file"]] for parse_input in parse_inputs]
+    for i, (test_class, class_name, method_name) in enumerate(test_methods + parse_benchmarks):
+        if i >= len(test_methods): # test_class is the preloaded input of a parse benchmark
+            if i == len(test_methods): print(f"\n> Parse benchmarks ({len(parse_benchmarks)} files):")
+            measurements, res, total_time_of_test, details = sample_parse_file(test_class, PARSE_BENCHMARK_RUNS_PER_FILE)
+            parse_medians.append(median(measurements) if measurements else None)
+            print_progress_bar(i - len(test_methods) + 1, len(parse_benchmarks))
+        elif samples is not None:
+            measurements, res, total_time_of_test, details = samples[i]
+        else:
             print(f"\n> {class_name}::{method_name}:")
+            measurements, res, total_time_of_test, details = sample_test_case(test_class, method_name)
+
+        if not measurements: # the parse function, the test or its fixtures failed in every iteration
+            failed_tests.append([class_name, method_name])
+            continue
+
+        exists_in_snapshot = method_exists(method_name, class_name)
+
+        if not exists_in_snapshot:
+            not_available_tests_in_snapshot.append([class_name, method_name])
+
+        iterations_per_test[class_name + "::" + method_name] = len(measurements)
+        merge_decision_stats(decision_stats, details.get("atn_profile", {}))
+        merge_rule_stats(rule_profile_stats, details.get("rule_profile", {}), details.get("runs", len(measurements)))
+        for j, text in enumerate(details.get("inputs", [])):
+            parsed_inputs.setdefault(text, f"{class_name}::{method_name}#{j}")
+        raw_samples[(class_name, method_name)] = list(measurements)
+        if details.get("profile"): profiles[(class_name, method_name)] = details["profile"]
+        comparison = check_distribution(method_name, raw_samples[(class_name, method_name)], class_name)
+
+        avg = detect_outliers_and_calculate_avg(measurements, detection=OUTLIER_DETECTION)
 
-            exists_in_snapshot = method_exists(method_name, class_name)
+        total_parsing_time = 0
 
-            if not exists_in_snapshot:
-                not_available_tests_in_snapshot.append([class_name, method_name])
+        if PARSING_TIME_ANALYSIS and RUN_TESTS_MULTIPLE_TIMES: # TODO: Add total parsing time also for RUN_TESTS_MULTIPLE_TIMES = False. For now its 0 if RUN_TESTS_MULTIPLE_TIMES = False.
+            total_parsing_time = total_time_of_test
+            
+            """
+            You can also set total parsing time directly to the parsetree antlr transformation function.
+
+            Example:
+            from use_antlr_to_transform_from_grammar_to_ir import parsing_time
+            total_parsing_time = parsing_time
+            """
+            
+
+        if not res: failed_tests.append([class_name, method_name])
+
+        diff = check_difference(method_name, avg, class_name)
+        percent = check_percent(method_name, avg, class_name)
+        phase_values = []
+        for phase, phase_header in zip(PHASES, PHASE_HEADER):
+            phase_measurements = details["phases"].get(phase)
+
+            if not phase_measurements:
+                phase_values.append("")
+                continue
 
-            avg, res = run_test_case(test_class, method_name)
+            raw_samples[(class_name, f"{method_name}#{phase}")] = list(phase_measurements)
+            phase_avg = detect_outliers_and_calculate_avg(list(phase_measurements), detection=OUTLIER_DETECTION)
+            phase_diff = check_difference(method_name, phase_avg, class_name, column=RESULT_HEADER.index(phase_header))
+            phase_change = check_distribution(f"{method_name}#{phase}", phase_measurements, class_name)[0]
 
-            total_parsing_time = 0
+            phase_values.append(phase_avg)
+            phase_results.append([method_name, class_name, phase, phase_avg, phase_diff, phase_change])
 
-            if PARSING_TIME_ANALYSIS and RUN_TESTS_MULTIPLE_TIMES: # TODO: Add total parsing time also for RUN_TESTS_MULTIPLE_TIMES = False. For now its 0 if RUN_TESTS_MULTIPLE_TIMES = False.
-                global total_time
-                total_parsing_time = total_time
-                
-                """
-                You can also set total parsing time directly to the parsetree antlr transformation function.
+        cold_avg = ""
+        if details.get("cold"):
+            raw_samples[(class_name, f"{method_name}#cold")] = list(details["cold"])
+            cold_avg = detect_outliers_and_calculate_avg(list(details["cold"]), detection=OUTLIER_DETECTION)
+            cold_diff = check_difference(method_name, cold_avg, class_name, column=RESULT_HEADER.index(COLD_HEADER))
+            cold_change = check_distribution(f"{method_name}#cold", details["cold"], class_name)[0]
 
-                Example:
-                from use_antlr_to_transform_from_grammar_to_ir import parsing_time
-                total_parsing_time = parsing_time
-                """
-                
+            cache_mode_results.append([method_name, class_name, cold_avg, cold_diff, cold_change, avg, diff, comparison[0], round(cold_avg / avg, DECIMALS) if avg else ""])
+            warmup_curves[class_name + "::" + method_name] = details["warmup_curve"]
 
-            if not res: failed_tests.append([class_name, method_name])
+        memory_values = []
+        for metric, memory_header in zip(MEMORY_METRICS, MEMORY_HEADER):
+            memory_measurements = details.get("memory", {}).get(metric)
 
-            diff = check_difference(method_name, avg, class_name)
-            percent = check_percent(method_name, avg, class_name)
-            results.append([method_name, avg, diff, res, percent, class_name, total_parsing_time])
+            if not memory_measurements:
+                memory_values.append("")
+                continue
 
-            amount_of_tests += 1
+            column = RESULT_HEADER.index(memory_header)
+            memory_value = median(memory_measurements)
+            memory_diff = check_difference(method_name, memory_value, class_name, column=column)
+            memory_percent = check_percent(method_name, memory_value, class_name, column=column)
+            memory_change = check_relative_change(method_name, memory_value, class_name, column)
+
+            memory_values.append(round(memory_value, DECIMALS))
+            memory_results.append([method_name, class_name, memory_header, round(memory_value, DECIMALS), memory_diff, memory_percent, memory_change])
+
+        results.append([method_name, avg, diff, res, percent, class_name, total_parsing_time] + comparison + phase_values + [cold_avg] + memory_values)
+
+        amount_of_tests += 1
+
+    if parse_inputs:
+        rows, summary = get_throughput(parse_inputs, parse_medians)
+        parse_benchmark_results.extend(rows)
+        parse_benchmark_summary.update(summary)
 
     not_available_tests_in_current = get_all_methods_that_not_exist(results)
 
@@ -81,18 +217,23 @@ def measure():
         sum_avg += result[1]
         sum_total_parsing_time += result[6]
 
-    # remove header elements if they exist in list
-    remove_element_from_list([RESULT_HEADER[5], RESULT_HEADER[1]], not_available_tests_in_current)
-    remove_element_from_list([RESULT_HEADER[5], RESULT_HEADER[1]], not_available_tests_in_snapshot)
-
     return amount_of_tests, sum_avg, not_available_tests_in_snapshot, not_available_tests_in_current, failed_tests, sum_total_parsing_time
 
-def remove_element_from_list(remove_element, lst):
-    for element in lst:
-        if len(element) != len(remove_element): continue
+def get_test_methods():
+    """
+        Collects the test methods (starting with "test_") of all TEST_CASES.
 
-        for j in range(len(remove_element)):
-            if remove_element[j] == element[j]: lst.remove(element)
+        Returns:
+            A list of lists of test class, class name and method name.
+    """
+
+    test_methods = []
+    for test_case in TEST_CASES:
+        test_class = test_case[0]
+        class_name = fullname(test_class())
+        test_methods += [[test_class, class_name, method] for method in dir(test_class) if method.startswith("test_")]
+
+    return test_methods
 
 def run_test_case(test_class, method_name, it=NUMBER_OF_RUNS_PER_TEST):
     """
@@ -105,51 +246,185 @@ def run_test_case(test_class, method_name, it=NUMBER_OF_RUNS_PER_TEST):
         Returns:
             A tuple of the average time from all iterations and if the test was successfully.
     """
-    if not RUN_TESTS_MULTIPLE_TIMES: it = 1
 
-    measurements = []
-    for i in range(it):
-        res = False
-        try:
-            global total_time
+    measurements, res, _, _ = sample_test_case(test_class, method_name, it)
+    time_avg = detect_outliers_and_calculate_avg(measurements, detection=OUTLIER_DETECTION)
 
-            suite = unittest.TestSuite()
+    return time_avg, res
 
-            if suite is None:
-                raise ValueError("Test-Suite not loaded")
+def run_test_once(test_class, method_name):
+    """
+        Runs a single unit test once.
 
-            output = StringIO()
+        Args:
+            test_class (str): The test class.
+            method_name (str): The method name.
+        Returns:
+            A tuple of if the test was successfully and the total time of the test run in ms.
+    """
 
-            suite.addTest(test_class(method_name))
-            runner = unittest.TextTestRunner(stream=output, verbosity=0)
+    suite = unittest.TestSuite()
 
-            if runner is None:
-                raise ValueError("Test-Runner not created")
+    if suite is None:
+        raise ValueError("Test-Suite not loaded")
 
-            start_total_time = timeit.default_timer()
+    output = StringIO()
 
-            temp_res = runner.run(suite)
+    suite.addTest(test_class(method_name))
+    runner = unittest.TextTestRunner(stream=output, verbosity=0)
 
-            end_total_time = timeit.default_timer()
-            total_time = (end_total_time - start_total_time) * 1000
-            
-            res = temp_res.wasSuccessful()
-        except Exception as e:
-            logger.error(f"Error in executing {method_name}: {e}")
-            continue
+    if runner is None:
+        raise ValueError("Test-Runner not created")
 
-        if RUN_TESTS_MULTIPLE_TIMES:
-            from measure_performance import last_performance_measure_in_ms
-            measurements.append(last_performance_measure_in_ms)
-        else:
-            from measure_performance import last_performance_measure_in_ms_list
-            measurements = last_performance_measure_in_ms_list
-        print_progress_bar(i + 1, it)
+    start_total_time = timeit.default_timer()
 
-    time_avg = detect_outliers_and_calculate_avg(measurements, detection=OUTLIER_DETECTION)
-    print_progress_bar(it, it)
+    temp_res = runner.run(suite)
 
-    return time_avg, res
+    end_total_time = timeit.default_timer()
+
+    return temp_res.wasSuccessful(), (end_total_time - start_total_time) * 1000
+
+def sample_cache_modes(test_class, method_name):
+    """
+        Measures a unit test with a cold DFA cache and records the warm-up curve.
+        Cold: The DFA and prediction context caches get reset before every iteration.
+        Warm-up: The caches get reset once and the latency of every following iteration is recorded. Afterwards the caches are optionally pre-warmed over WARMUP_CORPUS.
+
+        Args:
+            test_class (str): The test class.
+            method_name (str): The method name.
+        Returns:
+            A tuple of the list of cold measurements and the warm-up curve (latency per iteration index).
+    """
+
+    import measure_performance
+
+    cold_measurements = []
+    for _ in range(COLD_RUNS_PER_TEST):
+        reset_dfa_caches()
+        run_test_once(test_class, method_name)
+        cold_measurements.append(measure_performance.last_performance_measure_in_ms)
+
+    reset_dfa_caches()
+    warmup_curve = []
+    for _ in range(WARMUP_RUNS_PER_TEST):
+        run_test_once(test_class, method_name)
+        warmup_curve.append(measure_performance.last_performance_measure_in_ms)
+
+    if WARMUP_CORPUS: warm_up_with_corpus(WARMUP_CORPUS)
+
+    return cold_measurements, warmup_curve
+
+def sample_test_case(test_class, method_name, it=NUMBER_OF_RUNS_PER_TEST, show_progress=True, on_measurement=None):
+    """
+        Runs a single unit test and collects the raw measurements of all iterations.
+
+        Args:
+            test_class (str): The test class.
+            method_name (str): The method name.
+            it (int): The number of iterations, which the test gets executed.
+            show_progress (bool): If the progress bar should be printed (disabled in worker processes).
+            on_measurement (function): Optional callback, which gets called with every new measurement (used to stream samples out of worker processes).
+        Returns:
+            A tuple of the list of measurements, if the test was successfully, the total time of the last iteration and a dict of additional measurements:
+            - "phases": phase -> list of measurements per iteration (empty if the test doesn't use the parse driver)
+            - "atn_profile": the statistics of the profiled decisions (empty if ATN_PROFILING = False)
+            - "rule_profile": the timing statistics per grammar rule (empty if RULE_PROFILING = False)
+            - "cold": list of measurements with cold DFA cache (empty if CACHE_MODE_ANALYSIS = False)
+            - "warmup_curve": list of measurements per iteration after a cache reset (empty if CACHE_MODE_ANALYSIS = False)
+            - "inputs": list of the distinct texts parsed by the parse driver (empty if TWO_STAGE_BENCHMARK = False and LEXER_BENCHMARK = False)
+            - "memory": memory metric -> list with the measurement of one additional run after the timed iterations (empty if MEMORY_ANALYSIS = False)
+            - "profile": the profile of the runs after the timed iterations (see profiling.profile, only if PROFILING = True)
+            - "runs": the amount of calls of the measured callback, which the statistics were collected over (in repeat mode the callback gets called once more)
+        With TEST_HARNESS = "direct" the overhead of an empty test is measured before and subtracted from the measurements and the total time.
+    """
+    if not RUN_TESTS_MULTIPLE_TIMES: it = 1
+    elif ADAPTIVE_SAMPLING: it = ADAPTIVE_MAX_RUNS
+
+    measurements = []
+    details = {"phases": {phase: [] for phase in PHASES}, "cold": [], "warmup_curve": [], "memory": {metric: [] for metric in MEMORY_METRICS}}
+
+    if CACHE_MODE_ANALYSIS and RUN_TESTS_MULTIPLE_TIMES:
+        try:
+            details["cold"], details["warmup_curve"] = sample_cache_modes(test_class, method_name)
+        except Exception as e:
+            logger.error(f"Error in measuring the cache modes of {method_name}: {e}")
+
+    overhead = {"total": 0, "measure": 0}
+    harness = None
+    if TEST_HARNESS == "direct":
+        overhead = measure_overhead(HARNESS_OVERHEAD_RUNS)
+        logger.info(f"ℹ️ Harness overhead before {method_name}: {overhead['total']} ms per call, {overhead['measure']} ms per measurement")
+        harness = DirectHarness(test_class, method_name)
+
+    pop_decision_stats() # decisions profiled, rules timed and inputs parsed before this test don't belong to it
+    pop_rule_stats()
+    pop_recorded_inputs()
+    import measure_performance
+
+    res = False
+    try:
+        with harness or nullcontext(): # the fixtures of the direct harness run once around all iterations
+            for i in range(it):
+                res = False
+                reset_phase_measures()
+                try:
+                    global total_time
+                    res, total_time = harness.run_once() if harness else run_test_once(test_class, method_name)
+                    total_time = max(total_time - overhead["total"], 0)
+                except Exception as e:
+                    logger.error(f"Error in executing {method_name}: {e}")
+                    continue
+
+                from measure_performance import last_performance_measure_in_ms_list
+                phases = sum_phase_measures(1 if RUN_TESTS_MULTIPLE_TIMES else len(last_performance_measure_in_ms_list) + 1) # in repeat mode the callback gets called once more
+                if PHASE_ANALYSIS and phases:
+                    for phase in PHASES: details["phases"][phase].append(phases[phase])
+
+                if RUN_TESTS_MULTIPLE_TIMES:
+                    last_performance_measure_in_ms = max(measure_performance.last_performance_measure_in_ms - overhead["measure"], 0)
+                    measurements.append(last_performance_measure_in_ms)
+                    if on_measurement: on_measurement(last_performance_measure_in_ms)
+                    if ADAPTIVE_SAMPLING and has_converged(measurements):
+                        if show_progress: print_progress_bar(it, it)
+                        break
+                else:
+                    measurements = [max(measurement - overhead["measure"], 0) for measurement in last_performance_measure_in_ms_list]
+                    if on_measurement:
+                        for measurement in measurements: on_measurement(measurement)
+                if show_progress: print_progress_bar(i + 1, it)
+
+            if MEMORY_ANALYSIS:
+                measure_performance.last_memory_measure = None
+                try:
+                    with paused_recording(), memory_measurement(): # one untimed run with tracemalloc, which doesn't belong to the recordings of the test
+                        harness.run_once() if harness else run_test_once(test_class, method_name)
+                except Exception as e:
+                    logger.error(f"Error in measuring the memory of {method_name}: {e}")
+                if measure_performance.last_memory_measure:
+                    for metric in MEMORY_METRICS: details["memory"][metric].append(measure_performance.last_memory_measure[metric])
+
+            if PROFILING:
+                try:
+                    with paused_recording(): # the profiled runs don't belong to the phases, decisions, rules and inputs of the test
+                        details["profile"] = profile(harness.run_once if harness else lambda: run_test_once(test_class, method_name),
+                                                     PROFILING_MODE, PROFILING_ITERATIONS, PROFILING_INTERVAL_MS)
+                except Exception as e:
+                    logger.error(f"Error in profiling {method_name}: {e}")
+    except Exception as e: # setUpClass, setUp, tearDown or tearDownClass of the direct harness (the iterations catch their own errors)
+        logger.error(f"Error in the fixtures of {method_name}: {e}")
+        measurements, res, total_time = [], False, 0
+
+    if show_progress: print_progress_bar(it, it)
+
+    if not any(details["phases"].values()): details["phases"] = {}
+    if not any(details["memory"].values()): details["memory"] = {}
+    details["atn_profile"] = pop_decision_stats()
+    details["rule_profile"] = pop_rule_stats()
+    details["inputs"] = pop_recorded_inputs()
+    details["runs"] = len(measurements) + (0 if RUN_TESTS_MULTIPLE_TIMES or not measurements else 1)
+
+    return measurements, res, total_time, details
 
 def detect_outliers_and_calculate_avg(measurements, detection="high-low"):
     """
@@ -217,6 +492,31 @@ def fullname(o):
         return klass.__qualname__ # avoid outputs like 'builtins.str'
     return module + '.' + klass.__qualname__
 
+def run_ab():
+    """
+        Runs the interleaved A/B benchmark of the snapshot grammar and the current grammar (instead of the normal measurement).
+    """
+
+    import measure_performance
+
+    def run_once(test_class, method_name):
+        measure_performance.last_performance_measure_in_ms = None # tests without measure_performance_in_ms don't leave the value of the previous test
+        measure_performance.last_performance_measure_in_ms_list = []
+        res, _ = run_test_once(test_class, method_name)
+        if not RUN_TESTS_MULTIPLE_TIMES: # repeat mode: median of the repetitions
+            measurements = measure_performance.last_performance_measure_in_ms_list
+            return res, median(measurements) if measurements else None
+        return res, measure_performance.last_performance_measure_in_ms
+
+    old_grammar_path = os.path.join(SNAPSHOTS_FOLDER_NAME, USE_SNAPSHOT, "Grammar.g4")
+    if not os.path.exists(old_grammar_path): raise FileNotFoundError(f'Grammar of snapshot "{USE_SNAPSHOT}" doesn\'t exist.')
+
+    test_methods = get_test_methods()
+    print(f"\n> A/B benchmark of {len(test_methods)} tests ({AB_ROUNDS_PER_TEST} rounds, snapshot {USE_SNAPSHOT} vs. current grammar):")
+    ab_results, failed_tests = run_ab_benchmark(test_methods, old_grammar_path, run_once, AB_ROUNDS_PER_TEST, AB_SEED)
+
+    print_ab_results(AB_HEADER, ab_results, failed_tests)
+
 def run(recreate=False, suffix=""):
     """
         The main loop for the benchmarking framework.
@@ -226,6 +526,17 @@ def run(recreate=False, suffix=""):
             suffix (string): The suffix to append to the filename (specially used when there are multiple benchmarks).
     """
 
+    environment = get_fingerprint()
+    calibration = None
+    if CALIBRATION:
+        calibration = calibrate(CALIBRATION_RUNS, CALIBRATION_ITERATIONS)
+        environment_warnings, speed, noise = [], 1, calibration["noise"]
+        if not recreate: # the recreated snapshot gets measured in the same environment
+            environment_warnings, speed, noise = compare_environments({"environment": environment, "calibration": calibration}, get_metadata(),
+                                                                      CALIBRATION_SPEED_TOLERANCE)
+            print_environment(environment, calibration, environment_warnings, speed)
+        set_calibration(NOISE_TOLERANCE_FACTOR * noise, speed if CALIBRATION_NORMALIZE else 1)
+
     amount_of_tests, sum_avg, not_available_tests_in_snapshot, not_available_tests_in_current, failed_tests, sum_total_parsing_time = measure()
     sum_avg_benchmark_current, sum_avg_benchmark_snapshot, benchmarked_methods = benchmark(results)
 
@@ -239,12 +550,116 @@ def run(recreate=False, suffix=""):
         "list_of_tested_methods": list_of_tested_methods,
         "RUN_TESTS_MULTIPLE_TIMES": RUN_TESTS_MULTIPLE_TIMES,
         "NUMBER_OF_RUNS_PER_TEST": NUMBER_OF_RUNS_PER_TEST,
+        "ADAPTIVE_SAMPLING": ADAPTIVE_SAMPLING,
+        "iterations_per_test": dict(iterations_per_test),
+        "parser_build_key": parser_build_key,
+        "environment": environment,
+        "calibration": calibration,
     }
 
     metadata_collection.append([metadata, sum_avg_benchmark_snapshot])
 
-    if MAKE_SNAPSHOT and not recreate: save_snapshot(SNAPSHOTS_FOLDER_NAME, RESULT_HEADER, results, metadata, name=SNAPSHOT_NAME + suffix)
+    atn_profile = []
+    if ATN_PROFILING:
+        atn_profile = build_profile_report(decision_stats, PARSER_GRAMMAR_PATH)
+        artifacts["atn_profile.csv"] = (PROFILE_HEADER, atn_profile)
+
+    rule_profile = None
+    if RULE_PROFILING:
+        rule_report = build_rule_report(rule_profile_stats, PARSER_GRAMMAR_PATH)
+        snapshot_rule_report = load_artifact("rule_profile.csv")
+        rule_profile = (rule_report, compare_rule_reports(rule_report, snapshot_rule_report[1]) if snapshot_rule_report else None)
+        artifacts["rule_profile.csv"] = (RULE_PROFILE_HEADER, rule_report)
+
+    if warmup_curves: artifacts["warmup_curves.json"] = warmup_curves
+
+    snapshot_parse_benchmark_summary = get_metadata().get("parse_benchmark")
+    if parse_benchmark_results:
+        artifacts["parse_benchmark.csv"] = (PARSE_BENCHMARK_HEADER, parse_benchmark_results)
+        metadata["parse_benchmark"] = dict(parse_benchmark_summary)
+
+    two_stage_results = None
+    if TWO_STAGE_BENCHMARK:
+        inputs = [(name, text) for text, name in parsed_inputs.items()] + (load_inputs(TWO_STAGE_INPUTS) if TWO_STAGE_INPUTS else [])
+        print(f"\n> Two-stage parsing benchmark ({len(inputs)} inputs):")
+        two_stage_results = benchmark_two_stage(inputs, TWO_STAGE_RUNS_PER_INPUT)
+        artifacts["two_stage.csv"] = (TWO_STAGE_HEADER, two_stage_results[0])
+        metadata["two_stage"] = two_stage_results[1]
+
+    lexer_results = None
+    if LEXER_BENCHMARK:
+        inputs = [(name, text) for text, name in parsed_inputs.items()] + (load_inputs(LEXER_BENCHMARK_INPUTS) if LEXER_BENCHMARK_INPUTS else [])
+        print(f"\n> Lexer benchmark ({len(inputs)} inputs):")
+        rows, histogram, summary, samples = benchmark_lexer(inputs, LEXER_BENCHMARK_RUNS_PER_INPUT,
+                                                            lambda name, measurements: check_distribution(name, measurements, LEXER_CLASS_NAME)[:2])
+        for name, measurements in samples.items(): raw_samples[(LEXER_CLASS_NAME, name)] = measurements
+
+        snapshot_histogram = load_artifact("lexer_tokens.csv")
+        lexer_results = (rows, histogram, summary, get_metadata().get("lexer"), snapshot_histogram[1] if snapshot_histogram else None)
+        artifacts["lexer.csv"] = (LEXER_HEADER, rows)
+        artifacts["lexer_tokens.csv"] = (TOKEN_HISTOGRAM_HEADER, histogram)
+        metadata["lexer"] = summary
+
+    streaming_results = None
+    if STREAMING_BENCHMARK:
+        file_paths = get_input_files(STREAMING_INPUTS) if STREAMING_INPUTS else []
+        print(f"\n> Streaming benchmark ({len(file_paths)} inputs):")
+        rows, failed_inputs = benchmark_streaming(file_paths, STREAMING_RUNS_PER_INPUT, STREAMING_CHUNK_SIZE)
+        snapshot_streaming = load_artifact("streaming.csv")
+        streaming_results = (rows, failed_inputs, snapshot_streaming[1] if snapshot_streaming else None)
+        artifacts["streaming.csv"] = (STREAMING_HEADER, rows)
+
+    scaling_results = []
+    if SCALING_ANALYSIS:
+        snapshot_scaling = load_artifact("scaling.csv")
+        print(f"\n> Scaling suite:")
+        scaling_results = run_scaling_suite([test_case[0] for test_case in TEST_CASES], get_sizes(SCALING_MIN_SIZE, SCALING_MAX_SIZE, SCALING_FACTOR),
+                                            SCALING_RUNS_PER_SIZE, snapshot_scaling[1] if snapshot_scaling else None)
+        artifacts["scaling.csv"] = (SCALING_HEADER, scaling_results)
+
+    atn_metrics = None
+    if ATN_METRICS:
+        if ATN_METRICS_SOURCE == "dot":
+            rule_rows, decision_rows = compute_dot_metrics(ATN_ANALYSIS_INPUT_DIRECTORY), []
+        else:
+            _, parser_class = load_grammar()
+            rule_rows, decision_rows = compute_atn_metrics(parser_class.atn, parser_class.ruleNames)
+
+        snapshot_metrics = load_artifact("atn_metrics.csv")
+        atn_metrics = (rule_rows, compare_atn_metrics(rule_rows, snapshot_metrics[1]) if snapshot_metrics else None)
+        artifacts["atn_metrics.csv"] = (RULE_METRICS_HEADER, rule_rows)
+        if decision_rows: artifacts["atn_decisions.csv"] = (DECISION_METRICS_HEADER, decision_rows)
+
+    hotspots = None
+    if profiles:
+        hotspots = get_hotspots(profiles)
+        snapshot_hotspots = load_artifact("profile.csv")
+        hotspots = (hotspots, diff_hotspots(hotspots, snapshot_hotspots[1]) if snapshot_hotspots else None)
+        artifacts["profile.folded"] = get_folded(profiles)
+        artifacts["profile.csv"] = (HOTSPOT_HEADER, hotspots[0])
+        metadata["profiling"] = {"modes": sorted({test_profile["mode"] for test_profile in profiles.values()}), "iterations": PROFILING_ITERATIONS,
+                                 "interval_ms": PROFILING_INTERVAL_MS} # weights in profile.folded: samples ("sampling") or µs ("deterministic")
+
+    history_run_id = None
+    if HISTORY and not recreate:
+        history_run_id = record_run(results, raw_samples, metadata, USE_SNAPSHOT)
+        change_points = find_change_points([(result[5], result[0]) for result in results], HISTORY_CHANGE_POINT_RUNS)
+
+    if MAKE_SNAPSHOT and not recreate: save_snapshot(SNAPSHOTS_FOLDER_NAME, RESULT_HEADER, results, metadata, name=SNAPSHOT_NAME + suffix, samples=raw_samples, artifacts=artifacts)
     if not recreate: print_results(amount_of_tests, results, failed_tests, sum_avg, sum_avg_benchmark_current, sum_avg_benchmark_snapshot, benchmarked_methods, not_available_tests_in_snapshot, not_available_tests_in_current, sum_total_parsing_time)
+    if not recreate and phase_results: print_phase_results(phase_results)
+    if not recreate and atn_profile: print_atn_profile(PROFILE_HEADER, atn_profile)
+    if not recreate and rule_profile: print_rule_profile(RULE_PROFILE_HEADER, RULE_DIFF_HEADER, *rule_profile, RULE_PROFILE_TOP_N)
+    if not recreate and cache_mode_results: print_cache_mode_results(cache_mode_results)
+    if not recreate and two_stage_results: print_two_stage_results(TWO_STAGE_HEADER, *two_stage_results)
+    if not recreate and memory_results: print_memory_results(memory_results)
+    if not recreate and parse_benchmark_results: print_parse_benchmark_results(PARSE_BENCHMARK_HEADER, parse_benchmark_results, parse_benchmark_summary, snapshot_parse_benchmark_summary)
+    if not recreate and lexer_results: print_lexer_results(LEXER_HEADER, TOKEN_HISTOGRAM_HEADER, *lexer_results)
+    if not recreate and streaming_results: print_streaming_results(STREAMING_HEADER, *streaming_results)
+    if not recreate and scaling_results: print_scaling_results(SCALING_HEADER, scaling_results)
+    if not recreate and atn_metrics: print_atn_metrics(RULE_METRICS_HEADER, *atn_metrics)
+    if not recreate and hotspots: print_hotspots(HOTSPOT_HEADER, HOTSPOT_DIFF_HEADER, *hotspots, PROFILING_TOP_N)
+    if history_run_id is not None: print_change_points(CHANGE_POINT_HEADER, change_points, history_run_id)
 
 if __name__ == '__main__':
     logging.basicConfig(filename=SNAPSHOTS_FOLDER_NAME + "/" + LOGGING_FILE_NAME,
@@ -253,23 +668,45 @@ if __name__ == '__main__':
                         datefmt='%H:%M:%S',
                         level=logging.INFO)
 
+    if AB_BENCHMARK:
+        print_title()
+        run_ab()
+        sys.exit(0)
+
     if RECREATE_SNAPSHOT:
         print_recreate_title()
 
         recreate_snapshot(SNAPSHOTS_FOLDER_NAME, USE_SNAPSHOT)
-        subprocess.call(['sh', PARSER_BUILD_SCRIPT_PATH])
+        parser_build_key, cache_hit = build_parser(PARSER_BUILD_SCRIPT_PATH)
+        if cache_hit: print(f"♻️ Restored parser from build cache ({parser_build_key[:12]})")
 
         run(True)
 
-        close_recreate_snapshot(results)
+        close_recreate_snapshot(results, raw_samples, artifacts, metadata_collection[-1][0])
         results = []
         metadata_collection = []
+        iterations_per_test = {}
+        raw_samples = {}
+        phase_results = []
+        decision_stats = {}
+        rule_profile_stats = {}
+        cache_mode_results = []
+        warmup_curves = {}
+        parsed_inputs = {}
+        memory_results = []
+        artifacts = {}
+        parse_benchmark_results = []
+        parse_benchmark_summary = {}
+        profiles = {}
+        parser_build_key = None
     else:
         # not necessary if RECREATE_SNAPSHOT = true, because results are already set in the correct spots
         load_snapshot(SNAPSHOTS_FOLDER_NAME, USE_SNAPSHOT)
 
     print_title()
-    if BUILD_PARSER: subprocess.call(['sh', PARSER_BUILD_SCRIPT_PATH])
+    if BUILD_PARSER:
+        parser_build_key, cache_hit = build_parser(PARSER_BUILD_SCRIPT_PATH)
+        if cache_hit: print(f"♻️ Restored parser from build cache ({parser_build_key[:12]})")
 
     for i in range(NUMBER_OF_BENCHMARKS):
         suffix = "" if i == 0 else str(i)
@@ -279,6 +716,19 @@ if __name__ == '__main__':
         run(suffix = suffix)
 
         results = []
+        iterations_per_test = {}
+        raw_samples = {}
+        phase_results = []
+        decision_stats = {}
+        rule_profile_stats = {}
+        cache_mode_results = []
+        warmup_curves = {}
+        parsed_inputs = {}
+        memory_results = []
+        artifacts = {}
+        parse_benchmark_results = []
+        parse_benchmark_summary = {}
+        profiles = {}
 
     if NUMBER_OF_BENCHMARKS > 1:
         sum_avg_benchmark = []
@@ -0,0 +1,183 @@
+import logging
+import math
+import timeit
+from statistics import median
+
+from config import LOGGER_NAME
+from parse_driver import parse, reset_phase_measures
+
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+GROWTH_CLASSES = ["linear", "n log n", "quadratic"]
+
+GROWTH_FUNCTIONS = {
+    "linear": lambda n: n,
+    "n log n": lambda n: n * math.log(n) if n > 1 else 0,
+    "quadratic": lambda n: n * n,
+}
+
+SCALING_HEADER = ["Test Name", "Test Class", "Sizes", "Times [ms]", "Growth class", "Log-log slope",
+                  "Fit error linear", "Fit error n log n", "Fit error quadratic", "Snapshot growth class", "Change"]
+
+# Prefix of the input generators in the test classes, e.g. def scaling_nested_sums(self, size): return "+".join(["(1"] * size + [")"] * size)
+GENERATOR_PREFIX = "scaling_"
+
+
+def get_sizes(min_size, max_size, factor):
+    """
+        Creates a geometric series of input sizes.
+
+        Args:
+            min_size (int): The first size.
+            max_size (int): The upper bound (included if the series hits it).
+            factor (float): The factor between two sizes (> 1).
+        Returns:
+            A list of sizes.
+    """
+
+    if factor <= 1: raise ValueError("Factor of the geometric series must be greater than 1")
+
+    sizes = []
+    size = min_size
+    while size <= max_size:
+        sizes.append(size)
+        size = max(math.ceil(size * factor), size + 1)
+
+    return sizes
+
+def fit_growth(sizes, times):
+    """
+        Fits the latency curve with every growth function f (t = a + b * f(n), least squares of the relative residuals, so every size counts the same).
+
+        Args:
+            sizes (list): The input sizes.
+            times (list): The measured times per size.
+        Returns:
+            A tuple of the growth class with the smallest error, a dict growth class -> relative RMS error (infinity if the fitted slope is negative)
+            and the slope of the log-log curve (the empirical exponent).
+    """
+
+    errors = {}
+    for growth_class, growth_function in GROWTH_FUNCTIONS.items():
+        # Weighted least squares with weights 1 / t^2
+        weights = [1 / (t * t) if t > 0 else 0 for t in times]
+        xs = [growth_function(n) for n in sizes]
+
+        sw = sum(weights)
+        swx = sum(w * x for w, x in zip(weights, xs))
+        swy = sum(w * y for w, y in zip(weights, times))
+        swxx = sum(w * x * x for w, x in zip(weights, xs))
+        swxy = sum(w * x * y for w, x, y in zip(weights, xs, times))
+
+        determinant = sw * swxx - swx * swx
+        if determinant == 0:
+            errors[growth_class] = math.inf
+            continue
+
+        b = (sw * swxy - swx * swy) / determinant
+        a = (swy - b * swx) / sw
+
+        if b < 0:
+            errors[growth_class] = math.inf
+            continue
+
+        errors[growth_class] = math.sqrt(sum(w * (y - a - b * x) ** 2 for w, x, y in zip(weights, xs, times)) / len(times))
+
+    log_pairs = [(math.log(n), math.log(t)) for n, t in zip(sizes, times) if n > 0 and t > 0]
+    slope = 0
+    if len(log_pairs) > 1:
+        mean_x = sum(x for x, _ in log_pairs) / len(log_pairs)
+        mean_y = sum(y for _, y in log_pairs) / len(log_pairs)
+        variance = sum((x - mean_x) ** 2 for x, _ in log_pairs)
+        if variance: slope = sum((x - mean_x) * (y - mean_y) for x, y in log_pairs) / variance
+
+    growth_class = min(GROWTH_CLASSES, key=lambda c: errors[c]) # ties go to the smaller growth class
+
+    return growth_class, errors, slope
+
+def compare_growth_class(growth_class, snapshot_growth_class):
+    """
+        Compares the growth class with the growth class of the snapshot.
+
+        Args:
+            growth_class (str): The current growth class.
+            snapshot_growth_class (str): The growth class of the snapshot (None if not available).
+        Returns:
+            "worse", "better", "unchanged" or "n/a".
+    """
+
+    if snapshot_growth_class not in GROWTH_CLASSES: return "n/a"
+
+    difference = GROWTH_CLASSES.index(growth_class) - GROWTH_CLASSES.index(snapshot_growth_class)
+    if difference > 0: return "worse"
+    if difference < 0: return "better"
+
+    return "unchanged"
+
+def measure_scaling(test_class, generator_name, sizes, it=5):
+    """
+        Generates an input per size with the generator of the test and measures the parse time with the parse driver.
+
+        Args:
+            test_class (class): The unittest class, which declares the generator.
+            generator_name (str): The name of the generator method (gets the size, returns the input text).
+            sizes (list): The input sizes.
+            it (int): The number of iterations per size (the median is used).
+        Returns:
+            A list of the measured times in ms per size.
+    """
+
+    generator = getattr(test_class(), generator_name)
+
+    times = []
+    for size in sizes:
+        text = generator(size)
+        parse(text) # warm up the DFA cache, so only the growth gets measured
+        times.append(median(timeit.repeat(lambda: parse(text), repeat=it, number=1)) * 1000)
+
+    reset_phase_measures()
+
+    return times
+
+def run_scaling_suite(test_classes, sizes, it=5, snapshot_rows=None):
+    """
+        Runs all input generators of the test classes over the sizes and fits their latency curves.
+
+        Args:
+            test_classes (list): The unittest classes.
+            sizes (list): The input sizes.
+            it (int): The number of iterations per size.
+            snapshot_rows (list): The scaling rows of the snapshot (see SCALING_HEADER), used to compare the growth classes.
+        Returns:
+            A list of rows (see SCALING_HEADER).
+    """
+
+    from print import print_progress_bar
+
+    snapshot_growth_classes = {(row[1], row[0]): row[4] for row in snapshot_rows or []}
+
+    generators = []
+    for test_class in test_classes:
+        class_name = f"{test_class.__module__}.{test_class.__qualname__}"
+        generators += [(test_class, class_name, method) for method in dir(test_class) if method.startswith(GENERATOR_PREFIX)]
+
+    rows = []
+    for i, (test_class, class_name, generator_name) in enumerate(generators):
+        try:
+            times = measure_scaling(test_class, generator_name, sizes, it)
+        except Exception as e:
+            logger.error(f"Error in measuring the scaling of {generator_name}: {e}")
+            continue
+        finally:
+            print_progress_bar(i + 1, len(generators))
+
+        growth_class, errors, slope = fit_growth(sizes, times)
+        snapshot_growth_class = snapshot_growth_classes.get((class_name, generator_name))
+
+        rows.append([generator_name, class_name, " ".join(str(size) for size in sizes), " ".join(str(round(t, 4)) for t in times),
+                     growth_class, round(slope, 2)] + [round(errors[c], 4) for c in GROWTH_CLASSES] +
+                    [snapshot_growth_class or "", compare_growth_class(growth_class, snapshot_growth_class)])
+
+    return rows
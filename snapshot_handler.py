@@ -1,17 +1,39 @@
 import csv
 import json
+import mmap
 import os.path
 import logging
+import random
 import shutil
+import sys
+from array import array
 from datetime import datetime
 
 from config import DIFF_TOL, DECIMALS, USE_SNAPSHOT, PARSER_GRAMMAR_PATH, \
-    TEMP_PARSER_GRAMMAR_PATH
+    TEMP_PARSER_GRAMMAR_PATH, RESULT_HEADER, SIGNIFICANCE_LEVEL, COMPARISON_CONFIDENCE_LEVEL, BOOTSTRAP_RESAMPLES, BOOTSTRAP_SEED, \
+    MIN_RELATIVE_CHANGE, MEMORY_CHANGE_TOLERANCE, PHASE_HEADER, COLD_HEADER
+from stats import mann_whitney_u, cliffs_delta, bootstrap_ratio_of_medians
 
 
 logger = logging.getLogger('Parsing Performance Measurement')
 results = []
+results_index = {}
 metadata = {}
+samples_index = {}
+samples_file_path = None
+samples_file = None
+samples_map = None
+recreated_samples = None
+recreated_artifacts = None
+snapshot_path = None
+
+# Relative tolerance of the difference of the time columns derived from the calibration noise (None: DIFF_TOL is used, see check_difference)
+noise_tolerance = None
+# Relative speed of the current machine to the snapshot machine, the time values of the snapshot get divided by it (1: no normalization)
+speed_factor = 1
+
+# Columns of the snapshot, which contain times (affected by the noise tolerance and the speed normalization)
+TIME_COLUMNS = {RESULT_HEADER.index(header) for header in ["Avg. Parsing Time [ms]", "Total parsing time [ms]"] + PHASE_HEADER + [COLD_HEADER]}
 
 
 def load_snapshot(path, name):
@@ -37,10 +59,17 @@ def load_snapshot(path, name):
         for row in snapshot_reader:
             results.append(row)
 
+    build_results_index(results)
+
     with open(metadata_path, newline='') as jsonfile:
         global metadata
         metadata = json.load(jsonfile)
 
+    global snapshot_path
+    snapshot_path = path
+
+    load_samples_index(path)
+
 def recreate_snapshot(path, name):
     """
         Recreates the snapshot.
@@ -61,12 +90,15 @@ def recreate_snapshot(path, name):
     shutil.copyfile(new_grammar_path, temp_grammar_path)
     shutil.copyfile(old_grammar_path, new_grammar_path)
 
-def close_recreate_snapshot(new_results):
+def close_recreate_snapshot(new_results, new_samples=None, new_artifacts=None, new_metadata=None):
     """
         Resolves the snapshot by copying the temp back to origin.
 
         Args:
             new_results (list): The results of the snapshot.
+            new_samples (dict): The raw samples of the snapshot ((class name, method name) to list of measurements).
+            new_artifacts (dict): The additional files of the snapshot (see save_artifacts).
+            new_metadata (dict): The metadata of the snapshot (e.g. environment and calibration).
     """
 
     new_grammar_path = PARSER_GRAMMAR_PATH
@@ -77,10 +109,15 @@ def close_recreate_snapshot(new_results):
     # Because of backup reasons, the temp file gets not deleted. If this is not necessary uncomment the following line.
     # os.remove(temp_grammar_path)
 
-    global results
+    global results, recreated_samples, recreated_artifacts, metadata
     results = new_results
+    recreated_samples = new_samples
+    recreated_artifacts = new_artifacts or {}
+    metadata = new_metadata or {}
+
+    build_results_index(results)
 
-def save_snapshot(path, header, data, metadata, name=""):
+def save_snapshot(path, header, data, metadata, name="", samples=None, artifacts=None):
     """
         Saves the results and metadata of a snapshot.
         The snapshot gets saved as "snapshot-[CURRENT_TIMESTAMP]".
@@ -92,6 +129,8 @@ def save_snapshot(path, header, data, metadata, name=""):
             data (list): The results of the snapshot.
             metadata (dict): The metadata of the snapshot.
             name (str): The name of the snapshot.
+            samples (dict): The raw samples of all iterations ((class name, method name) to list of measurements).
+            artifacts (dict): Additional files of the snapshot (see save_artifacts).
     """
 
     current_path = os.path.abspath(os.curdir)
@@ -115,8 +154,157 @@ def save_snapshot(path, header, data, metadata, name=""):
 
     shutil.copyfile(PARSER_GRAMMAR_PATH, grammar_path)
 
+    if samples is not None: save_samples(path, samples)
+    if artifacts: save_artifacts(path, artifacts)
+
     print(f"📥 Measurement saved as {name}")
 
+def save_artifacts(path, artifacts):
+    """
+        Saves additional files of a snapshot (e.g. reports of the analysis modes).
+
+        Args:
+            path (str): The path to the snapshot folder.
+            artifacts (dict): File name to content. Content of .csv files is a tuple (header, rows), content of .folded files is the text,
+                content of .json files is a json serializable object.
+    """
+
+    for file_name, content in artifacts.items():
+        artifact_path = os.path.join(path, file_name)
+
+        if file_name.endswith('.csv'):
+            header, rows = content
+            with open(artifact_path, mode='w', newline='') as csvfile:
+                artifact_writer = csv.writer(csvfile)
+                artifact_writer.writerow(header)
+                artifact_writer.writerows(rows)
+        elif file_name.endswith('.folded'):
+            with open(artifact_path, mode='w') as textfile:
+                textfile.write(content)
+        else:
+            with open(artifact_path, mode='w', newline='') as jsonfile:
+                json.dump(content, jsonfile)
+
+def load_artifact(file_name):
+    """
+        Loads an additional file of the snapshot.
+
+        Args:
+            file_name (str): The file name of the artifact.
+        Returns:
+            For .csv files a tuple (header, rows), for .folded files the text, for .json files the object. None, if the snapshot has no such file.
+    """
+
+    if recreated_artifacts is not None:
+        return recreated_artifacts.get(file_name)
+
+    if snapshot_path is None: return None
+
+    artifact_path = os.path.join(snapshot_path, file_name)
+    if not os.path.exists(artifact_path): return None
+
+    if file_name.endswith('.csv'):
+        with open(artifact_path, newline='') as csvfile:
+            rows = list(csv.reader(csvfile))
+        return (rows[0], rows[1:]) if rows else None
+
+    if file_name.endswith('.folded'):
+        with open(artifact_path) as textfile:
+            return textfile.read()
+
+    with open(artifact_path, newline='') as jsonfile:
+        return json.load(jsonfile)
+
+def save_samples(path, samples):
+    """
+        Saves the raw samples of a snapshot as one binary array of 64-bit floats (samples.bin) and an index (samples_index.json).
+        The index maps (class name, method name) to the offset and the amount of samples in the array.
+
+        Args:
+            path (str): The path to the snapshot folder.
+            samples (dict): (class name, method name) to list of measurements.
+    """
+
+    index = []
+    offset = 0
+
+    with open(os.path.join(path, 'samples.bin'), mode='wb') as binfile:
+        for (class_name, method_name), measurements in samples.items():
+            array('d', measurements).tofile(binfile)
+            index.append([class_name, method_name, offset, len(measurements)])
+            offset += len(measurements)
+
+    with open(os.path.join(path, 'samples_index.json'), mode='w', newline='') as jsonfile:
+        json.dump({"format": "d", "byteorder": sys.byteorder, "tests": index}, jsonfile)
+
+def load_samples_index(path):
+    """
+        Loads the index of the raw samples of a snapshot. The sample file itself gets memory mapped at the first access.
+        Old snapshots without raw samples have an empty index.
+
+        Args:
+            path (str): The path to the snapshot folder.
+    """
+
+    global samples_index, samples_file_path, samples_file, samples_map
+    index_path = os.path.join(path, 'samples_index.json')
+
+    # a previously mapped file is not closed explicitly, because returned samples can still reference it
+    samples_index, samples_file_path, samples_file, samples_map = {}, None, None, None
+
+    if not os.path.exists(index_path):
+        logger.info(f"Snapshot {path} has no raw samples.")
+        return
+
+    with open(index_path, newline='') as jsonfile:
+        index = json.load(jsonfile)
+
+    if index["format"] != "d" or index["byteorder"] != sys.byteorder:
+        logger.warning(f"Raw samples of snapshot {path} have an unsupported format ({index['format']}, {index['byteorder']}).")
+        return
+
+    samples_index = {(class_name, method_name): (offset, count) for class_name, method_name, offset, count in index["tests"]}
+    samples_file_path = os.path.join(path, 'samples.bin')
+
+def get_samples(method_name, class_name):
+    """
+        Gets the raw samples of a method in the snapshot. The sample file gets memory mapped lazily, so only the accessed pages get read.
+
+        Args:
+            method_name (str): The name of the method to search for.
+            class_name (str): The name of the class to search for (used because their can be same methods in different classes).
+        Returns:
+            A sequence of measurements (a memoryview on the mapped file) or None, if the snapshot has no samples of this method.
+    """
+
+    if recreated_samples is not None:
+        return recreated_samples.get((class_name, method_name))
+
+    if (class_name, method_name) not in samples_index: return None
+
+    offset, count = samples_index[(class_name, method_name)]
+    if count == 0: return []
+
+    global samples_file, samples_map
+    if samples_map is None:
+        samples_file = open(samples_file_path, mode='rb')
+        samples_map = mmap.mmap(samples_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    item_size = array('d').itemsize
+    return memoryview(samples_map)[offset * item_size:(offset + count) * item_size].cast('d')
+
+def build_results_index(rows):
+    """
+        Builds the index (class name, method name) -> result row of the snapshot, so lookups don't scan the results.
+        The header row of the csv file is skipped.
+
+        Args:
+            rows (list): The result rows of the snapshot.
+    """
+
+    global results_index
+    results_index = {(row[5], row[0]): row for row in rows if len(row) > 5 and not (row[0] == RESULT_HEADER[0] and row[5] == RESULT_HEADER[5])}
+
 def get_result(method_name, class_name):
     """
         Searches a subarray of the results with a given methodname (first row of the snapshot).
@@ -128,7 +316,7 @@ def get_result(method_name, class_name):
             ValueError: If the method is not found.
     """
 
-    result = next((tupel for tupel in results if (tupel[0] == method_name and tupel[5] == class_name)), None)
+    result = results_index.get((class_name, method_name))
 
     if result is None:
         raise ValueError("Method name with the given class name not available")
@@ -146,12 +334,9 @@ def method_exists(method_name, class_name):
             True, if the method exists.
     """
 
-    method_exists = False
+    method_exists = (class_name, method_name) in results_index
 
-    try:
-        get_result(method_name, class_name)
-        method_exists = True
-    except ValueError:
+    if not method_exists:
         logger.info(f"Method name {method_name} with class name {class_name} does not exist in snapshot {USE_SNAPSHOT}")
 
     return method_exists
@@ -166,16 +351,9 @@ def get_all_methods_that_not_exist(current_results):
             A list of all methods that do not exist in current results but exist in snapshot.
     """
 
-    methods = []
-
-    for result in results:
-        exist = False
-        for current_result in current_results:
-            if current_result[0] == result[0] and current_result[5] == result[5]: exist = True
+    current_methods = {(current_result[5], current_result[0]) for current_result in current_results}
 
-        if not exist: methods.append([result[5], result[0]])
-
-    return methods
+    return [[class_name, method_name] for class_name, method_name in results_index if (class_name, method_name) not in current_methods]
 
 def benchmark(current_results):
     """
@@ -191,20 +369,56 @@ def benchmark(current_results):
     sum_avg_benchmark_snapshot = 0
 
     for result in current_results:
-        if method_exists(result[0], result[5]):
-            sum_avg_benchmark_current += result[1]
+        snap_result = results_index.get((result[5], result[0]))
 
-            snap_result = get_result(result[0], result[5])
-            sum_avg_benchmark_snapshot += float(snap_result[1])
+        if snap_result is not None:
+            sum_avg_benchmark_current += result[1]
+            sum_avg_benchmark_snapshot += normalize(float(snap_result[1]), 1)
 
             benchmarked_methods.append([result[5], result[0]])
 
     return sum_avg_benchmark_current, sum_avg_benchmark_snapshot, benchmarked_methods
 
+def get_metadata():
+    """
+        Gets the metadata of the snapshot.
+
+        Returns:
+            The metadata dict (empty if no snapshot is loaded).
+    """
+
+    return metadata
+
+def set_calibration(tolerance, speed=1):
+    """
+        Sets the tolerance and the speed normalization of the time comparisons (derived from the calibration, see environment.calibrate).
+
+        Args:
+            tolerance (float): Relative tolerance of the time columns (None: DIFF_TOL is used).
+            speed (float): Relative speed of the current machine to the snapshot machine (1: no normalization).
+    """
+
+    global noise_tolerance, speed_factor
+    noise_tolerance = tolerance
+    speed_factor = speed
+
+def normalize(value, column):
+    """
+        Normalizes a time value of the snapshot to the speed of the current machine.
+
+        Args:
+            value (float): The value of the snapshot.
+            column (int): The column of the value.
+        Returns:
+            The normalized value (unchanged if the column isn't a time column).
+    """
+
+    return value / speed_factor if column in TIME_COLUMNS and speed_factor else value
+
 """
 Queries
 """
-def check_difference(method_name, new_value, class_name):
+def check_difference(method_name, new_value, class_name, column=1):
     """
         Calculates the difference between current value of snapshot and new value.
 
@@ -212,19 +426,24 @@ def check_difference(method_name, new_value, class_name):
             method_name (str): The name of the method to search for.
             new_value (float): The new value.
             class_name (str): The name of the class to search for (used because their can be same methods in different classes).
+            column (int): The column of the snapshot, which gets compared (default: avg. parsing time).
+        A difference of a time column within the tolerance (noise tolerance relative to the snapshot value or DIFF_TOL) is set to 0.
     """
 
     value = 0
     try:
-        value = float(get_result(method_name, class_name)[1])
-    except ValueError:
+        value = normalize(float(get_result(method_name, class_name)[column]), column)
+    except (ValueError, IndexError):
         logger.info(f"ℹ️ Method name {method_name} in snapshot not available. Difference is set to 0.")
 
     diff = new_value - value
 
+    if column in TIME_COLUMNS and noise_tolerance is not None:
+        return 0 if abs(diff) < noise_tolerance * value else round(diff, DECIMALS)
+
     return 0 if (abs(diff) < DIFF_TOL and value > 1) else round(diff, DECIMALS)
 
-def check_percent(method_name, new_value, class_name):
+def check_percent(method_name, new_value, class_name, column=1):
     """
         Calculates the percent difference between current value of snapshot and new value.
 
@@ -232,12 +451,83 @@ def check_percent(method_name, new_value, class_name):
             method_name (str): The name of the method to search for.
             new_value (float): The new value.
             class_name (str): The name of the class to search for (used because their can be same methods in different classes).
+            column (int): The column of the snapshot, which gets compared (default: avg. parsing time).
     """
 
     value = 0
     try:
-        value = float(get_result(method_name, class_name)[1])
-    except ValueError:
+        value = float(get_result(method_name, class_name)[column])
+    except (ValueError, IndexError):
         logger.info(f"ℹ️ Method name {method_name} and class name {class_name} in snapshot not available. Percent is set to 100.")
 
+    value = normalize(value, column)
+
     return round(100 / value * new_value, DECIMALS) if value != 0 else 100
+
+def check_relative_change(method_name, new_value, class_name, column):
+    """
+        Classifies the change of a deterministic value (e.g. memory metrics) to the snapshot by its relative change.
+
+        Args:
+            method_name (str): The name of the method to search for.
+            new_value (float): The new value.
+            class_name (str): The name of the class to search for (used because their can be same methods in different classes).
+            column (int): The column of the snapshot, which gets compared.
+        Returns:
+            "larger" or "smaller", if the value differs at least MEMORY_CHANGE_TOLERANCE relative to the snapshot, else "unchanged" ("n/a" if the snapshot has no value).
+    """
+
+    try:
+        value = float(get_result(method_name, class_name)[column])
+    except (ValueError, IndexError):
+        logger.info(f"ℹ️ Column {column} of method name {method_name} and class name {class_name} in snapshot not available. Change is set to n/a.")
+        return "n/a"
+
+    if value == 0: return "unchanged" if new_value == 0 else "larger"
+
+    relative_change = new_value / value - 1
+    if relative_change >= MEMORY_CHANGE_TOLERANCE: return "larger"
+    if relative_change <= -MEMORY_CHANGE_TOLERANCE: return "smaller"
+
+    return "unchanged"
+
+def check_distribution(method_name, measurements, class_name):
+    """
+        Compares the raw samples of the current measurement with the raw samples of the snapshot.
+        The change is classified by a bootstrap confidence interval of the ratio of medians (current / snapshot) and a Mann-Whitney U test:
+        A test is "slower" or "faster", if the test is significant, the interval doesn't contain 1 and the ratio differs at least MIN_RELATIVE_CHANGE
+        from 1. The samples of the snapshot are normalized to the speed of the current machine (see set_calibration).
+
+        Args:
+            method_name (str): The name of the method to search for.
+            measurements (list): The raw samples of the current measurement.
+            class_name (str): The name of the class to search for (used because their can be same methods in different classes).
+        Returns:
+            A list of the change ("faster", "slower", "unchanged" or "n/a"), the ratio of medians, its confidence interval, the p-value and the effect size (Cliff's delta).
+    """
+
+    snapshot_measurements = get_samples(method_name, class_name)
+
+    if snapshot_measurements is None or len(snapshot_measurements) < 2 or len(measurements) < 2:
+        logger.info(f"ℹ️ Raw samples of method name {method_name} and class name {class_name} not available. Change is set to n/a.")
+        return ["n/a", "", "", "", ""]
+
+    snapshot_measurements = [normalize(measurement, 1) for measurement in snapshot_measurements]
+
+    try:
+        ratio, lower, upper = bootstrap_ratio_of_medians(measurements, snapshot_measurements, BOOTSTRAP_RESAMPLES,
+                                                         COMPARISON_CONFIDENCE_LEVEL, random.Random(BOOTSTRAP_SEED))
+    except ValueError:
+        logger.info(f"ℹ️ Median of method name {method_name} and class name {class_name} in snapshot is 0. Change is set to n/a.")
+        return ["n/a", "", "", "", ""]
+
+    _, p_value = mann_whitney_u(measurements, snapshot_measurements)
+    effect_size = cliffs_delta(measurements, snapshot_measurements)
+
+    change = "unchanged"
+    if p_value < SIGNIFICANCE_LEVEL and abs(ratio - 1) >= MIN_RELATIVE_CHANGE:
+        if lower > 1: change = "slower"
+        if upper < 1: change = "faster"
+
+    return [change, round(ratio, DECIMALS + 2), f"[{round(lower, DECIMALS + 2)}, {round(upper, DECIMALS + 2)}]",
+            round(p_value, DECIMALS + 2), round(effect_size, DECIMALS)]
@@ -0,0 +1,197 @@
+import math
+import random
+from statistics import NormalDist, mean, median, stdev
+
+
+def z_value(confidence):
+    """
+        Calculates the two-sided critical value of the standard normal distribution.
+
+        Args:
+            confidence (float): The confidence level (e.g. 0.95).
+        Returns:
+            The critical value (e.g. 1.96 for 0.95).
+    """
+
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+def confidence_interval(data, statistic="median", confidence=0.95):
+    """
+        Calculates the confidence interval of the mean or the median of the given data.
+        The interval of the mean uses the normal approximation, the interval of the median is distribution-free (order statistics).
+
+        Args:
+            data (list): A list of measurements.
+            statistic (str): "mean" or "median".
+            confidence (float): The confidence level.
+        Returns:
+            A tuple of the statistic, the lower and the upper border of the interval.
+    """
+
+    n = len(data)
+    if n == 0: raise ValueError("Confidence interval of empty data")
+    if n == 1: return data[0], data[0], data[0]
+
+    z = z_value(confidence)
+
+    if statistic == "mean":
+        center = mean(data)
+        half_width = z * stdev(data) / math.sqrt(n)
+        return center, center - half_width, center + half_width
+
+    if statistic == "median":
+        ordered = sorted(data)
+        lower_rank = max(math.floor(n / 2 - z * math.sqrt(n) / 2), 1)
+        upper_rank = min(math.ceil(n / 2 + z * math.sqrt(n) / 2) + 1, n)
+        return median(ordered), ordered[lower_rank - 1], ordered[upper_rank - 1]
+
+    raise ValueError(f"Unknown statistic {statistic}")
+
+def relative_confidence_interval_width(data, statistic="median", confidence=0.95):
+    """
+        Calculates the width of the confidence interval relative to the statistic.
+
+        Args:
+            data (list): A list of measurements.
+            statistic (str): "mean" or "median".
+            confidence (float): The confidence level.
+        Returns:
+            (upper - lower) / statistic. 0 if the interval is empty, infinity if the statistic is 0.
+    """
+
+    center, lower, upper = confidence_interval(data, statistic, confidence)
+    width = upper - lower
+
+    if width == 0: return 0
+    if center == 0: return math.inf
+
+    return width / abs(center)
+
+def rank(data):
+    """
+        Ranks the data (1-based). Ties get the average rank.
+
+        Args:
+            data (list): A list of values.
+        Returns:
+            A tuple of the list of ranks (same order as data) and the sum of t^3 - t over all groups of t tied values.
+    """
+
+    order = sorted(range(len(data)), key=lambda i: data[i])
+    ranks = [0] * len(data)
+    tie_correction = 0
+
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and data[order[j + 1]] == data[order[i]]: j += 1
+
+        average_rank = (i + j) / 2 + 1
+        for k in range(i, j + 1): ranks[order[k]] = average_rank
+
+        ties = j - i + 1
+        tie_correction += ties ** 3 - ties
+        i = j + 1
+
+    return ranks, tie_correction
+
+def mann_whitney_u(a, b):
+    """
+        Nonparametric test, whether the values of a tend to be larger or smaller than the values of b (two-sided, normal approximation with tie correction).
+
+        Args:
+            a (list): The first sample.
+            b (list): The second sample.
+        Returns:
+            A tuple of the U statistic of a and the p-value.
+    """
+
+    n1, n2 = len(a), len(b)
+    ranks, tie_correction = rank(list(a) + list(b))
+
+    u = sum(ranks[:n1]) - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_correction / (n * (n - 1))))
+
+    if sigma == 0: return u, 1.0
+
+    z = (abs(u - n1 * n2 / 2) - 0.5) / sigma # with continuity correction
+    p = 2 * (1 - NormalDist().cdf(max(z, 0)))
+
+    return u, min(p, 1.0)
+
+def wilcoxon_signed_rank(differences):
+    """
+        Nonparametric test, whether paired differences are symmetric around 0 (two-sided, normal approximation with tie correction, zero differences are dropped).
+
+        Args:
+            differences (list): The paired differences (e.g. new - old per pair).
+        Returns:
+            A tuple of the W+ statistic (sum of the ranks of the positive differences) and the p-value.
+    """
+
+    differences = [d for d in differences if d != 0]
+    n = len(differences)
+    if n == 0: return 0, 1.0
+
+    ranks, tie_correction = rank([abs(d) for d in differences])
+
+    w_plus = sum(r for r, d in zip(ranks, differences) if d > 0)
+    sigma = math.sqrt(n * (n + 1) * (2 * n + 1) / 24 - tie_correction / 48)
+
+    if sigma == 0: return w_plus, 1.0
+
+    z = (abs(w_plus - n * (n + 1) / 4) - 0.5) / sigma # with continuity correction
+    p = 2 * (1 - NormalDist().cdf(max(z, 0)))
+
+    return w_plus, min(p, 1.0)
+
+def cliffs_delta(a, b):
+    """
+        Calculates Cliff's delta effect size: P(a > b) - P(a < b).
+
+        Args:
+            a (list): The first sample.
+            b (list): The second sample.
+        Returns:
+            The effect size between -1 (all values of a are smaller) and 1 (all values of a are larger).
+    """
+
+    u, _ = mann_whitney_u(a, b)
+
+    return 2 * u / (len(a) * len(b)) - 1
+
+def bootstrap_ratio_of_medians(a, b, resamples=1000, confidence=0.95, rng=None):
+    """
+        Calculates the ratio of the medians median(a) / median(b) with a percentile bootstrap confidence interval.
+
+        Args:
+            a (list): The first sample (numerator).
+            b (list): The second sample (denominator).
+            resamples (int): The amount of bootstrap resamples.
+            confidence (float): The confidence level.
+            rng (random.Random): The random generator (for reproducible intervals).
+        Returns:
+            A tuple of the ratio, the lower and the upper border of the interval.
+    """
+
+    rng = rng or random.Random()
+
+    median_b = median(b)
+    if median_b == 0: raise ValueError("Ratio of medians with median 0")
+
+    ratios = []
+    for _ in range(resamples):
+        resampled_median_b = median(rng.choices(b, k=len(b)))
+        if resampled_median_b == 0: continue
+        ratios.append(median(rng.choices(a, k=len(a))) / resampled_median_b)
+
+    ratio = median(a) / median_b
+    if not ratios: return ratio, ratio, ratio
+
+    ratios.sort()
+    alpha = (1 - confidence) / 2
+    lower = ratios[int(alpha * (len(ratios) - 1))]
+    upper = ratios[math.ceil((1 - alpha) * (len(ratios) - 1))]
+
+    return ratio, lower, upper
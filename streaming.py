@@ -0,0 +1,315 @@
+import argparse
+import gc
+import importlib
+import json
+import logging
+import mmap
+import os
+import resource
+import subprocess
+import sys
+import timeit
+from statistics import median
+
+from antlr4 import CommonTokenStream, InputStream, ParseTreeListener
+from antlr4.tree.Tree import ErrorNode, TerminalNode
+from antlr4.CommonTokenFactory import CommonTokenFactory
+
+from unbuffered import UnbufferedCharStream, UnbufferedTokenStream
+
+# config isn't imported at module level, so the subprocess (see measure_in_subprocess) only imports the runtime and the generated parser
+
+STREAMING_HEADER = ["Input", "Size [MiB]", "Mode", "Median [ms]", "MiB/s", "Peak RSS [MiB]", "RSS growth [MiB]", "Time ratio", "RSS growth ratio", "Tokens", "Rules"]
+
+# Parse paths: "buffered" (InputStream + CommonTokenStream + parse tree, walked by the listener like diagnostic.py)
+# and "streaming" (memory-mapped file + unbuffered streams, no parse tree, listener attached to the parser)
+MODES = ["buffered", "streaming"]
+
+
+class CountingListener(ParseTreeListener):
+    """
+        Listener, which does the work of the benchmark: it counts the rules and the tokens (the depth is tracked, so it can't be skipped).
+    """
+
+    def __init__(self):
+        self.rules = 0
+        self.tokens = 0
+        self.depth = 0
+        self.max_depth = 0
+
+    def enterEveryRule(self, ctx):
+        self.rules += 1
+        self.depth += 1
+        if self.depth > self.max_depth: self.max_depth = self.depth
+
+    def exitEveryRule(self, ctx):
+        self.depth -= 1
+
+    def visitTerminal(self, node):
+        self.tokens += 1
+
+def open_data(file_path):
+    """
+        Memory-maps a file (read only).
+
+        Args:
+            file_path (str): The path of the file.
+        Returns:
+            The mmap or b"" for an empty file (empty files can't be mapped).
+    """
+
+    with open(file_path, "rb") as input_file:
+        if os.fstat(input_file.fileno()).st_size == 0: return b""
+        return mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+def parse_streaming(file_path, lexer_class, parser_class, start_rule, listener, chunk_size=65536):
+    """
+        Parses a file from a memory-mapped file through the unbuffered char and token streams, without parse tree construction.
+        The listener gets attached to the parser (enter/exit rule and terminal events while parsing).
+
+        Args:
+            file_path (str): The input file.
+            lexer_class (class): The generated lexer class.
+            parser_class (class): The generated parser class.
+            start_rule (str): The start rule.
+            listener (ParseTreeListener): The listener, which does the work.
+            chunk_size (int): The amount of bytes, which get decoded at once.
+    """
+
+    data = open_data(file_path)
+    try:
+        lexer = lexer_class(UnbufferedCharStream(data, chunk_size, name=file_path))
+        lexer._factory = CommonTokenFactory(copyText=True) # the char stream forgets the text of consumed tokens
+        parser = parser_class(UnbufferedTokenStream(lexer))
+        parser.buildParseTrees = False
+        parser.addParseListener(listener)
+        getattr(parser, start_rule)()
+    finally:
+        if isinstance(data, mmap.mmap): data.close()
+
+def walk(listener, tree):
+    """
+        Walks a parse tree like ParseTreeWalker, but without recursion (the trees of big documents are deeper than the recursion limit).
+
+        Args:
+            listener (ParseTreeListener): The listener.
+            tree (ParseTree): The parse tree.
+    """
+
+    stack = [(tree, False)]
+    while stack:
+        node, exiting = stack.pop()
+
+        if isinstance(node, ErrorNode):
+            listener.visitErrorNode(node)
+        elif isinstance(node, TerminalNode):
+            listener.visitTerminal(node)
+        elif exiting:
+            node.exitRule(listener)
+            listener.exitEveryRule(node)
+        else:
+            listener.enterEveryRule(node)
+            node.enterRule(listener)
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node.children or []))
+
+def parse_buffered(file_path, lexer_class, parser_class, start_rule, listener):
+    """
+        Parses a file like diagnostic.py: the whole text in an InputStream, all tokens in a CommonTokenStream and the whole parse tree,
+        which gets walked by the listener afterwards (see walk).
+
+        Args:
+            file_path (str): The input file.
+            lexer_class (class): The generated lexer class.
+            parser_class (class): The generated parser class.
+            start_rule (str): The start rule.
+            listener (ParseTreeListener): The listener, which does the work.
+    """
+
+    with open(file_path, encoding="utf-8") as input_file:
+        text = input_file.read()
+
+    parser = parser_class(CommonTokenStream(lexer_class(InputStream(text))))
+    tree = getattr(parser, start_rule)()
+    walk(listener, tree)
+
+def read_proc_status(key):
+    """
+        Reads a memory value of this process from /proc/self/status (linux only).
+
+        Args:
+            key (str): The key, e.g. "VmRSS" (current RSS) or "VmHWM" (peak RSS).
+        Returns:
+            The value in KiB or None, if it isn't available.
+    """
+
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith(key + ":"): return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+
+    return None
+
+def reset_peak_rss():
+    """
+        Resets the peak RSS of this process to the current RSS (linux only), so the peak of the imports (e.g. the ATN deserialization) isn't counted.
+
+        Returns:
+            If the peak was reset.
+    """
+
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+def get_rss_in_kib():
+    return read_proc_status("VmRSS") or get_peak_rss_in_kib()
+
+def get_peak_rss_in_kib():
+    peak = read_proc_status("VmHWM")
+    if peak is not None: return peak
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak # bytes on macOS, KiB on linux
+
+def measure_mode(mode, file_path, package, lexer_name, parser_name, start_rule, runs, chunk_size):
+    """
+        Measures a parse path in this process (entry point of the subprocess, see measure_in_subprocess).
+        The RSS before the first parse is taken after the grammar is imported and the peak RSS gets reset (if possible), so the growth is the memory of the parse itself.
+
+        Args:
+            mode (str): "buffered" or "streaming".
+            file_path (str): The input file.
+            package (str): The package of the generated parser.
+            lexer_name (str): The name of the lexer module and class.
+            parser_name (str): The name of the parser module and class.
+            start_rule (str): The start rule.
+            runs (int): The amount of parses (the first one fills the DFA cache).
+            chunk_size (int): The amount of bytes, which get decoded at once (streaming only).
+        Returns:
+            A dict of the measurements in ms, the RSS before the first parse, the peak RSS in KiB, if the peak was reset after the imports and the counts of the listener.
+    """
+
+    lexer_class = getattr(importlib.import_module(f"{package}.{lexer_name}"), lexer_name)
+    parser_class = getattr(importlib.import_module(f"{package}.{parser_name}"), parser_name)
+
+    gc.collect()
+    peak_reset = reset_peak_rss()
+    rss_before = get_rss_in_kib()
+
+    measurements = []
+    listener = None
+    for _ in range(runs):
+        listener = CountingListener()
+
+        gcold = gc.isenabled()
+        gc.disable()
+        t0 = timeit.default_timer()
+        if mode == "streaming":
+            parse_streaming(file_path, lexer_class, parser_class, start_rule, listener, chunk_size)
+        else:
+            parse_buffered(file_path, lexer_class, parser_class, start_rule, listener)
+        t1 = timeit.default_timer()
+        if gcold: gc.enable()
+
+        measurements.append((t1 - t0) * 1000)
+        gc.collect()
+
+    return {"measurements": measurements, "rss_before_kib": rss_before, "peak_rss_kib": get_peak_rss_in_kib(), "peak_reset": peak_reset,
+            "tokens": listener.tokens if listener else 0, "rules": listener.rules if listener else 0}
+
+def measure_in_subprocess(mode, file_path, runs, chunk_size):
+    """
+        Measures a parse path in a fresh interpreter, so the peak RSS belongs to this path and this input only.
+        The interpreter gets the sys.path of this process, so it finds the same generated parser.
+
+        Args:
+            mode (str): "buffered" or "streaming".
+            file_path (str): The input file.
+            runs (int): The amount of parses.
+            chunk_size (int): The amount of bytes, which get decoded at once (streaming only).
+        Returns:
+            The dict of measure_mode.
+        Error:
+            RuntimeError: If the subprocess failed.
+    """
+
+    from config import PARSER_PACKAGE, LEXER_NAME, PARSER_NAME, PARSER_START_RULE
+    from parse_driver import active_package
+
+    command = [sys.executable, os.path.abspath(__file__), mode, file_path, "--package", active_package or PARSER_PACKAGE, "--lexer", LEXER_NAME,
+               "--parser", PARSER_NAME, "--start-rule", PARSER_START_RULE, "--runs", str(runs), "--chunk-size", str(chunk_size)]
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(path or os.getcwd() for path in sys.path))
+
+    output = subprocess.run(command, capture_output=True, text=True, env=environment)
+    if output.returncode != 0:
+        raise RuntimeError(f"{mode} parse of {file_path} failed (exit code {output.returncode}): {(output.stderr.strip().splitlines() or [''])[-1]}")
+
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def benchmark_streaming(file_paths, runs=3, chunk_size=65536):
+    """
+        Streaming benchmark: every input file gets parsed with the buffered and the streaming path (see MODES), each in a fresh interpreter.
+        Reports the median latency and the peak RSS of both paths, so the memory per worker can be sized for big documents.
+
+        Args:
+            file_paths (list): The input files.
+            runs (int): The amount of parses per input and path.
+            chunk_size (int): The amount of bytes, which get decoded at once.
+        Returns:
+            A tuple of the rows (see STREAMING_HEADER, ratios: streaming / buffered) and a list of the failed inputs.
+    """
+
+    from config import LOGGER_NAME
+    from print import print_progress_bar
+
+    logger = logging.getLogger(LOGGER_NAME)
+
+    rows = []
+    failed_inputs = []
+    for i, file_path in enumerate(file_paths):
+        size_in_mib = os.path.getsize(file_path) / 2 ** 20
+
+        try:
+            measured = {mode: measure_in_subprocess(mode, file_path, runs, chunk_size) for mode in MODES}
+        except (RuntimeError, ValueError) as e:
+            logger.error(f"Error in the streaming benchmark of {file_path}: {e}")
+            failed_inputs.append(file_path)
+            continue
+        finally:
+            print_progress_bar(i + 1, len(file_paths))
+
+        buffered = measured["buffered"]
+        for mode in MODES:
+            if not measured[mode]["peak_reset"]: logger.warning(f"Peak RSS of the {mode} parse of {file_path} includes the imports (peak can't be reset)")
+            median_ms = median(measured[mode]["measurements"])
+            rss_growth = max(measured[mode]["peak_rss_kib"] - measured[mode]["rss_before_kib"], 0) / 1024
+            buffered_ms = median(buffered["measurements"])
+            buffered_growth = max(buffered["peak_rss_kib"] - buffered["rss_before_kib"], 0) / 1024
+
+            rows.append([file_path, round(size_in_mib, 3), mode, round(median_ms, 2), round(size_in_mib / median_ms * 1000, 3) if median_ms else "",
+                         round(measured[mode]["peak_rss_kib"] / 1024, 2), round(rss_growth, 2),
+                         round(median_ms / buffered_ms, 3) if buffered_ms else "", round(rss_growth / buffered_growth, 3) if buffered_growth else "",
+                         measured[mode]["tokens"], measured[mode]["rules"]])
+
+    return rows, failed_inputs
+
+if __name__ == '__main__':
+    argument_parser = argparse.ArgumentParser(description="Parses a file with one parse path and prints the measurements as json (see measure_in_subprocess).")
+    argument_parser.add_argument("mode", choices=MODES)
+    argument_parser.add_argument("file")
+    argument_parser.add_argument("--package", required=True)
+    argument_parser.add_argument("--lexer", required=True)
+    argument_parser.add_argument("--parser", required=True)
+    argument_parser.add_argument("--start-rule", required=True)
+    argument_parser.add_argument("--runs", type=int, default=3)
+    argument_parser.add_argument("--chunk-size", type=int, default=65536)
+    arguments = argument_parser.parse_args()
+
+    print(json.dumps(measure_mode(arguments.mode, arguments.file, arguments.package, arguments.lexer, arguments.parser,
+                                  arguments.start_rule, max(arguments.runs, 1), arguments.chunk_size)))
@@ -0,0 +1,142 @@
+import glob
+import os
+import timeit
+from statistics import median
+
+from antlr4 import InputStream, CommonTokenStream, PredictionMode
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
+
+from parse_driver import load_grammar
+
+
+TWO_STAGE_HEADER = ["Input", "Size [chars]", "Full LL [ms]", "Two-stage [ms]", "Speedup", "LL fallback", "Identical tree"]
+
+
+def parse_two_stage(text, start_rule=None, lexer_class=None, parser_class=None, error_listeners=None):
+    """
+        Parses a text with the two-stage strategy: First with SLL prediction and a bail out error strategy, which is fast and enough for almost all inputs.
+        Only if this fails, the text gets parsed again with full LL prediction and the default error strategy (so syntax errors are reported as usual).
+        This function is meant to be imported as parse entry point in production code.
+
+        Args:
+            text (str): The text to parse.
+            start_rule (str): The start rule. Default value is None: PARSER_START_RULE is used.
+            lexer_class (class): The lexer class. Default value is None: The lexer of PARSER_PACKAGE is used.
+            parser_class (class): The parser class. Default value is None: The parser of PARSER_PACKAGE is used.
+            error_listeners (list): The error listeners of the full LL stage. Default value is None: The default console listener is kept.
+        Returns:
+            A tuple of the parse tree, the parser and if the full LL stage was needed.
+    """
+
+    from config import PARSER_START_RULE
+
+    if lexer_class is None or parser_class is None:
+        lexer_class, parser_class = load_grammar()
+
+    token_stream = CommonTokenStream(lexer_class(InputStream(text)))
+    parser = parser_class(token_stream)
+    default_listeners = parser._listeners
+    rule = getattr(parser, start_rule or PARSER_START_RULE)
+
+    parser._interp.predictionMode = PredictionMode.SLL
+    parser._errHandler = BailErrorStrategy()
+    parser.removeErrorListeners()
+
+    try:
+        return rule(), parser, False
+    except ParseCancellationException:
+        pass
+
+    token_stream.seek(0)
+    parser.reset()
+    parser._interp.predictionMode = PredictionMode.LL
+    parser._errHandler = DefaultErrorStrategy()
+    parser._listeners = list(error_listeners) if error_listeners is not None else default_listeners
+
+    return rule(), parser, True
+
+def parse_full_ll(text, start_rule=None, lexer_class=None, parser_class=None):
+    """
+        Parses a text with full LL prediction (the default of the generated parser).
+
+        Args:
+            text (str): The text to parse.
+            start_rule (str): The start rule. Default value is None: PARSER_START_RULE is used.
+            lexer_class (class): The lexer class. Default value is None: The lexer of PARSER_PACKAGE is used.
+            parser_class (class): The parser class. Default value is None: The parser of PARSER_PACKAGE is used.
+        Returns:
+            A tuple of the parse tree and the parser.
+    """
+
+    from config import PARSER_START_RULE
+
+    if lexer_class is None or parser_class is None:
+        lexer_class, parser_class = load_grammar()
+
+    parser = parser_class(CommonTokenStream(lexer_class(InputStream(text))))
+    parser._interp.predictionMode = PredictionMode.LL
+
+    return getattr(parser, start_rule or PARSER_START_RULE)(), parser
+
+def load_inputs(pattern):
+    """
+        Loads the input files of a glob.
+
+        Args:
+            pattern (str): Glob of the input files.
+        Returns:
+            A list of tuples (file path, text).
+    """
+
+    inputs = []
+    for file_path in sorted(glob.glob(pattern, recursive=True)):
+        if not os.path.isfile(file_path): continue
+
+        with open(file_path, encoding="utf-8") as input_file:
+            inputs.append((file_path, input_file.read()))
+
+    return inputs
+
+def benchmark_two_stage(inputs, it=10):
+    """
+        Parses every input with full LL and with the two-stage strategy and compares the latency and the parse trees.
+
+        Args:
+            inputs (list): A list of tuples (name, text).
+            it (int): The number of iterations per input and strategy (the median is used).
+        Returns:
+            A tuple of the rows (see TWO_STAGE_HEADER) and a dict with the aggregated speedup, the fraction of inputs with LL fallback and if all trees are identical.
+    """
+
+    from print import print_progress_bar
+
+    rows = []
+    sum_full_ll = 0
+    sum_two_stage = 0
+
+    for i, (name, text) in enumerate(inputs):
+        full_ll_tree, full_ll_parser = parse_full_ll(text) # warm up both strategies before measuring
+        two_stage_tree, two_stage_parser, fallback = parse_two_stage(text)
+
+        full_ll_time = median(timeit.repeat(lambda: parse_full_ll(text), repeat=it, number=1)) * 1000
+        two_stage_time = median(timeit.repeat(lambda: parse_two_stage(text), repeat=it, number=1)) * 1000
+
+        identical = full_ll_tree.toStringTree(recog=full_ll_parser) == two_stage_tree.toStringTree(recog=two_stage_parser)
+
+        sum_full_ll += full_ll_time
+        sum_two_stage += two_stage_time
+        rows.append([name, len(text), full_ll_time, two_stage_time, round(full_ll_time / two_stage_time, 2) if two_stage_time else "", fallback, identical])
+
+        print_progress_bar(i + 1, len(inputs))
+
+    summary = {
+        "amount_of_inputs": len(rows),
+        "sum_full_ll": sum_full_ll,
+        "sum_two_stage": sum_two_stage,
+        "speedup": sum_full_ll / sum_two_stage if sum_two_stage else 0,
+        "fallback_fraction": sum(1 for row in rows if row[5]) / len(rows) if rows else 0,
+        "all_identical": all(row[6] for row in rows),
+    }
+
+    return rows, summary
@@ -0,0 +1,223 @@
+import codecs
+
+from antlr4 import Token
+from antlr4.BufferedTokenStream import TokenStream
+
+
+class UnbufferedCharStream:
+    """
+        Char stream over a bytes-like object (e.g. a memory-mapped file), which decodes the data incrementally
+        and only keeps a sliding window of characters (the python runtime has no unbuffered streams).
+        The window starts at the first mark (the lexer marks the start of every token), so only the current token and a decoded chunk stay in memory.
+        Seeking and getText are only possible inside the window.
+    """
+
+    def __init__(self, data, chunk_size=65536, encoding="utf-8", name="<unbuffered>"):
+        self.name = name
+        self.data = data
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        self.offset = 0 # byte offset of the next chunk
+        self.eof = len(data) == 0
+        self.buffer = "" # decoded characters, buffer[0] has the index buffer_start_index
+        self.buffer_start_index = 0
+        self.p = 0 # position of the current character in the buffer
+        self.markers = 0
+        self.last_char = Token.EOF
+
+    @property
+    def index(self):
+        return self.buffer_start_index + self.p
+
+    @property
+    def size(self):
+        raise NotImplementedError("Unbuffered stream has no size")
+
+    def fill(self, amount):
+        """
+            Decodes chunks until the buffer has at least amount characters after the current position or the data is exhausted.
+
+            Args:
+                amount (int): The amount of characters.
+        """
+
+        while len(self.buffer) - self.p < amount and not self.eof:
+            chunk = self.data[self.offset:self.offset + self.chunk_size]
+            self.offset += len(chunk)
+            self.eof = self.offset >= len(self.data)
+            if self.p >= self.chunk_size and self.markers == 0: self.trim()
+            self.buffer += self.decoder.decode(chunk, final=self.eof)
+
+    def trim(self):
+        """
+            Drops the consumed characters (only without markers, the drop is amortized over a chunk).
+        """
+
+        self.buffer = self.buffer[self.p:]
+        self.buffer_start_index += self.p
+        self.p = 0
+
+    def LA(self, offset):
+        if offset == 0: return 0 # undefined
+        if offset < 0:
+            if offset == -1: return self.last_char
+            raise IndexError("Unbuffered stream can only look back one character")
+
+        position = self.p + offset - 1
+        if position >= len(self.buffer): self.fill(offset)
+        if position >= len(self.buffer): return Token.EOF
+
+        return ord(self.buffer[position])
+
+    def LT(self, offset):
+        return self.LA(offset)
+
+    def consume(self):
+        if self.LA(1) == Token.EOF: raise Exception("cannot consume EOF")
+
+        self.last_char = ord(self.buffer[self.p])
+        self.p += 1
+
+    def mark(self):
+        self.markers += 1
+        return -self.markers
+
+    def release(self, marker):
+        if -marker != self.markers: raise ValueError(f"Release of marker {marker} out of order")
+        self.markers -= 1
+        if self.markers == 0 and self.p >= self.chunk_size: self.trim()
+
+    def seek(self, index):
+        if index < self.buffer_start_index: raise ValueError(f"Can't seek to {index} before the window (starts at {self.buffer_start_index})")
+
+        while self.index < index and self.LA(1) != Token.EOF: self.consume()
+        if index < self.index:
+            self.p = index - self.buffer_start_index
+            self.last_char = ord(self.buffer[self.p - 1]) if self.p > 0 else Token.EOF
+
+    def getText(self, start, stop):
+        if start < self.buffer_start_index: raise ValueError(f"Text at {start} isn't in the window (starts at {self.buffer_start_index})")
+
+        return self.buffer[start - self.buffer_start_index:stop - self.buffer_start_index + 1]
+
+    def __str__(self):
+        return self.name
+
+class UnbufferedTokenStream(TokenStream):
+    """
+        Token stream, which pulls the tokens on demand from the token source and only keeps a sliding window of tokens
+        (from the first mark of the parser, e.g. during adaptive prediction, to the lookahead).
+        Tokens of other channels than the default channel get dropped (like CommonTokenStream hides them), the indexes count only the visible tokens.
+        The lexer has to copy the token texts (CommonTokenFactory(copyText=True)), because the char stream can't return them later.
+    """
+
+    def __init__(self, token_source, channel=Token.DEFAULT_CHANNEL):
+        self.tokenSource = token_source
+        self.channel = channel
+        self.tokens = [] # tokens[0] has the index buffer_start_index
+        self.p = 0 # position of the current token in the window
+        self.current_token_index = 0
+        self.markers = 0
+        self.last_token = None
+        self.last_token_before_window = None
+        self.fill(1)
+
+    @property
+    def index(self):
+        return self.current_token_index
+
+    @property
+    def size(self):
+        raise NotImplementedError("Unbuffered stream has no size")
+
+    @property
+    def buffer_start_index(self):
+        return self.current_token_index - self.p
+
+    def fill(self, amount):
+        """
+            Pulls tokens from the token source until the window has amount tokens after the current position or the EOF token is reached.
+
+            Args:
+                amount (int): The amount of tokens.
+        """
+
+        while len(self.tokens) - self.p < amount and not (self.tokens and self.tokens[-1].type == Token.EOF):
+            token = self.tokenSource.nextToken()
+            if token.channel != self.channel and token.type != Token.EOF: continue
+            if token.type == Token.EOF: token.text = "<EOF>" # the copied text of EOF is empty (CommonToken shows "<EOF>" for it)
+            token.tokenIndex = self.buffer_start_index + len(self.tokens)
+            self.tokens.append(token)
+
+    def get(self, index):
+        position = index - self.buffer_start_index
+        if position < 0 or position >= len(self.tokens):
+            raise IndexError(f"Token {index} isn't in the window [{self.buffer_start_index}, {self.buffer_start_index + len(self.tokens) - 1}]")
+
+        return self.tokens[position]
+
+    def LT(self, offset):
+        if offset == 0: return None
+        if offset < 0:
+            if offset == -1: return self.last_token
+            raise IndexError("Unbuffered stream can only look back one token")
+
+        self.fill(offset)
+        position = self.p + offset - 1
+
+        return self.tokens[position] if position < len(self.tokens) else self.tokens[-1] # EOF
+
+    def LA(self, offset):
+        return self.LT(offset).type
+
+    def consume(self):
+        if self.LA(1) == Token.EOF: raise Exception("cannot consume EOF")
+
+        self.last_token = self.tokens[self.p]
+        self.p += 1
+        self.current_token_index += 1
+        if self.p == len(self.tokens) and self.markers == 0: self.trim()
+        self.fill(1)
+
+    def trim(self):
+        """
+            Drops the consumed tokens (only without markers).
+        """
+
+        if self.p == 0: return
+        self.last_token_before_window = self.tokens[self.p - 1]
+        del self.tokens[:self.p]
+        self.p = 0
+
+    def mark(self):
+        self.markers += 1
+        return -self.markers
+
+    def release(self, marker):
+        if -marker != self.markers: raise ValueError(f"Release of marker {marker} out of order")
+        self.markers -= 1
+        if self.markers == 0: self.trim()
+
+    def seek(self, index):
+        if index == self.current_token_index: return
+
+        if index > self.current_token_index: self.fill(index - self.current_token_index + 1)
+        position = index - self.buffer_start_index
+        if position < 0 or position >= len(self.tokens):
+            raise ValueError(f"Can't seek to {index} outside of the window [{self.buffer_start_index}, {self.buffer_start_index + len(self.tokens) - 1}]")
+
+        self.p = position
+        self.current_token_index = index
+        self.last_token = self.tokens[position - 1] if position > 0 else self.last_token_before_window
+
+    def getText(self, start=None, stop=None):
+        start = self.buffer_start_index if start is None else start.tokenIndex if isinstance(start, Token) else start
+        stop = self.buffer_start_index + len(self.tokens) - 1 if stop is None else stop.tokenIndex if isinstance(stop, Token) else stop
+
+        window_start = max(start, self.buffer_start_index) - self.buffer_start_index
+        window_stop = stop - self.buffer_start_index
+
+        return "".join(token.text for token in self.tokens[window_start:window_stop + 1] if token.type != Token.EOF)
+
+    def getSourceName(self):
+        return self.tokenSource.getSourceName()